@@ -8,14 +8,16 @@ Application class to store properties of the application being created
 """
 
 
-import os, sys, random, re, logging, math
+import os, sys, re, logging, math
 import wx
 
-import common, config, misc, plugins, errors, compat
+import common, config, misc, errors, compat, decorators
 import bugdialog
 import new_properties as np
 
 
+_preview_cache = decorators.Cache("application.preview", maxsize=config.preview_cache_size)  # see _compile_preview()
+
 
 class FileDirDialog(object):
     """Custom class which displays a FileDialog or a DirDialog, according to the value of the
@@ -379,6 +381,7 @@ class Application(np.PropertyOwner):
             writer.new_project(self, out_path, preview)
             writer.generate_code(self.node, widget)
             writer.finalize()
+            common.save_checksum_manifests()
         except errors.WxgBaseException as inst:
             misc.error_message( _("Error generating code:\n%s")%inst )
             return
@@ -403,30 +406,40 @@ class Application(np.PropertyOwner):
     def is_visible(self):
         return True
 
-    def _get_preview_filename(self):
-        import warnings
-        warnings.filterwarnings("ignore", "tempnam", RuntimeWarning, "application")
-        if compat.PYTHON2:
-            out_name = os.tempnam(None, 'wxg') + '.py'
+    def _compile_preview(self, widget):
+        """Generate the Python code for the preview of the toplevel widget into memory and compile it.
+        The code objects are cached by the hash of the widget's subtree, i.e. an unchanged widget is not generated
+        again. Returns None in case of errors."""
+        common.property_panel.flush()
+        writer = common.code_writers["python"].copy()
+        try:
+            writer.new_project(self, "<preview>", True)
+            key = writer._get_node_hash(widget.node)
+            code = _preview_cache.get(key)
+            if code is None:
+                writer.generate_code(self.node, widget)
+                writer.finalize()
+                code = _preview_cache.put( key, compile(writer.buffers[writer.out_dir], writer.out_dir, "exec") )
+        except errors.WxgBaseException as inst:
+            misc.error_message( _("Error generating code:\n%s")%inst )
+            return None
+        finally:
+            writer.clean_up(self.node)
+        return code
+
+    def _exec_preview(self, code):
+        "Execute the compiled preview code in a new namespace; the project directory is searched for imports"
+        namespace = {"__name__": "_wxglade_preview"}
+        path = self.filename and os.path.dirname(os.path.abspath(self.filename))
+        if path and path not in sys.path:
+            sys.path.append(path)
         else:
-            # create a temporary file at either the output path or the project path
-            error = None
-            if not self.filename:
-                error = "Save project first; a temporary file will be created in the same directory."
-            else:
-                dirname, basename = os.path.split(self.filename)
-                basename, extension = os.path.splitext(basename)
-                if not os.path.exists(dirname):
-                    error = "Directory '%s' not found"%dirname
-                elif not os.path.isdir(dirname):
-                    error = "'%s' is not a directory"%dirname
-            if error:
-                misc.error_message(error)
-                return None
-            while True:
-                out_name = os.path.join(dirname, "_%s_%d.py"%(basename,random.randrange(10**8, 10**9)))
-                if not os.path.exists(out_name): break
-        return out_name
+            path = None
+        try:
+            exec(code, namespace)
+        finally:
+            if path: sys.path.remove(path)
+        return namespace
 
     def preview(self, widget, position=None):
         """Generate and instantiate preview widget.
@@ -441,44 +454,22 @@ class Application(np.PropertyOwner):
                 #return
         # XXX check other things as well, e.g. different bitmap sizes for BitmapButton
 
-        preview_filename = self._get_preview_filename()
-        if preview_filename is None: return
         widget_class_name = widget.klass
 
         # make a valid name for the class (this can be invalid for some sensible reasons...)
         widget_class = widget.klass[widget.klass.rfind('.') + 1:]
         widget_class = widget.klass[widget.klass.rfind(':') + 1:]
-        # ALB 2003-11-08: always randomize the class name: this is to make preview work even when there are multiple
-        # classes with the same name (which makes sense for XRC output...)
-        widget_class = '_%d_%s' % (random.randrange(10 ** 8, 10 ** 9), widget_class)
+        # ALB 2003-11-08: always prefix the class name: this is to make preview work even when there are multiple
+        # classes with the same name (which makes sense for XRC output...); the prefix is fixed to allow caching
+        widget_class = '_Preview_%s' % widget_class
         widget.properties["class"].set(widget_class)
 
-        if wx.Platform == "__WXMAC__" and not compat.PYTHON2:
-            # workaround for Mac OS testing: sometimes the caches need to be invalidated
-            import importlib
-            importlib.invalidate_caches()
-
         frame = None
         try:
-            self.generate_code(True, preview_filename, widget)
-            # import generated preview module dynamically
-            preview_path = os.path.dirname(preview_filename)
-            preview_module_name = os.path.basename(preview_filename)
-            preview_module_name = os.path.splitext(preview_module_name)[0]
-            preview_module = plugins.import_module(preview_path, preview_module_name)
-            if not preview_module:
-                misc.error_message( _('Can not import the preview module from file \n"%s".\n'
-                                      'The details are written to the log file.\n'
-                                      'If you think this is a wxGlade bug, please report it.') % self.output_path )
-                return None
-
-            try:
-                preview_class = getattr(preview_module, widget.klass)
-            except AttributeError:
-                # module loade previously -> do a re-load XXX this is required for Python 3; check alternatives
-                import importlib
-                preview_module = importlib.reload(preview_module)
-                preview_class = getattr(preview_module, widget.klass)
+            # generate and compile in memory; no temporary file and no module import
+            code = self._compile_preview(widget)
+            if code is None: return None
+            preview_class = self._exec_preview(code).get(widget.klass)
 
             if not preview_class:
                 misc.error_message( _('No preview class "%s" found.\nThe details are written to the log file.\n'
@@ -531,18 +522,14 @@ class Application(np.PropertyOwner):
             frame.Show()
             # install handler for key down events
             frame.Bind(wx.EVT_CHAR_HOOK, self.on_char_hook)
-
-            # remove the temporary file
-            if not config.debugging:
-                name = os.path.join(preview_path, preview_module_name+".py")
-                if os.path.isfile(name): os.unlink(name)
         except Exception as inst:
             if config.debugging or config.testing: raise
             widget.preview_widget = None
             widget.properties["preview"].set_label(_('Show Preview'))
             bugdialog.Show(_("Generate Preview"), inst)
-        # XXX restore app state
-        widget.properties["class"].set(widget_class_name)
+        finally:
+            # XXX restore app state
+            widget.properties["class"].set(widget_class_name)
         return frame
     
     def on_char_hook(self, event):
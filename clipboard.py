@@ -128,34 +128,38 @@ class DropTarget(wx.DropTarget):
                 elif hasattr(_current_drag_source, "window"):  # a sizer
                     misc.set_focused_widget(_current_drag_source.window)
 
-        if compatible=="AddSlot":
-            # dropped on a sizer -> add slot
-            dst_widget._add_slot()
-            dst_widget.layout()
-            dst_widget = dst_widget.children[-1] # the slot
-        elif compatible=="Slot":
-            # insert a slot or fill empty slot
-            pos = dst_widget.pos
-            dst_widget.sizer._insert_slot(pos)
-            dst_widget = dst_widget.sizer.children[pos] # the slot
-
-        if not hasattr(dst_widget, "clipboard_paste"):
-            return wx.DragCancel
-
-        # use cut and paste functionality from clipboard to do the actual work #########################################
-        fmt = self._get_received_format()
-        data = self.data_objects[fmt].GetData()  # the data as string
-        self.fmt = None
-
-        if _current_drag_source and not copy:
-            with src_widget.frozen():
-                src_widget.remove()
+        # record the change for undo; for a move, the source may be in another toplevel window
+        moved = [src_widget] if _current_drag_source and not copy else []
+        changing = (dst_widget, len(dst_widget.children)) if compatible=="AddSlot" else dst_widget
+        with common.history.structure_change(changing, *moved):
+            if compatible=="AddSlot":
+                # dropped on a sizer -> add slot
+                dst_widget._add_slot()
+                dst_widget.layout()
+                dst_widget = dst_widget.children[-1] # the slot
+            elif compatible=="Slot":
+                # insert a slot or fill empty slot
+                pos = dst_widget.pos
+                dst_widget.sizer._insert_slot(pos)
+                dst_widget = dst_widget.sizer.children[pos] # the slot
+
+            if not hasattr(dst_widget, "clipboard_paste"):
+                return wx.DragCancel
+
+            # use cut and paste functionality from clipboard to do the actual work #####################################
+            fmt = self._get_received_format()
+            data = self.data_objects[fmt].GetData()  # the data as string
+            self.fmt = None
+
+            if _current_drag_source and not copy:
+                with src_widget.frozen():
+                    src_widget.remove()
+                    dst_widget.clipboard_paste(data)
+            else:
                 dst_widget.clipboard_paste(data)
-        else:
-            dst_widget.clipboard_paste(data)
 
-        common.app_tree.expand(dst_node)
-        return default
+            common.app_tree.expand(dst_node)
+            return default
 
     def OnLeave(self):
         self.fmt = None
@@ -232,7 +236,8 @@ def copy(widget):
 def cut(widget):
     "Store a copy of self into the clipboard and delete the widget; returns True on success"
     if copy(widget):
-        widget.remove()
+        with common.history.structure_change(widget):
+            widget.remove()
         return True
     else:
         return False
@@ -282,7 +287,9 @@ def _paste(parent, sizer, pos, clipboard_data):
         # widget representation is still unicode, but parser need UTF8
         xml_utf8 = xml_unicode.encode('utf8')
         parser = xml_parse.ClipboardXmlWidgetBuilder(parent, sizer, pos, option, span, flag, border)
-        with parent and parent.frozen() or misc.dummy_contextmanager():
+        # for undo, record only the slot if the widget is pasted into a sizer
+        changing = sizer.children[pos] if sizer is not None and not sizer.is_virtual() else parent
+        with common.history.structure_change(changing), (parent and parent.frozen() or misc.dummy_contextmanager()):
             parser.parse_string(xml_utf8)
         common.app_tree.saved = False
         return True  # Widget hierarchy pasted.
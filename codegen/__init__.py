@@ -5,48 +5,107 @@
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import copy, logging, os, os.path, random, re, sys, time
+import copy, hashlib, json, logging, os, os.path, random, re, sys, time
 
-import common, config, compat, errors, misc
+import common, config, compat, errors, misc, profiler
 import new_properties as np
 import wcodegen
 
 
+class TaggedLines(list):
+    """List of lines (or larger chunks of code) with placeholder tags like '<NONCEwxGlade replace ...>'.
+
+    The positions of the tags are indexed on first use by _replace_tag(). As _replace_tag() replaces a tag in place,
+    the length of the list does not change and the index stays valid. If the length has changed in between, e.g.
+    by appending lines, the index is rebuilt. Positions are always verified before use."""
+    __slots__ = ("_tag_index", "_indexed_length")
+
+    def __init__(self, *args):
+        list.__init__(self, *args)
+        self._tag_index = None  # tag -> list of positions
+        self._indexed_length = None
+
+    def find_tag(self, tag):
+        "returns the positions of the items that are equal to tag"
+        if self._tag_index is None or self._indexed_length != len(self):
+            index = {}
+            for i, line in enumerate(self):
+                if line[:1] == "<" and "wxGlade" in line:  # a tag is always a separate item
+                    index.setdefault(line, []).append(i)
+            self._tag_index = index
+            self._indexed_length = len(self)
+        return [i for i in self._tag_index.get(tag, []) if self[i] == tag]
+
+
 def _replace_tag(lst, tag, content):
-    ret = False
+    """Replace all items of lst that are equal to tag with content (a list of strings or a string).
+    If tag is not found, it's tried again with a trailing newline, which is then added to the content as well.
+    The replacement is done in place, i.e. a list content is joined into a single item.
+    Returns True if the tag was found."""
+    if isinstance(lst, TaggedLines):
+        find = lst.find_tag
+    else:
+        find = lambda tag: [i for i, line in enumerate(lst) if line == tag]
+    positions = find(tag)
     add_line = False
-    if not tag in lst and not tag.endswith("\n"):
+    if not positions and not tag.endswith("\n"):
         tag = tag + "\n"
         add_line = True
-    while True:
-        try:
-            idx = lst.index(tag)
-        except ValueError:
-            return ret
-        if isinstance(content, list):
-            if add_line:
-                lst[idx:idx+1] = content + ["\n"]
-            else:
-                lst[idx:idx+1] = content
-        elif isinstance(content, compat.basestring):
-            if add_line:
-                lst[idx] = content + "\n"
-            else:
-                lst[idx] = content
+        positions = find(tag)
+    if not positions:
+        return False
+
+    if isinstance(content, list):
+        content = "".join(content)
+    elif not isinstance(content, compat.basestring):
+        raise ValueError("Internal error")
+    if add_line:
+        content = content + "\n"
+    for idx in positions:
+        lst[idx] = content
+    return True
+
+
+def _check_triple_quotes(line, quote):
+    """Track triple quoted strings over the lines of a Python or Lisp source file.
+    quote is the opening quote of the string the previous line ended in, or None.
+    Returns the same information for the given line."""
+    quote_index = -1
+    if not quote:
+        triple_dquote_index = line.find('"""')
+        triple_squote_index = line.find("'''")
+        if triple_squote_index == -1:
+            quote_index, tmp_quote_str = triple_dquote_index, '"""'
+        elif triple_dquote_index == -1:
+            quote_index, tmp_quote_str = triple_squote_index, "'''"
         else:
-            raise ValueError("Internal error")
-        ret = True
+            quote_index, tmp_quote_str = min( (triple_squote_index, "'''"), (triple_dquote_index, '"""') )
+        if quote_index == -1:
+            return None
+        quote = tmp_quote_str
+    end_index = line.rfind(quote)
+    if quote_index < end_index and end_index != -1:
+        return None
+    return quote
+
+
+_token_cache = {}  # (class, file name, encoding, args) -> (size, mtime, lines, tokens); see _get_tokens()
+_TOKEN_CACHE_SIZE = 100
 
 
 class BaseSourceFileContent(object):
     """Keeps info about an existing file that has to be updated, to replace only
     the lines inside a wxGlade block, an to keep the rest of the file as it was
 
+    The file is read in a single pass by _tokenize(), which returns the lines that are not just to be copied or,
+    inside wxGlade blocks, to be skipped. The result is cached as long as the file is not modified.
+
     Attributers to be defined in derived classes:
      rec_block_start:   Regexp to match the begin of a wxglade block
      rec_block_end:     Regexp to match the end of a wxGlade block
      rec_class_decl:    Regexp to match class declarations
-     rec_event_handler: Regexp to match event handlers"""
+     rec_event_handler: Regexp to match event handlers
+     rec_candidate:     Regexp to find lines that may match one of the others or is_end_of_class / is_import_line"""
 
     def __init__(self, name, code_writer):
         # initialise instance logger
@@ -78,6 +137,126 @@ class BaseSourceFileContent(object):
         self.class_name = None
         self.new_classes_inserted = False
 
+    def _get_tokens(self, filename, *args):
+        """Load and tokenize a file; returns the lines and the tokens; see _tokenize().
+        The result is cached as long as size and modification time of the file do not change."""
+        stat = os.stat(filename)
+        key = (self.__class__, os.path.abspath(filename), self.code_writer.app_encoding, args)
+        cached = _token_cache.get(key)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime):
+            return cached[2:]
+        lines = self._load_file(filename)
+        tokens = self._tokenize(lines, *args)
+        if len(_token_cache) >= _TOKEN_CACHE_SIZE:
+            _token_cache.clear()
+        _token_cache[key] = (stat.st_size, stat.st_mtime, lines, tokens)
+        return lines, tokens
+
+    def _update_string_state(self, line, state):
+        """Track strings or documentation over the lines of the file;
+        state is the value returned for the previous line (initially None).
+        Returns the new state and a mode: None, 'string' if wxGlade statements are to be ignored in this line
+        or 'verbatim' if the line is to be kept as is in any case."""
+        return state, None
+
+    def _tokenize(self, lines):
+        """Classify the lines of a source file in a single pass.
+        Returns a list of tokens (line index, kind, regexp match) for all lines except those to be just copied or,
+        inside wxGlade blocks, to be skipped. Kinds are 'class', 'block_start', 'block_end', 'verbatim' and 'line'
+        (an event handler, end of class or import line). This implementation is used for Python, Perl and Lisp."""
+        tokens = []
+        inside_block = False
+        state = None
+        rec_candidate = self.rec_candidate
+        for index, line in enumerate(lines):
+            state, mode = self._update_string_state(line, state)
+            if mode == 'verbatim':
+                tokens.append( (index, 'verbatim', None) )
+                continue
+            if not rec_candidate.search(line):
+                continue
+            if inside_block:
+                # ignore all the lines inside a wxGlade block
+                if self.rec_block_end.match(line):
+                    tokens.append( (index, 'block_end', None) )
+                    inside_block = False
+                continue
+            result = None
+            if mode != 'string':
+                result = self.rec_class_decl.match(line)
+                if result:
+                    tokens.append( (index, 'class', result) )
+                    continue
+                result = self.rec_block_start.match(line)
+                if result:
+                    tokens.append( (index, 'block_start', result) )
+                    inside_block = True
+                    continue
+                result = self.rec_event_handler.match(line)
+            if result or self.is_end_of_class(line) or self.is_import_line(line):
+                tokens.append( (index, 'line', result) )
+        return tokens
+
+    def _build_from_tokens(self, lines, tokens):
+        "Returns the untouched content, with tags for the wxGlade blocks; see build_untouched_content()"
+        out_lines = TaggedLines()
+        inside_block = False
+        position = 0  # index of the first line not yet processed
+        for index, kind, result in tokens:
+            if not inside_block and position<index:
+                out_lines.extend( lines[position:index] )
+            position = index + 1
+            line = lines[index]
+
+            if kind == 'verbatim':
+                out_lines.append(line)
+            elif kind == 'class':
+                if not self.class_name:
+                    # this is the first class declared in the file: insert the new ones before this
+                    out_lines.append('<%swxGlade insert new_classes>' % self.nonce)
+                    self.new_classes_inserted = True
+                self.class_name = result.group(1)
+                self.class_name = self.format_classname(self.class_name)
+                self.classes[self.class_name] = 1  # add the found class to the list of classes of this module
+                out_lines.append(line)
+            elif kind == 'block_start':
+                # replace the lines inside a wxGlade block with a tag that will be used later by add_class
+                spaces = result.group('spaces')
+                which_class = result.group('classname')
+                which_block = result.group('block')
+                if not which_class:
+                    which_class = self.class_name
+                else:
+                    which_class = self.format_classname(which_class)
+                self.spaces[which_class] = spaces
+                inside_block = True
+                if not self.class_name:
+                    out_lines.append( '<%swxGlade replace %s>' % (self.nonce, which_block) )
+                else:
+                    out_lines.append( '<%swxGlade replace %s %s>' % (self.nonce, which_class, which_block) )
+            elif kind == 'block_end':
+                inside_block = False
+            else:
+                if result:
+                    which_handler = result.group('handler')
+                    which_class = self.format_classname(result.group('class'))
+                    self.event_handlers.setdefault(which_class, {})[which_handler] = 1
+                if self.class_name and self.is_end_of_class(line):
+                    # add extra event handlers here...
+                    out_lines.append( '<%swxGlade event_handlers %s>' % (self.nonce, self.class_name) )
+                out_lines.append(line)
+                if self.is_import_line(line):
+                    # add a tag to allow extra modules
+                    out_lines.append( '<%swxGlade extra_modules>\n' % self.nonce )
+        if not inside_block:
+            out_lines.extend( lines[position:] )
+
+        if not self.new_classes_inserted:
+            # if we are here, the previous ``version'' of the file did not contain any class, so we must add the
+            # new_classes tag at the end of the file
+            out_lines.append( '<%swxGlade insert new_classes>' % self.nonce )
+        return out_lines
+
     def format_classname(self, class_name):
         "Format class name read from existing source file; may be overwritten in derived class"
         return class_name
@@ -167,6 +346,77 @@ class ClassLines(object):
         self.sizers_init = []     # Lines related to sizer objects declarations
 
 
+class _RecordingDict(dict):
+    "dict that records the keys that are set, e.g. all the dependencies of a toplevel, including the known ones"
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.recorded = set()
+
+    def __setitem__(self, key, value):
+        self.recorded.add(key)
+        dict.__setitem__(self, key, value)
+
+
+class CodeCache(object):
+    """Persistent cache for incremental code generation in multiple files mode.
+
+    For each toplevel widget, the hash of the serialized subtree and code writer settings is stored together with
+    size and modification time of the files written for it. The cache is stored in the output directory."""
+
+    def __init__(self, out_dir, lang_prefix):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.filename = os.path.join(out_dir, '.wxglade_%s.cache' % lang_prefix)
+        self.entries = {}  # name of toplevel widget -> dict with keys "hash", "files", "dependencies" and "classes"
+        self.used = set()  # names of the toplevel widgets of the current design
+        try:
+            with open(self.filename) as infile:
+                self.entries = json.load(infile)
+        except (EnvironmentError, ValueError):
+            pass
+
+    def _get_file_state(self, filename):
+        st = os.stat(filename)
+        return [filename, st.st_size, st.st_mtime]
+
+    def is_unchanged(self, name, hash_value):
+        "True if the hash is the same and all the files written for the toplevel widget are still untouched"
+        self.used.add(name)
+        entry = self.entries.get(name)
+        if not entry or entry["hash"] != hash_value:
+            return False
+        try:
+            for state in entry["files"]:
+                if self._get_file_state(state[0]) != state:
+                    return False
+        except EnvironmentError:
+            return False
+        return True
+
+    def get_dependencies(self, name):
+        return self.entries[name]["dependencies"]
+
+    def get_classes(self, name):
+        return self.entries[name]["classes"]
+
+    def update(self, name, hash_value, filenames, dependencies, classes):
+        try:
+            files = [self._get_file_state(filename) for filename in filenames]
+        except EnvironmentError:
+            self.entries.pop(name, None)
+            return
+        self.entries[name] = {"hash": hash_value, "files": files, "dependencies": sorted(dependencies),
+                              "classes": sorted(classes)}
+
+    def save(self):
+        # drop the entries of removed toplevel widgets
+        entries = dict( (name, entry) for name, entry in self.entries.items() if name in self.used )
+        try:
+            with open(self.filename, "w") as outfile:
+                json.dump(entries, outfile, indent=1, sort_keys=True)
+        except EnvironmentError as inst:
+            self._logger.warning( _('Can not write code generation cache "%s": %s'), self.filename, inst )
+
+
 class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
     """Dictionary of objects used to generate the code in a given language.
 
@@ -369,6 +619,8 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
         self._textdomain = 'app'
         self._use_gettext = config.default_use_gettext
         self._widget_extra_modules = {}
+        self._saved_files = None  # with incremental code generation: names of the files written for the toplevel
+        self.buffers = None       # for preview: file name -> encoded content; save_file() does not write to disk
 
     def new_project(self, app, out_path=None, preview=False):
         "Initialise generic and language independent code generator settings; see init_lang(), init_files()"
@@ -421,6 +673,8 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
             self.out_dir = out_path or config.default_output_file
         self.out_dir = os.path.normpath( os.path.expanduser(self.out_dir.strip()) )
         self.preview = preview
+        if preview:
+            self.buffers = {}
 
         self.init_lang(app)      # call initialisation of language specific settings
         self.check_values()            # check the validity of the set values
@@ -449,7 +703,7 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
             else:
                 # if the file doesn't exist, create it and write the ``intro''
                 self.previous_source = None
-                self.output_file = []
+                self.output_file = TaggedLines()
                 self.output_file_name = out_path
                 self.output_file.extend( self.header_lines )
                 self.output_file.append('<%swxGlade extra_modules>\n' % self.nonce)
@@ -541,9 +795,11 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
 
         # then the item
         if obj.is_toplevel and not obj.is_sizer:  # XXX as long as generate_code is called with 
-            self.add_class(obj)
+            with profiler.stage("add_class"):
+                self.add_class(obj)
         if self.toplevels:
-            self.add_object(obj)
+            with profiler.stage("add_object"):
+                self.add_object(obj)
 
         # check whether the object belongs to some sizer; if applicable, add it to the sizer at the top of the stack
         parent = node.parent.widget
@@ -562,9 +818,32 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
         self.class_names = {}
         self.toplevels = []
         self.sizers = []
+        cache = self._open_cache()  if widget is None else  None
         for c in root.children or []:
             if widget is not None and c is not widget.node: continue # for preview
-            self._generate_code(c)
+            if cache is None:
+                with profiler.stage("_generate_code", c.widget.name):
+                    self._generate_code(c)
+                continue
+            # incremental code generation: skip toplevels that have not been modified
+            hash_value = self._get_node_hash(c)
+            if cache.is_unchanged(c.widget.name, hash_value):
+                for dep in cache.get_dependencies(c.widget.name):
+                    self.dependencies[dep] = 1
+                # another toplevel with the same class must not generate it again
+                for klass in cache.get_classes(c.widget.name):
+                    self.classes.setdefault(klass, self.ClassLines()).done = True
+                continue
+            done = self._get_done_classes()
+            self.dependencies = _RecordingDict(self.dependencies)
+            self._saved_files = []
+            with profiler.stage("_generate_code", c.widget.name):
+                self._generate_code(c)
+            cache.update( c.widget.name, hash_value, self._saved_files, self.dependencies.recorded,
+                          [klass for klass in self._get_done_classes() if klass not in done] )
+            self._saved_files = None
+        if cache is not None:
+            cache.save()
         #if isinstance(root, application.Application):
         topwin = [c.widget for c in root.children if c.widget.name==root.widget.top_window]
         if topwin:
@@ -575,6 +854,32 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
             topwin = None
         self.add_app(root.widget, topwin)
 
+    def _open_cache(self):
+        "Return a CodeCache instance if incremental code generation is enabled and applicable"
+        if not self.multiple_files or self.preview or not config.preferences.incremental_codegen:
+            return None
+        return CodeCache(self.out_dir, self.lang_prefix)
+
+    def _get_done_classes(self):
+        "Return the names of the classes that have been generated already"
+        return set( klass for klass, lines in self.classes.items() if lines.done )
+
+    def _get_node_hash(self, node):
+        """Return a hash of the serialized subtree of a toplevel node, the code writer settings,
+        the dependencies and the classes collected so far, i.e. of everything the code for the node depends on"""
+        settings = [ self.language, self.for_version, self.indent_symbol, self.indent_amount, self.app_encoding,
+                     self._overwrite, self._mark_blocks, self._use_gettext, self._textdomain, self.out_dir,
+                     getattr(self, 'header_extension', None), getattr(self, 'source_extension', None),
+                     config.version, config.preferences.write_generated_from, common.app_tree.app.filename,
+                     sorted(self.dependencies), sorted(self._get_done_classes()) ]
+        output = []
+        node.write(output, 0)
+        md5 = hashlib.md5()
+        md5.update( repr(settings).encode("utf-8") )
+        for line in output:
+            md5.update( line.encode("utf-8") )
+        return md5.hexdigest()
+
     @property
     def toplevel(self):
         return self.toplevels and self.toplevels[-1] or None
@@ -915,7 +1220,8 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
             return
 
         try:
-            init, props, layout = builder.get_code(sub_obj)
+            with profiler.stage("get_code", sub_obj.base):
+                init, props, layout = builder.get_code(sub_obj)
         except:
             self._logger.error('%s', sub_obj)
             # this is an error, let the exception be raised the details are logged by the global exception handler
@@ -1403,6 +1709,11 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
                                                 inst.object[inst.start:inst.end].encode('unicode-escape'),
                                                 inst.start, inst.end )
 
+        if self.buffers is not None:
+            # preview: keep in memory
+            self.buffers[filename] = b"".join(tmp)
+            return
+
         # check for necessary sub directories e.g. for Perl or Python modules
         dirname = os.path.dirname(filename)
         if dirname and not os.path.isdir(dirname):
@@ -1412,8 +1723,12 @@ class BaseLangCodeWriter(wcodegen.BaseCodeWriter):
                 self._logger.exception( _('Can not create output directory "%s"'), dirname )
 
         # save the file now
+        if self._saved_files is not None:
+            self._saved_files.append(filename)
         try:
-            common.save_file(filename, tmp, 'codegen')
+            with profiler.stage("save_file"):
+                written = common.save_file(filename, tmp, 'codegen')
+            profiler.add_file(filename, sum(len(line) for line in tmp), written)
         except (errors.WxgBaseException, EnvironmentError):
             # EnvironmentError's will be caught at a higher level
             raise
@@ -20,9 +20,9 @@ methods of the parent object.
 
 import os.path, re
 
-from codegen import BaseLangCodeWriter, BaseSourceFileContent, BaseWidgetHandler, _replace_tag
+from codegen import BaseLangCodeWriter, BaseSourceFileContent, BaseWidgetHandler, TaggedLines, _replace_tag
 from codegen import ClassLines as BaseClassLines
-import config, compat, misc
+import config, compat, misc, profiler
 import wcodegen
 
 
@@ -125,15 +125,15 @@ class SourceFileContent(BaseSourceFileContent):
         BaseSourceFileContent.build_untouched_content(self)
         self._build_untouched(self.name + "." + self.source_extension, False)
 
-    def _build_untouched(self, filename, is_header):
-        prev_was_handler = False
-        events_tag_added = False
-
+    def _tokenize(self, lines, is_header):
+        """Classify the lines of a header or source file in a single pass; see BaseSourceFileContent._tokenize().
+        Kinds are 'class', 'block_start', 'block_end' and 'line' (any other line to be processed by _build_untouched);
+        lines inside comments are not classified."""
+        tokens = []
         inside_block = False
         inside_comment = False
-        tmp_in = self._load_file(filename)
-        out_lines = []
-        for line in tmp_in:
+        prev_was_handler = False
+        for index, line in enumerate(lines):
             comment_index = line.find('/*')
             if not inside_comment and comment_index != -1 and comment_index > line.find('//'):
                 inside_comment = True
@@ -141,11 +141,45 @@ class SourceFileContent(BaseSourceFileContent):
                 end_index = line.find('*/')
                 if end_index > comment_index:
                     inside_comment = False
-            if not is_header:
-                result = None
-            else:
-                result = self.rec_class_decl.match(line)
-            if not inside_comment and not inside_block and result:
+            if inside_block:
+                # ignore all the lines inside a wxGlade block
+                if 'wxGlade' in line and self.rec_block_end.match(line):
+                    tokens.append( (index, 'block_end', None) )
+                    inside_block = False
+                continue
+            if inside_comment:
+                continue
+            if not prev_was_handler and not 'wxGlade' in line and not 'class' in line and not 'EVENT_TABLE' in line:
+                continue
+            result = is_header and self.rec_class_decl.match(line)
+            if result:
+                tokens.append( (index, 'class', result) )
+                continue
+            result = self.rec_block_start.match(line)
+            if result:
+                tokens.append( (index, 'block_start', result) )
+                inside_block = True
+                continue
+            # the line after an event handler declaration needs to be processed
+            prev_was_handler = is_header and bool( self.rec_event_handler.match(line) )
+            tokens.append( (index, 'line', None) )
+        return tokens
+
+    def _build_untouched(self, filename, is_header):
+        prev_was_handler = False
+        events_tag_added = False
+
+        inside_block = False
+        lines, tokens = self._get_tokens(filename, is_header)
+        out_lines = TaggedLines()
+        position = 0  # index of the first line not yet processed
+        for index, kind, result in tokens:
+            if not inside_block and position<index:
+                out_lines.extend( lines[position:index] )
+            position = index + 1
+            line = lines[index]
+
+            if kind == 'class':
                 if not self.class_name:
                     # this is the first class declared in the file: insert the new ones before this
                     out_lines.append( '<%swxGlade insert new_classes>' % self.nonce )
@@ -154,62 +188,61 @@ class SourceFileContent(BaseSourceFileContent):
                 self.class_name = self.format_classname(self.class_name)
                 self.classes[self.class_name] = 1  # add the found class to the list of classes of this module
                 out_lines.append(line)
-            elif not inside_block:
-                result = self.rec_block_start.match(line)
-                if not inside_comment and result:
-                    # replace the lines inside a wxGlade block with a tag that will be used later by add_class
-                    spaces = result.group('spaces')
-                    which_class = result.group('classname')
-                    which_block = result.group('block')
-                    if not which_class:
+            elif kind == 'block_start':
+                # replace the lines inside a wxGlade block with a tag that will be used later by add_class
+                spaces = result.group('spaces')
+                which_class = result.group('classname')
+                which_block = result.group('block')
+                if not which_class:
+                    which_class = self.class_name
+                else:
+                    which_class = self.format_classname(which_class)
+                self.spaces[which_class] = spaces
+                inside_block = True
+                out_lines.append( '<%swxGlade replace %s %s>' %
+                                  (self.nonce, result.group('classname'), result.group('block') ) )
+            elif kind == 'block_end':
+                inside_block = False
+            else:
+                dont_append = False
+
+                # ALB 2004-12-08 event handling support...
+                if is_header:
+                    result = self.rec_event_handler.match(line)
+                    if result:
+                        prev_was_handler = True
+                        which_handler = result.group('handler')
                         which_class = self.class_name
+                        self.event_handlers.setdefault(which_class, {})[which_handler] = 1
                     else:
-                        which_class = self.format_classname(which_class)
-                    self.spaces[which_class] = spaces
-                    inside_block = True
-                    out_lines.append( '<%swxGlade replace %s %s>' %
-                                      (self.nonce, result.group('classname'), result.group('block') ) )
-                else:
-                    dont_append = False
-
-                    # ALB 2004-12-08 event handling support...
-                    if is_header and not inside_comment:
-                        result = self.rec_event_handler.match(line)
+                        if prev_was_handler:
+                            # add extra event handlers here...
+                            out_lines.append('<%swxGlade event_handlers %s>' % (self.nonce, self.class_name) )
+                            prev_was_handler = False
+                            events_tag_added = True
+                        elif not events_tag_added and \
+                                 self.is_end_of_class(line):
+                            out_lines.append( '<%swxGlade event_handlers %s>' % (self.nonce, self.class_name) )
+                        # now try to see if we already have a DECLARE_EVENT_TABLE
+                        result = self.rec_decl_event_table.match(line)
                         if result:
-                            prev_was_handler = True
-                            which_handler = result.group('handler')
-                            which_class = self.class_name
-                            self.event_handlers.setdefault(which_class, {})[which_handler] = 1
-                        else:
-                            if prev_was_handler:
-                                # add extra event handlers here...
-                                out_lines.append('<%swxGlade event_handlers %s>' % (self.nonce, self.class_name) )
-                                prev_was_handler = False
-                                events_tag_added = True
-                            elif not events_tag_added and \
-                                     self.is_end_of_class(line):
-                                out_lines.append( '<%swxGlade event_handlers %s>' % (self.nonce, self.class_name) )
-                            # now try to see if we already have a DECLARE_EVENT_TABLE
-                            result = self.rec_decl_event_table.match(line)
-                            if result:
-                                self.event_table_decl[self.class_name] = True
-                    elif not inside_comment:
-                        result = self.rec_event_handlers_marker.match(line)
-                        if result:
-                            out_lines.append( '<%swxGlade add %s event handlers>' % (self.nonce, result.group(1)) )
-                            dont_append = True
-                        result = self.rec_def_event_table.match(line)
-                        if result:
-                            which_class = result.group(1)
-                            self.event_table_def[which_class] = True
-                    # ----------------------------------------
+                            self.event_table_decl[self.class_name] = True
+                else:
+                    result = self.rec_event_handlers_marker.match(line)
+                    if result:
+                        out_lines.append( '<%swxGlade add %s event handlers>' % (self.nonce, result.group(1)) )
+                        dont_append = True
+                    result = self.rec_def_event_table.match(line)
+                    if result:
+                        which_class = result.group(1)
+                        self.event_table_def[which_class] = True
+                # ----------------------------------------
+
+                if not dont_append:
+                    out_lines.append(line)
+        if not inside_block:
+            out_lines.extend( lines[position:] )
 
-                    if not dont_append:
-                        out_lines.append(line)
-            else:
-                # ignore all the lines inside a wxGlade block
-                if self.rec_block_end.match(line):
-                    inside_block = False
         if is_header and not self.new_classes_inserted:
             # if we are here, the previous ``version'' of the file did not contain any class, so we must add the
             # new_classes tag at the end of the file
@@ -415,8 +448,8 @@ class CPPCodeWriter(BaseLangCodeWriter, wcodegen.CppMixin):
             else:
                 # if the file doesn't exist, create it and write the ``intro''
                 self.previous_source = None
-                self.output_header = []
-                self.output_file   = []
+                self.output_header = TaggedLines()
+                self.output_file   = TaggedLines()
 
                 # isolation directives
                 oh = os.path.basename(name + "." + self.header_extension).upper().replace( '.', '_' )
@@ -960,7 +993,8 @@ class CPPCodeWriter(BaseLangCodeWriter, wcodegen.CppMixin):
             return
 
         try:
-            init, ids, props, layout = builder.get_code(sub_obj)
+            with profiler.stage("get_code", sub_obj.base):
+                init, ids, props, layout = builder.get_code(sub_obj)
         except:
             print(sub_obj)
             raise  # this shouldn't happen
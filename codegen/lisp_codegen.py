@@ -20,7 +20,7 @@ import os
 import os.path
 import re
 
-from codegen import BaseLangCodeWriter, BaseSourceFileContent, BaseWidgetHandler
+from codegen import BaseLangCodeWriter, BaseSourceFileContent, BaseWidgetHandler, _check_triple_quotes
 import errors
 import wcodegen
 
@@ -60,86 +60,19 @@ class SourceFileContent(BaseSourceFileContent):
         r'\s*$'                                              # tailing spaces
         )
 
+    # lines that don't match this, can't match any of the regular expressions above
+    rec_candidate = re.compile(r'wxGlade|class|use-package')
+
+    def _update_string_state(self, line, state):
+        # wxGlade statements inside triple quoted strings are ignored
+        state = _check_triple_quotes(line, state)
+        return state, ('string' if state else None)
+
     def build_untouched_content(self):
+        "Builds the untouched content, replacing the wxGlade blocks with tags; see BaseSourceFileContent"
         BaseSourceFileContent.build_untouched_content(self)
-        inside_block = False
-        inside_triple_quote = False
-        triple_quote_str = None
-        tmp_in = self._load_file(self.name)
-        out_lines = []
-        for line in tmp_in:
-            quote_index = -1
-            if not inside_triple_quote:
-                triple_dquote_index = line.find('"""')
-                triple_squote_index = line.find("'''")
-                if triple_squote_index == -1:
-                    quote_index = triple_dquote_index
-                    tmp_quote_str = '"""'
-                elif triple_dquote_index == -1:
-                    quote_index = triple_squote_index
-                    tmp_quote_str = "'''"
-                else:
-                    quote_index, tmp_quote_str = min( (triple_squote_index, "'''"), (triple_dquote_index, '"""') )
-
-            if not inside_triple_quote and quote_index != -1:
-                inside_triple_quote = True
-                triple_quote_str = tmp_quote_str
-            if inside_triple_quote:
-                end_index = line.rfind(triple_quote_str)
-                if quote_index < end_index and end_index != -1:
-                    inside_triple_quote = False
-
-            result = self.rec_class_decl.match(line)
-            if not inside_triple_quote and result:
-                if not self.class_name:
-                    # this is the first class declared in the file: insert the new ones before this
-                    out_lines.append('<%swxGlade insert new_classes>' % self.nonce)
-                    self.new_classes_inserted = True
-                self.class_name = result.group(1)
-                self.class_name = self.format_classname(self.class_name)
-                self.classes[self.class_name] = 1  # add the found class to the list of classes of this module
-                out_lines.append(line)
-            elif not inside_block:
-                result = self.rec_block_start.match(line)
-                if not inside_triple_quote and result:
-                    # replace the lines inside a wxGlade block with a tag that will be used later by add_class
-                    spaces = result.group('spaces')
-                    which_class = result.group('classname')
-                    which_block = result.group('block')
-                    if not which_class:
-                        which_class = self.class_name
-                    else:
-                        which_class = self.format_classname(which_class)
-                    self.spaces[which_class] = spaces
-                    inside_block = True
-                    if not self.class_name:
-                        out_lines.append( '<%swxGlade replace %s>' % (self.nonce, which_block) )
-                    else:
-                        out_lines.append( '<%swxGlade replace %s %s>' % (self.nonce, which_class, which_block) )
-                else:
-                    result = self.rec_event_handler.match(line)
-                    if not inside_triple_quote and result:
-                        which_handler = result.group('handler')
-                        which_class = self.format_classname(result.group('class'))
-                        self.event_handlers.setdefault(
-                            which_class, {})[which_handler] = 1
-                    if self.class_name and self.is_end_of_class(line):
-                        # add extra event handlers here...
-                        out_lines.append( '<%swxGlade event_handlers %s>' % (self.nonce, self.class_name) )
-                    out_lines.append(line)
-                    if self.is_import_line(line):
-                        # add a tag to allow extra modules
-                        out_lines.append( '<%swxGlade extra_modules>\n' % self.nonce )
-            else:
-                # ignore all the lines inside a wxGlade block
-                if self.rec_block_end.match(line):
-                    inside_block = False
-        if not self.new_classes_inserted:
-            # if we are here, the previous ``version'' of the file did not contain any class, so we must add the
-            # new_classes tag at the end of the file
-            out_lines.append('<%swxGlade insert new_classes>' % self.nonce)
-        # set the ``persistent'' content of the file
-        self.content = out_lines
+        lines, tokens = self._get_tokens(self.name)
+        self.content = self._build_from_tokens(lines, tokens)
 
     def is_import_line(self, line):
         return line.startswith('(use-package :wx')
@@ -71,87 +71,25 @@ class SourceFileContent(BaseSourceFileContent):
     @see: manpage perlpod
     """
 
-    def build_untouched_content(self):
-        """\
-        Builds a string with the contents of the file that must be left as is,
-        and replaces the wxGlade blocks with tags that in turn will be replaced
-        by the new wxGlade blocks
+    # lines that don't match this, can't match any of the regular expressions above
+    rec_candidate = re.compile(r'wxGlade|package|class|use Wx')
 
-        WARNING: NOT YET COMPLETE -- crazyinsomniac
+    def _update_string_state(self, line, state):
+        # POD is kept as it is; state is True inside POD
+        if not state and '=' in line and self.rec_pod.match(line):
+            state = True
+        if not state:
+            return state, None
+        return not line.startswith('=cut'), 'verbatim'
+
+    def build_untouched_content(self):
+        """Builds the untouched content, replacing the wxGlade blocks with tags; see BaseSourceFileContent
 
-        alb - almost done :)
         WARNING: There is *NO* support for here documents: if you put wxGlade
-        blocks inside a here document, you're likely going into troubles...
-        """
+        blocks inside a here document, you're likely going into troubles..."""
         BaseSourceFileContent.build_untouched_content(self)
-        inside_block = False
-        inside_pod = False
-        tmp_in = self._load_file(self.name)
-        out_lines = []
-        for line in tmp_in:
-            result = self.rec_pod.match(line)
-            if result:
-                inside_pod = True
-            if inside_pod:
-                out_lines.append(line)
-                if line.startswith('=cut'):
-                    inside_pod = False
-                continue
-
-            result = self.rec_class_decl.match(line)
-            if result:
-                if not self.class_name:
-                    # this is the first class declared in the file: insert the
-                    # new ones before this
-                    out_lines.append( '<%swxGlade insert new_classes>' % self.nonce )
-                    self.new_classes_inserted = True
-                self.class_name = result.group(1)
-                self.class_name = self.format_classname(self.class_name)
-                self.classes[self.class_name] = 1  # add the found class to the list
-                                              # of classes of this module
-                out_lines.append(line)
-            elif not inside_block:
-                result = self.rec_block_start.match(line)
-                if result:
-                    # replace the lines inside a wxGlade block with a tag that will be used later by add_class
-                    spaces = result.group('spaces')
-                    which_class = result.group('classname')
-                    which_block = result.group('block')
-                    if not which_class:
-                        which_class = self.class_name
-                    else:
-                        which_class = self.format_classname(which_class)
-                    self.spaces[which_class] = spaces
-                    inside_block = True
-                    if not self.class_name:
-                        out_lines.append( '<%swxGlade replace %s>' % (self.nonce, which_block) )
-                    else:
-                        out_lines.append( '<%swxGlade replace %s %s>' % (self.nonce, which_class, which_block) )
-                else:
-                    result = self.rec_event_handler.match(line)
-                    if result:
-                        which_handler = result.group('handler')
-                        which_class = self.format_classname(result.group('class'))
-                        self.event_handlers.setdefault(
-                            which_class, {})[which_handler] = 1
-                    if self.class_name and self.is_end_of_class(line):
-                        # add extra event handlers here...
-                        out_lines.append( '<%swxGlade event_handlers %s>' % (self.nonce, self.class_name) )
-                    out_lines.append(line)
-                    if self.is_import_line(line):
-                        # add a tag to allow extra modules
-                        out_lines.append( '<%swxGlade extra_modules>\n' % self.nonce )
-            else:
-                # ignore all the lines inside a wxGlade block
-                if self.rec_block_end.match(line):
-##                     self._logger.debug('end block')
-                    inside_block = False
-        if not self.new_classes_inserted:
-            # if we are here, the previous ``version'' of the file did not contain any class, so we must add the
-            # new_classes tag at the end of the file
-            out_lines.append( '<%swxGlade insert new_classes>' % self.nonce )
-        # set the ``persistent'' content of the file
-        self.content = out_lines
+        lines, tokens = self._get_tokens(self.name)
+        self.content = self._build_from_tokens(lines, tokens)
 
     def is_import_line(self, line):
         return line.lstrip().startswith('use Wx')
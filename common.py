@@ -18,7 +18,7 @@ except:
     from hashlib import md5
 from collections import OrderedDict
 
-import logging, os, os.path, sys, tempfile
+import json, logging, mmap, os, os.path, shutil, sys, tempfile, threading, time
 from xml.sax.saxutils import escape, quoteattr
 
 import config, compat, plugins
@@ -218,7 +218,8 @@ def add_object(event):
 
 def add_toplevel_object(event):
     "Adds a toplevel widget (Frame or Dialog) to the current app"
-    widgets[refs[event.GetId()]](None, None, 0)
+    with history.structure_change():
+        widgets[refs[event.GetId()]](None, None, 0)
     app_tree.app.saved = False
 
 ########################################################################################################################
@@ -297,24 +298,29 @@ def register(lang, klass_name, code_writer, property_name=None, property_handler
 ########################################################################################################################
 # file utilities
 
-def _smart_checksum(content):
-    """Generate a "smart" checksum of the given content. The version line "generated by wxGlade" as well as tailing
-    whitespaces will ignored during generation of the checksum. Returns a strings.
-
-    The version line will be ignored within the first ten lines only.
-
-    content: Content to generate a checksum for; list of bytes"""
+def _smart_checksum_lines(lines):
+    # see _smart_checksum; lines: iterable of bytes, each a single line
     chksum = md5()  # use md5 to be compatible with Python 2.4
 
-    for i,line in enumerate(content):
-        if isinstance(line, compat.unicode):
-            line = line.encode('utf-8')
+    for i,line in enumerate(lines):
         if b'generated by wxGlade' in line and i<10: continue
         chksum.update(line.rstrip())
 
     return chksum.hexdigest()
 
 
+def _smart_checksum(content):
+    """Generate a "smart" checksum of the given content. The version line "generated by wxGlade" as well as tailing
+    whitespaces will ignored during generation of the checksum. Returns a strings.
+
+    The version line will be ignored within the first ten lines only.
+
+    content: Content to generate a checksum for; list of bytes or unicode strings;
+             an item may contain multiple lines or a part of a line"""
+    data = b"".join( [(line.encode('utf-8') if isinstance(line, compat.unicode) else line) for line in content] )
+    return _smart_checksum_lines( data.split(b"\n") )
+
+
 def _read_file(filename):
     "read file into a list of lines (bytes); line ending is normalized to \n"
     ret = []
@@ -324,6 +330,132 @@ def _read_file(filename):
             yield line
 
 
+def _smart_checksum_file(filename):
+    "Same as _smart_checksum(_read_file(filename)), but the file is streamed via mmap"
+    with open(filename, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            return _smart_checksum([])
+        try:
+            return _smart_checksum_lines( iter(mapped.readline, b"") )
+        finally:
+            mapped.close()
+
+
+class _FileLock(object):
+    """Lock file to serialize the updates of a file by several processes, e.g. with the --jobs option.
+    A lock file older than STALE seconds is considered to be left over by a crashed process and is removed.
+    Raises an EnvironmentError if the lock can not be acquired within TIMEOUT seconds."""
+    TIMEOUT = 10.0
+    STALE = 60.0
+
+    def __init__(self, filename):
+        self.filename = filename + ".lock"
+        self._fd = None
+
+    def __enter__(self):
+        deadline = time.time() + self.TIMEOUT
+        while True:
+            try:
+                self._fd = os.open(self.filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                return self
+            except OSError as inst:
+                if inst.errno not in (errno.EEXIST, errno.EACCES): raise
+            try:
+                if time.time() - os.path.getmtime(self.filename) > self.STALE:
+                    os.remove(self.filename)
+                    continue
+            except OSError:
+                continue  # removed by the other process in the meantime
+            if time.time() > deadline:
+                raise EnvironmentError( errno.EEXIST, _("Lock file exists"), self.filename )
+            time.sleep(0.01)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        os.close(self._fd)
+        self._fd = None
+        os.remove(self.filename)
+
+
+class _ChecksumManifest(object):
+    """Size, modification time and smart checksum of the generated files in a directory.
+    Used by save_file() to detect unchanged files without reading them.
+    The manifest is written to the directory by save_checksum_manifests(); the changes are merged with the entries
+    written by other processes, e.g. by the workers with the --jobs option."""
+    FILENAME = ".wxglade_checksums.cache"
+
+    def __init__(self, directory):
+        self.filename = os.path.join(directory, self.FILENAME)
+        self.changed = {}  # file name -> [size, mtime, checksum]; the entries to be written by save()
+        self.entries = self._read()
+
+    @property
+    def modified(self):
+        return bool(self.changed)
+
+    def _read(self):
+        "returns the entries of the manifest file: file name -> [size, mtime, checksum]"
+        if not os.path.isfile(self.filename): return {}
+        try:
+            with open(self.filename, "r") as f:
+                return json.load(f)
+        except (EnvironmentError, ValueError) as details:
+            logging.warning( _('Reading the checksum cache "%s" failed: %s'), self.filename, details )
+            return {}
+
+    def get_checksum(self, filename):
+        "returns the smart checksum of the file; it's only calculated if size or modification time have changed"
+        stat = os.stat(filename)
+        entry = self.entries.get( os.path.basename(filename) )
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime]:
+            return entry[2]
+        checksum = _smart_checksum_file(filename)
+        self._set_entry(filename, stat, checksum)
+        return checksum
+
+    def set_checksum(self, filename, checksum):
+        "store the checksum of a file that has just been written"
+        self._set_entry(filename, os.stat(filename), checksum)
+
+    def _set_entry(self, filename, stat, checksum):
+        name = os.path.basename(filename)
+        self.entries[name] = self.changed[name] = [stat.st_size, stat.st_mtime, checksum]
+
+    def save(self):
+        if not self.changed: return
+        tmp_filename = "%s.~%d.tmp" % (self.filename, os.getpid())
+        try:
+            with _FileLock(self.filename):
+                # re-read to keep the entries that other processes have written in the meantime
+                entries = self._read()
+                entries.update(self.changed)
+                with open(tmp_filename, "w") as f:
+                    json.dump(entries, f)
+                _replace_file(tmp_filename, self.filename)
+            self.entries = entries
+        except EnvironmentError as details:
+            logging.warning( _('Writing the checksum cache "%s" failed: %s'), self.filename, details )
+        self.changed = {}
+
+
+_checksum_manifests = {}  # directory -> _ChecksumManifest
+
+
+def _get_checksum_manifest(filename):
+    directory = os.path.dirname( os.path.abspath(filename) )
+    if not directory in _checksum_manifests:
+        _checksum_manifests[directory] = _ChecksumManifest(directory)
+    return _checksum_manifests[directory]
+
+
+def save_checksum_manifests():
+    "write the modified checksum caches of the output directories; to be called after code generation"
+    for manifest in _checksum_manifests.values():
+        manifest.save()
+
+
 def save_file(filename, content, which='wxg'):
     """Save content to named file and, if user's preferences say so and filename exists, makes a backup copy of it.
 
@@ -334,7 +466,9 @@ def save_file(filename, content, which='wxg'):
 
     filename: Name of the file to create
     content:  list of strings to store into 'filename'
-    which:    Kind of backup: 'wxg' or 'codegen'"""
+    which:    Kind of backup: 'wxg' or 'codegen'
+
+    returns False if the file was not modified"""
     if which == 'wxg':
         content = [line.encode('utf-8') for line in content] # encode from unicode to utf-8
         do_backup = config.preferences.wxg_backup
@@ -343,14 +477,22 @@ def save_file(filename, content, which='wxg'):
     else:
         raise NotImplementedError( 'Unknown value "%s" for parameter "which"!' % which )
 
+    manifest = None
+    if which == 'codegen' and config.preferences.codegen_checksum_cache:
+        manifest = _get_checksum_manifest(filename)
+
+    chksum_content = None
     if os.path.isfile(filename):
-        # read existing file to check content
-        chksum_oldcontent = _smart_checksum( _read_file(filename) )
+        # read existing file to check content, if the checksum is not cached
+        if manifest is not None:
+            chksum_oldcontent = manifest.get_checksum(filename)
+        else:
+            chksum_oldcontent = _smart_checksum_file(filename)
 
         # nothing changed?
         chksum_content = _smart_checksum(content)
         if chksum_oldcontent == chksum_content:
-            return
+            return False
 
     # create the backup file only with the first save
     need_backup = do_backup and filename not in config.backed_up and os.path.isfile(filename)
@@ -379,6 +521,11 @@ def save_file(filename, content, which='wxg'):
         if outfile:
             outfile.close()
 
+    if manifest is not None:
+        if chksum_content is None: chksum_content = _smart_checksum(content)
+        manifest.set_checksum(filename, chksum_content)
+    return True
+
 
 ########################################################################################################################
 # files and paths
@@ -395,36 +542,180 @@ def get_name_for_autosave(filename=None):
     return ret
 
 
-class _Writer(object):
-    # file with a list compatible interface: append and extend
-    def __init__(self, filename):
-        self.outfile = codecs.open(filename, 'w', 'utf-8')
+def _replace_file(source, target):
+    "rename source to target, replacing an existing target file"
+    if hasattr(os, "replace"):
+        os.replace(source, target)
+        return
+    if sys.platform.startswith("win") and os.path.exists(target):
+        os.remove(target)
+    os.rename(source, target)
+
+
+class XmlWriter(object):
+    """File with a list compatible interface (append and extend) to stream a XML file, e.g. from Tree.write().
+
+    The unicode strings are encoded to utf-8 and written to a buffered temporary file in the same directory, which
+    replaces the target file on close(). If the file content did not change, the target file is not touched.
+    Use as context manager or call close() or abort().
+
+    filename: Name of the file to create
+    backup:   Make a backup copy of an existing file with the first save in this session; see config.backed_up
+    fsync:    Flush the data to the disk before replacing the target file"""
+    BUFFER_SIZE = 65536
+
+    def __init__(self, filename, backup=False, fsync=False):
+        self.filename = filename
+        self.backup = backup
+        self.fsync = fsync
+        self.modified = None  # will be set on close(): True if the file was written
+
+        # create necessary subdirectories on demand
+        directory = os.path.dirname(filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.tmp_filename = "%s.~%d.tmp" % (filename, os.getpid())
+        self.outfile = open(self.tmp_filename, 'wb', self.BUFFER_SIZE)
+        self._crlf = sys.platform.startswith("win")
+        # the "smart" checksum is calculated on the fly; see _smart_checksum()
+        self._checksum = md5()
+        self._line_number = 0
+        self._partial_line = b""
+
     def append(self, line):
+        line = line.encode('utf-8')
+        self._update_checksum(line)
+        if self._crlf:
+            line = line.replace(b"\n", b"\r\n")
         self.outfile.write(line)
+
     def extend(self, lines):
-        for line in lines: self.outfile.write(line)
+        for line in lines: self.append(line)
+
+    def _update_checksum(self, data):
+        # the data may contain partial or multiple lines
+        lines = (self._partial_line + data).split(b"\n")
+        self._partial_line = lines.pop()
+        for line in lines:
+            self._add_line_to_checksum(line)
+
+    def _add_line_to_checksum(self, line):
+        if not (self._line_number<10 and b'generated by wxGlade' in line):
+            self._checksum.update(line.rstrip())
+        self._line_number += 1
+
     def close(self):
+        "close the temporary file and replace the target file; returns False if the content has not changed"
+        if self.outfile is None: return self.modified
+        if self.fsync:
+            self.outfile.flush()
+            os.fsync( self.outfile.fileno() )
         self.outfile.close()
+        self.outfile = None
+        if self._partial_line:
+            self._add_line_to_checksum(self._partial_line)
 
+        try:
+            exists = os.path.isfile(self.filename)
+            if exists and _smart_checksum_file(self.filename) == self._checksum.hexdigest():
+                # nothing changed
+                os.remove(self.tmp_filename)
+                self.modified = False
+                return False
+
+            if exists:
+                shutil.copymode(self.filename, self.tmp_filename)
+            if exists and self.backup and self.filename not in config.backed_up:
+                # create the backup file only with the first save
+                backup_name = self.filename + config.preferences.backup_suffix
+                _replace_file(self.filename, backup_name)
+                config.backed_up[self.filename] = True
+            _replace_file(self.tmp_filename, self.filename)
+        except:
+            self.abort()
+            raise
+        self.modified = True
+        return True
 
-def autosave_current():
-    "Save automatic backup copy for the current and un-saved design;  returns 0: error; 1: no changes to save; 2: saved"
-    if app_tree.app.saved:
-        return 1            # do nothing in this case...
+    def abort(self):
+        "close and remove the temporary file; the target file is not touched"
+        if self.outfile is not None:
+            self.outfile.close()
+            self.outfile = None
+        if os.path.isfile(self.tmp_filename):
+            os.remove(self.tmp_filename)
 
-    autosave_name = get_name_for_autosave()
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+_autosave_thread = None  # the thread writing the autosave file in the background, if any
+
+
+def _write_autosave(autosave_name, snapshot, snapshot_duration, callback=None):
+    # serialize the snapshot and write it to the autosave file; called from autosave_current, maybe in a worker thread
+    start = time.time()
     try:
-        outfile = _Writer(autosave_name)
-        app_tree.write(outfile)
-        outfile.close()
+        with XmlWriter(autosave_name, fsync=True) as outfile:
+            app_tree.write_snapshot(outfile, snapshot)
     except EnvironmentError as details:
         logging.warning( _('Saving the autosave file "%s" failed: %s'), autosave_name, details )
-        return 0
+        res = 0
+    else:
+        res = 2
+    write_duration = time.time() - start
+    logging.debug( _('Autosave: snapshot took %.3f s, writing took %.3f s'), snapshot_duration, write_duration )
+    if callback is not None:
+        callback(res, snapshot_duration, write_duration)
+    return res
+
+
+def autosave_current(callback=None):
+    """Save automatic backup copy for the current and un-saved design;  returns 0: error; 1: no changes to save; 2: saved
+
+    A snapshot of the property values of the design is taken; see Tree.snapshot().
+    If a callback is given, serializing, encoding and writing the snapshot is done in a worker thread and 2 is
+    returned once the thread is started. The callback will be called from the worker thread with the arguments
+    result, snapshot duration and write duration."""
+    global _autosave_thread
+    if app_tree.app.saved:
+        return 1            # do nothing in this case...
+    if _autosave_thread is not None and _autosave_thread.is_alive():
+        return 1            # the previous autosave has not yet finished
+
+    autosave_name = get_name_for_autosave()
+    start = time.time()
+    snapshot = app_tree.snapshot()
+    snapshot_duration = time.time() - start
+
+    if callback is None:
+        return _write_autosave(autosave_name, snapshot, snapshot_duration)
+
+    _autosave_thread = threading.Thread( target=_write_autosave, name="autosave",
+                                         args=(autosave_name, snapshot, snapshot_duration, callback) )
+    _autosave_thread.daemon = True
+    _autosave_thread.start()
     return 2
 
 
+def wait_for_autosave():
+    "Wait until a running background autosave has finished"
+    global _autosave_thread
+    if _autosave_thread is not None:
+        _autosave_thread.join()
+        _autosave_thread = None
+
+
 def remove_autosaved(filename=None):
     "Remove the automatic backup;  @see: L{get_name_for_autosave()}"
+    wait_for_autosave()
     autosave_name = get_name_for_autosave(filename)
     if os.path.exists(autosave_name):
         try:
@@ -755,7 +1046,10 @@ class Preferences(ConfigParser.ConfigParser):
         'autosave_delay': 120,  # in seconds
         'show_completion': True,
         'write_timestamp': True,
-        'write_generated_from': False
+        'write_generated_from': False,
+        'incremental_codegen': False,  # skip unchanged toplevels in multiple files mode; see codegen.CodeCache
+        'codegen_checksum_cache': True,  # store checksums of generated files; see _ChecksumManifest
+        'undo_memory_limit': 16  # in MB; see history.History
         }
 
     def __init__(self, defaults=None):
@@ -890,9 +1184,7 @@ def format_xml_tag(tag, value, indentlevel=0, **kwargs):
     data = {'attrs': attrs, 'tabs': tabs, 'tag': tag, 'value': value }  # for the format string
 
     if is_xml:
-        tmpl1 = u'%(tabs)s<%(tag)s%(attrs)s>\n'
-        tmpl2 = u'%(tabs)s</%(tag)s>\n'
-        return [tmpl1%data] + value + [tmpl2%data]
+        return [format_xml_open_tag(tag, indentlevel, **kwargs)] + value + [format_xml_close_tag(tag, indentlevel)]
     if not value:
         tmpl = u'%(tabs)s<%(tag)s%(attrs)s />\n'
     else:
@@ -900,6 +1192,18 @@ def format_xml_tag(tag, value, indentlevel=0, **kwargs):
     return [tmpl%data]
 
 
+def format_xml_open_tag(tag, indentlevel=0, **kwargs):
+    "Generate the opening XML tag with the given attributes as string; the content is to be written separately"
+    attrs = format_xml_attrs(**kwargs)
+    if attrs: attrs = u' %s' % attrs
+    return u'%s<%s%s>\n' % (u'    ' * indentlevel, encode_to_unicode(tag), attrs)
+
+
+def format_xml_close_tag(tag, indentlevel=0):
+    "Generate the closing XML tag as string; see format_xml_open_tag()"
+    return u'%s</%s>\n' % (u'    ' * indentlevel, encode_to_unicode(tag))
+
+
 def format_xml_prop(tag, value, indentlevel=0, **kwargs):
     # format a single property as indented string
     assert isinstance(tag, compat.basestring)
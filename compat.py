@@ -22,6 +22,14 @@ except:
     PYTHON2 = False
     PYTHON3 = True
 
+if PYTHON2:
+    _interned = {}
+    def intern(s):
+        "intern also unicode strings; used for flag names that are repeated many times in a design"
+        return _interned.setdefault(s, s)
+else:
+    from sys import intern
+
 import wx
 
 
@@ -77,6 +77,9 @@ label_width = 96     # width of labels in Property window
 tooltip_time = 3    # Number of seconds a tooltip will be shown
 tooltip_width = 50  # Maximum width to split tooltips into
 
+bitmap_cache_size = 32*1024*1024  # Memory budget in bytes for the bitmaps shown in the Design window; see misc.get_bitmap()
+preview_cache_size = 20  # Number of compiled preview modules to keep; see Application.preview()
+
 debugging = ('WINGDB_ACTIVE' in os.environ)  # if True, at many places exceptions will be raised instead of handled
 testing = False  # to be set by the testing framework
 
@@ -5,16 +5,134 @@ Collection of different decorators used by wxGlade
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
+import collections, logging
 
-def memoize(func):
-    """\
-    Simple result cache.
-    """
-    cache = {}
+
+_caches = []  # all instances of Cache; see log_statistics()
+_missing = object()
+
+
+class Cache(object):
+    """Result cache with optional maximum size and optional memory budget; the least recently used entries are
+    evicted if the number of entries or the sum of the costs is exceeded.
+
+    The number of hits and misses is counted; see log_statistics()."""
+
+    def __init__(self, name, maxsize=None, max_cost=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.max_cost = max_cost  # e.g. in bytes; see put()
+        self.cost = 0
+        self.hits = self.misses = 0
+        self._bounded = maxsize is not None or max_cost is not None
+        self._data = collections.OrderedDict() if self._bounded else {}
+        self._costs = {}
+        _caches.append(self)
+
+    def get(self, key, default=None):
+        "Return the cached value or default; a hit moves the entry to the end of the eviction order"
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self._bounded:
+            # re-insert to mark as most recently used
+            del self._data[key]
+            self._data[key] = value
+        return value
+
+    def put(self, key, value, cost=0):
+        "Store and return the value; values with a cost above max_cost are not stored"
+        if not self._bounded:
+            self._data[key] = value
+            return value
+        self.discard(key)
+        if self.max_cost is not None and cost > self.max_cost:
+            return value
+        data = self._data
+        data[key] = value
+        if cost:
+            self._costs[key] = cost
+            self.cost += cost
+        while len(data) > 1 and ( (self.maxsize is not None and len(data) > self.maxsize) or
+                                  (self.max_cost is not None and self.cost > self.max_cost) ):
+            self.discard( next(iter(data)) )
+        return value
+
+    def discard(self, key):
+        "Remove the entry, if present"
+        if self._data.pop(key, _missing) is not _missing:
+            self.cost -= self._costs.pop(key, 0)
+
+    def keys(self):
+        return list(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        "Remove all entries; the statistics are kept"
+        self._data.clear()
+        self._costs.clear()
+        self.cost = 0
+
+    def __repr__(self):
+        return "<Cache %s: %d entries, %d hits, %d misses>"%(self.name, len(self._data), self.hits, self.misses)
+
+
+def log_statistics(level=logging.DEBUG):
+    "Log size, hits and misses of all caches that have been used; registered with atexit in wxglade.run_main()"
+    for cache in _caches:
+        if not cache.hits and not cache.misses: continue
+        logging.log( level, "Cache %s: %d entries, %d hits, %d misses", cache.name, len(cache), cache.hits,
+                     cache.misses )
+
+
+
+def class_key(obj, *args):
+    """Cache key for memoize(): the class of the first argument instead of the instance itself, e.g. for methods
+    with results that don't depend on the instance; the instances are not kept alive by the cache"""
+    return (obj.__class__,) + args
+
+
+def memoize(func=None, maxsize=None, key=None, name=None):
+    """Result cache; usable as @memoize or e.g. as @memoize(maxsize=100, key=class_key).
+
+    maxsize: maximum number of entries; None for unlimited
+    key:     function to calculate the cache key from the arguments; default: the tuple of arguments
+    name:    name of the cache for log_statistics(); default: the qualified function name
+
+    With the default key, the cache keeps references to all arguments, e.g. to self for methods.
+    Use a key function like class_key() for arguments that should not be kept alive, e.g. edit objects.
+    Calls with unhashable keys are not cached.
+    The cache is available as attribute 'cache' of the returned function."""
+    if func is None:
+        return lambda func: memoize(func, maxsize, key, name)
+
+    cache = Cache( name or "%s.%s"%(func.__module__, getattr(func, "__qualname__", func.__name__)), maxsize )
 
     def inner(*args, **kwargs):
-        key = str(args) + str(kwargs)
-        if key not in cache:
-            cache[key] = func(*args, **kwargs)
-        return cache[key]
+        if key is not None:
+            k = key(*args, **kwargs)
+        elif kwargs:
+            k = args + (_missing,) + tuple(sorted(kwargs.items()))
+        else:
+            k = args
+        try:
+            ret = cache.get(k, _missing)
+        except TypeError:
+            # unhashable
+            return func(*args, **kwargs)
+        if ret is _missing:
+            ret = cache.put(k, func(*args, **kwargs))
+        return ret
+
+    inner.cache = cache
+    inner.__name__ = func.__name__
+    inner.__doc__ = func.__doc__
     return inner
@@ -14,6 +14,7 @@ SizerSlot = None      # Shortcut for edit_sizers.SizerSlot
 SizerBase = None      # Shortcut for edit_sizers.SizerBase
 GridSizerBase = None  # Shortcut for edit_sizers.GridSizerBase
 _builder = None       # Shortcut for edit_sizers._builder
+layout_scheduler = None  # Shortcut for edit_sizers.layout_scheduler
 
 
 def init_gui():
@@ -21,10 +22,11 @@ def init_gui():
     #    return {}
 
     from . import edit_sizers
-    global Sizer, SizerSlot, SizerBase, GridSizerBase, _builder
+    global Sizer, SizerSlot, SizerBase, GridSizerBase, _builder, layout_scheduler
     Sizer = edit_sizers.Sizer
     SizerSlot = edit_sizers.SizerSlot
     SizerBase = edit_sizers.SizerBase
     GridSizerBase = edit_sizers.GridSizerBase
     _builder = edit_sizers._builder
+    layout_scheduler = edit_sizers.layout_scheduler
     return edit_sizers.init_all()
@@ -7,7 +7,7 @@ Hierarchy of Sizers supported by wxGlade
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import logging
+import collections, heapq, logging
 import wx
 from wx.lib.buttons import GenButton
 
@@ -20,14 +20,14 @@ HAVE_WRAP_SIZER = hasattr(wx, "WrapSizer")  # only for 3.0
 
 def _frozen(method):
     "freeze toplevel parent during update"
-    def _frozen(sizer, *args):
+    def _frozen(sizer, *args, **kwargs):
         if sizer.window.widget:
             toplevel = sizer.window.widget.GetTopLevelParent()
             toplevel.Freeze()
         else:
             toplevel = None
         try:
-            return method(sizer, *args)
+            return method(sizer, *args, **kwargs)
         finally:
             if toplevel:
                 toplevel.Refresh()
@@ -35,6 +35,97 @@ def _frozen(method):
     return _frozen
 
 
+class LayoutScheduler(object):
+    """Collects the sizers that need a layout; they will be laid out when the application is idle.
+    There's one pass per toplevel window; it's done bottom-up, such that the parent sizers are laid out after
+    their children. See SizerBase.layout() for the callers that need an immediate layout."""
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._pending = {}    # id(sizer) -> [sizer, recursive]
+        self._queues = collections.OrderedDict()  # id(toplevel node) -> heap of (-depth, counter, sizer)
+        self._counter = 0
+        self._flushing = False
+        self._callbacks = []  # to be called after the pending layouts
+        self.requested = 0    # number of calls to SizerBase.layout
+        self.performed = 0    # number of layouts actually done
+
+    @staticmethod
+    def _get_toplevel_depth(sizer):
+        toplevel = None
+        depth = 0
+        node = getattr(sizer, "node", None)
+        while node is not None and node.parent is not None:
+            toplevel = node
+            depth += 1
+            node = node.parent
+        return toplevel, depth
+
+    def schedule(self, sizer, recursive=True):
+        self.requested += 1
+        entry = self._pending.get(id(sizer))
+        if entry is not None:
+            entry[1] = entry[1] or recursive
+            return
+        self._pending[id(sizer)] = [sizer, recursive]
+        self._counter += 1
+        toplevel, depth = self._get_toplevel_depth(sizer)
+        queue = self._queues.setdefault( id(toplevel), [] )
+        heapq.heappush( queue, (-depth, self._counter, sizer) )
+        if not self._flushing:
+            wx.WakeUpIdle()  # make sure that an idle event will be sent
+
+    def layout_now(self, sizer, recursive=True):
+        "do the layout of sizer immediately; a pending layout is not required any more"
+        self.requested += 1
+        self.performed += 1
+        entry = self._pending.get(id(sizer))
+        if entry is not None and (recursive or not entry[1]):
+            del self._pending[id(sizer)]
+        sizer._layout(recursive, immediate=True)
+
+    def after_layout(self, callback):
+        "call callback after the pending layouts have been done"
+        if not self._pending:
+            callback()
+        else:
+            self._callbacks.append(callback)
+
+    def discard(self, sizer):
+        "to be called when a sizer is deleted"
+        self._pending.pop(id(sizer), None)
+
+    def flush(self):
+        "do all pending layouts now; called from the idle event handler of the application"
+        if self._flushing or not self._queues: return
+        self._flushing = True
+        try:
+            while self._queues:
+                # one pass per toplevel; layouts requested for the parents are done in the same pass
+                key = next(iter(self._queues))
+                queue = self._queues[key]
+                while queue:
+                    sizer = heapq.heappop(queue)[2]
+                    entry = self._pending.pop(id(sizer), None)
+                    if entry is None: continue  # deleted or laid out in the meantime
+                    self.performed += 1
+                    sizer._layout(entry[1])
+                del self._queues[key]
+            callbacks, self._callbacks = self._callbacks, []
+            for callback in callbacks:
+                callback()
+        finally:
+            self._flushing = False
+        if config.debugging:
+            self._logger.debug( "Sizer layouts requested: %s, performed: %s, saved: %s",
+                                self.requested, self.performed, self.get_saved() )
+
+    def get_saved(self):
+        "number of layouts that were saved by coalescing requests"
+        return self.requested - self.performed - len(self._pending)
+
+layout_scheduler = LayoutScheduler()
+
+
 class BaseSizerBuilder(object):
     "Language independent base class for all sizer builders / code generators"
 
@@ -416,7 +507,8 @@ class SizerSlot(np.PropertyOwner):
             self.widget.SetCursor(wx.NullCursor)
         common.adding_window = event and event.GetEventObject().GetTopLevelParent() or None
         # call the appropriate builder
-        common.widgets[common.widget_to_add](self.parent, self.sizer, self.pos)
+        with common.history.structure_change(self):
+            common.widgets[common.widget_to_add](self.parent, self.sizer, self.pos)
         if event is None or not misc.event_modifier_copy(event):
             common.adding_widget = common.adding_sizer = False
             common.widget_to_add = None
@@ -710,8 +802,8 @@ class ClassOrientProperty(np.RadioProperty):
 
     def __init__(self, value=None):
         np.RadioProperty.__init__(self, value, self.CHOICES, tooltips=self.TOOLTIPS)
-    def write(self, output, tabs=0):
-        pass
+    def snapshot(self):
+        return None
 
 
 class SizerBase(Sizer, np.PropertyOwner):
@@ -832,7 +924,7 @@ class SizerBase(Sizer, np.PropertyOwner):
                     if not p.value_set.intersection(p.FLAG_DESCRIPTION["Border"]):
                         p.add("wxALL")
                 if self.widget:
-                    self.sizer.item_properties_modified(self, modified)
+                    self.sizer.item_properties_modified(self, modified, immediate=True)
         np.PropertyOwner.properties_changed(self, modified)
 
     def check_drop_compatibility(self):
@@ -1032,7 +1124,7 @@ class SizerBase(Sizer, np.PropertyOwner):
         if force_layout:
             self.layout()
 
-    def set_item_best_size(self, widget, size=(-1,-1), force_layout=True):
+    def set_item_best_size(self, widget, size=(-1,-1), force_layout=True, immediate=False):
         if not self.widget or not widget.widget: return
 
         elem = self.widget.GetItem(widget.widget)
@@ -1047,10 +1139,10 @@ class SizerBase(Sizer, np.PropertyOwner):
             self.widget.SetItemMinSize(item, w, h)
 
         if force_layout:
-            self.layout(True)
+            self.layout(True, immediate)
 
     @_frozen
-    def item_properties_modified(self, widget, modified=None, force_layout=True):
+    def item_properties_modified(self, widget, modified=None, force_layout=True, immediate=False):
         "update layout properties"
         if not self.widget or not widget.widget:
             return
@@ -1096,7 +1188,7 @@ class SizerBase(Sizer, np.PropertyOwner):
             self.widget.SetItemMinSize(widget.widget, w, h)
 
         if force_layout:
-            self.layout(True)
+            self.layout(True, immediate)
 
     def item_properties_modified2(self, widget, force_layout=True):
         # workaround: called from EditNotebook.post_load()
@@ -1139,7 +1231,20 @@ class SizerBase(Sizer, np.PropertyOwner):
                 self.window.widget.Refresh()
                 # if not self.toplevel: self.sizer.Layout()
 
-    def layout(self, recursive=True):
+    def layout(self, recursive=True, immediate=False):
+        """request a layout; it will be done by the layout_scheduler when the application is idle,
+        such that bulk changes like loading, pasting or adding slots/rows result in one layout per sizer.
+        immediate=True is used for property changes by the user, where the result should be visible right away:
+        properties_changed of ManagedBase, WindowBase, SizerBase and GridSizerBase, _set_widget_best_size and
+        the re-creation of a widget on style change"""
+        if not self.widget:
+            self._layout(recursive)
+        elif immediate:
+            layout_scheduler.layout_now(self, recursive)
+        else:
+            layout_scheduler.schedule(self, recursive)
+
+    def _layout(self, recursive=True, immediate=False):
         # update slot labels in tree view
         for c in self.children:
             if isinstance(c, SizerSlot):
@@ -1155,7 +1260,7 @@ class SizerBase(Sizer, np.PropertyOwner):
                 w, h = self.window.widget.GetBestSize()
                 szr.SetItemMinSize(self.window.widget, w, h)
             if self.window.sizer is not self:
-                self.window.sizer.layout(False)
+                self.window.sizer.layout(False, immediate)
             else:
                 szr.Layout()
             return
@@ -1177,10 +1282,11 @@ class SizerBase(Sizer, np.PropertyOwner):
                 pass
         if recursive:
             if getattr(self, 'sizer', None) is not None:
-                self.sizer.layout(recursive)
+                self.sizer.layout(recursive, immediate)
 
     def delete(self):
         "Destructor"
+        layout_scheduler.discard(self)
         if self._btn:
             self._btn.Destroy()
             self._btn = None
@@ -1293,7 +1399,7 @@ class SizerBase(Sizer, np.PropertyOwner):
         if not self._can_add_insert_slots(report=True):
             return
         count = self._ask_count() if multiple else 1
-        with self.window.frozen():
+        with common.history.structure_change((self, pos)), self.window.frozen():
             for n in range(count):
                 self._insert_slot(pos)
             if self.widget: self.layout(True)
@@ -1304,7 +1410,7 @@ class SizerBase(Sizer, np.PropertyOwner):
         if not self._can_add_insert_slots(report=True):
             return
         count = self._ask_count(insert=False) if multiple else 1
-        with self.window.frozen():
+        with common.history.structure_change((self, len(self.children))), self.window.frozen():
             for n in range(count):
                 self._add_slot()
             if self.widget: self.layout()
@@ -1397,7 +1503,7 @@ class BoxSizerBase(SizerBase):
     def properties_changed(self, modified):
         if not modified or "orient" in modified and self.node:
             # update the image
-            common.app_tree.SetItemImage(self.node.item, self.node.get_image() )
+            self.node.refresh(refresh_label=False)
 
         SizerBase.properties_changed(self, modified)
 
@@ -1931,7 +2037,7 @@ class GridSizerBase(SizerBase):
                 layout = True
 
         if layout:
-            self.layout(True)
+            self.layout(True, immediate=True)
             if self.widget: self.window.widget.Refresh()
 
         SizerBase.properties_changed(self, modified)
@@ -2378,10 +2484,8 @@ class EditGridBagSizer(EditFlexGridSizer):
 def _builder(parent, sizer, pos, orientation=wx.VERTICAL, slots=1, is_static=False, label="",
              is_wrap=False, number=[1]):
     num = slots
+    number[0] = common.app_tree.get_free_suffix('sizer_', number[0])
     name = 'sizer_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'sizer_%d' % number[0]
     if sizer is not None:
         topl = False
     else:
@@ -2606,10 +2710,8 @@ def grid_builder(parent, sizer, pos, number=[1]):
     dialog.Destroy()
     if res != wx.ID_OK: return
 
+    number[0] = common.app_tree.get_free_suffix('grid_sizer_', number[0])
     name = 'grid_sizer_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'grid_sizer_%d' % number[0]
     is_toplevel = True
     if type_=="Grid":
         constructor = EditGridSizer
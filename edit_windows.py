@@ -388,7 +388,7 @@ class WindowBase(EditBase):
  
         size_p = self.properties['size']
         if size_p.is_active():
-            self.set_size()
+            self.set_size(immediate=False)
         else:
             # this is a dirty hack: in previous versions <=0.7.2 self.set_size is practically always called
             # set_size then calls self.sizer.set_item(item, pos)
@@ -397,14 +397,16 @@ class WindowBase(EditBase):
             if "pos" in self.properties:
                 #self.sizer.set_item(self.pos)
                 self.sizer.item_properties_modified(self)
-            size_p.set('%s, %s' % tuple(self.widget.GetSize()))
+            # the size is known after the layout, which will be done when the application is idle
+            import edit_sizers
+            edit_sizers.layout_scheduler.after_layout(self._update_size_property)
  
         if background_p.is_active(): self.widget.SetBackgroundColour(self.background)
         if foreground_p.is_active(): self.widget.SetForegroundColour(self.foreground)
 
         font_p = self.properties.get('font')
         if font_p and font_p.is_active():
-            self._set_font()
+            self._set_font(immediate=False)
 
         EditBase.finish_widget_creation(self)
 
@@ -515,7 +517,13 @@ class WindowBase(EditBase):
         return [font.GetPointSize(), families.get(font.GetFamily(), 'default'), styles.get(font.GetStyle(), 'normal'),
                  weights.get(font.GetWeight(), 'normal'), int(font.GetUnderlined()), font.GetFaceName()]
 
-    def _set_font(self):
+    def _update_size_property(self):
+        # display the actual size if the size property is not active
+        size_p = self.properties['size']
+        if self.widget and not size_p.is_active():
+            size_p.set('%s, %s' % tuple(self.widget.GetSize()))
+
+    def _set_font(self, immediate=True):
         if not self.widget: return
         font_p = self.properties["font"]
         if not font_p.is_active(): 
@@ -529,16 +537,16 @@ class WindowBase(EditBase):
 
         self.widget.SetFont(font)
         if not self.properties["size"].is_active():
-            self.sizer.set_item_best_size(self)
+            self.sizer.set_item_best_size(self, immediate=immediate)
 
-    def set_size(self):
+    def set_size(self, immediate=True):
         if not self.widget: return
         size_p = self.properties["size"]
         if not size_p.is_active(): return
         size = size_p.get_size(self.widget)
         self.widget.SetSize(size)
         try:
-            self.sizer.set_item_best_size(self, size=size)
+            self.sizer.set_item_best_size(self, size=size, immediate=immediate)
         except AttributeError:
             pass
 
@@ -666,9 +674,9 @@ class ManagedBase(WindowBase):
                 if max_span!=span_p.value:
                     span_p.set(max_span, notify=False)
             if not self.sizer.is_virtual():
-                self.sizer.item_properties_modified(self, modified)
+                self.sizer.item_properties_modified(self, modified, immediate=True)
 
-    def _set_widget_best_size(self):
+    def _set_widget_best_size(self, immediate=True):
         # called when the widget has been modified and this might affect the automatic size
         if not self.widget: return
         size_p = self.properties["size"]
@@ -676,7 +684,7 @@ class ManagedBase(WindowBase):
         # find best size, apply; display if size property is not active
         self.widget.SetMinSize( (-1,-1) )  # otherwise the size would often not be reduced, e.g. for buttons
         best_size = self.widget.GetBestSize()
-        self.sizer.set_item_best_size(self, best_size)
+        self.sizer.set_item_best_size(self, best_size, immediate=immediate)
         if not size_p.is_active():
             size_p.set( best_size )
 
@@ -885,7 +893,8 @@ class TopLevelBase(WindowBase, PreviewMixin):
             self.on_set_focus(event)  # default behaviour: call show_properties
             return
         if self.widget: self.widget.SetCursor(wx.STANDARD_CURSOR)
-        common.widgets[common.widget_to_add](self, None, None)
+        with common.history.structure_change(self):
+            common.widgets[common.widget_to_add](self, None, None)
         if event is None or not misc.event_modifier_copy(event):
             common.adding_widget = common.adding_sizer = False
             common.widget_to_add = None
@@ -1061,16 +1070,16 @@ class EditStylesMixin(np.PropertyOwner):
             self.create_widget()
             compat.SizerItem_SetWindow(si, self.widget)
             compat.DestroyLater(old_widget)
-            self.sizer.item_properties_modified(self)  # will call toplevel Refresh as well
+            self.sizer.item_properties_modified(self, immediate=True)  # will call toplevel Refresh as well
 
             self.finish_widget_creation(re_add=False)
-            self.sizer.layout()
+            self.sizer.layout(immediate=True)
             if focused:
                 misc.focused_widget = self
                 if self.sel_marker: self.sel_marker.Show(True)
 
 
-    @decorators.memoize
+    @decorators.memoize(key=decorators.class_key)
     def wxname2attr(self, name):
         """Return the attribute specified by the name. Only wx attributes are supported.
 
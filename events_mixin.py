@@ -46,18 +46,25 @@ class EventsProperty(np.GridProperty):
         self.grid.AutoSizeColumn(0, False)
         self.grid.AutoSizeColumn(1, False)
 
+    def _refresh_editor(self):
+        np.GridProperty._refresh_editor(self)
+        self.grid.AutoSizeColumn(0, False)
+        self.grid.AutoSizeColumn(1, False)
+
     def set_value_dict(self, values_dict):
         for row in self.value:
             row[1] = values_dict.get(row[0], "")
         self.update_display()
 
-    def write(self, output, tabs):
+    def snapshot(self):
+        # tuples (event, handler)
+        return tuple( (event, handler) for event, handler in self.get() if handler ) or None
+
+    def write_snapshot(self, output, tabs, handlers):
         inner_xml = []
-        for event, handler in self.get():
-            if handler:
-                inner_xml += common.format_xml_tag('handler', handler, tabs+1, event=event)
-        if inner_xml:
-            output.extend( common.format_xml_tag(u'events', inner_xml, tabs, is_xml=True) )
+        for event, handler in handlers:
+            inner_xml += common.format_xml_tag('handler', handler, tabs+1, event=event)
+        output.extend( common.format_xml_tag(u'events', inner_xml, tabs, is_xml=True) )
 
 
 
@@ -6,10 +6,23 @@ Different Mixins
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import copy, decorators, logging
+import copy, logging
 import wx
 
-import config, compat, misc
+import config, compat, decorators, misc
+
+
+# caches shared by all writers; see invalidate_style_cache()
+# widget class name -> style definitions; see StylesMixin._get_widget_styles_defs()
+_style_defs_cache = decorators.Cache("gui_mixins.style_defs")
+# (writer class, widget class name, for_version, frozenset of flags) -> result of cn_f()
+_cn_f_cache = decorators.Cache("gui_mixins.cn_f")
+
+
+def invalidate_style_cache():
+    "Clear the cached style definitions and flag resolutions; to be called when config.widget_config is modified"
+    _style_defs_cache.clear()
+    _cn_f_cache.clear()
 
 
 class StylesMixin(object):
@@ -36,6 +49,9 @@ class StylesMixin(object):
         Sometime the flag is a digit as a string. The function doesn't process such kind of flags.
         It returns these flags unchanged.
 
+        The results are cached for the writer class, the widget class, the wx version and the set of flags;
+        see invalidate_style_cache().
+
         Example C++::
             >>> self.cn_f('wxLC_REPORT|wxSUNKEN_BORDER')
             'wxLC_REPORT|wxSUNKEN_BORDER'
@@ -52,9 +68,16 @@ class StylesMixin(object):
         if flags.isdigit(): return flags
 
         # split flags to set first
-        oflags = flags
-        flags = set(flags.split('|'))
-
+        flags = frozenset(flags.split('|'))
+        key = ( self.__class__, getattr(self, 'klass', None),
+                getattr(getattr(self, 'codegen', None), 'for_version', None), flags )
+        ret = _cn_f_cache.get(key)
+        if ret is None:
+            ret = _cn_f_cache.put(key, self._resolve_flags(set(flags)))
+        return ret
+
+    def _resolve_flags(self, flags):
+        "Implementation of cn_f() without cache; flags is a set and will be modified"
         # check for non-supported, renamed flags and ...
         if self.style_defs:
             flags = self.process_styles(flags)
@@ -68,9 +91,8 @@ class StylesMixin(object):
 
         return flags
 
-    @decorators.memoize
     def _get_widget_styles_defs(self, widget_name):
-        """Logic of _get_style_defs() but extracted for cache decorator.
+        """Logic of _get_style_defs() but extracted to cache the result per widget name.
 
         note: The styles are copied using a deep-copy to prevent changing original data accidentally.
 
@@ -78,6 +100,9 @@ class StylesMixin(object):
         widget_name: Widget name e.g. 'wxCheckBox'
 
         returns a joined copy of the generic styles and widget specific styles as dict"""
+        styles = _style_defs_cache.get(widget_name)
+        if styles is not None:
+            return styles
         styles = {}
         # Use always a deep-copy to prevent changing original data
         try:
@@ -86,13 +111,12 @@ class StylesMixin(object):
         except KeyError:
             pass
 
-        return styles
+        return _style_defs_cache.put(widget_name, styles)
 
     def _get_style_defs(self):
         """Return all styles related to this widget as dict. This includes generic styles from config.widget_config.
 
-        The implementation has moved to _get_widget_styles_defs() to use a
-        simple cache decorator instead of using an own cache implementation.
+        The implementation has moved to _get_widget_styles_defs(), which caches the result.
 
         see: config.widget_config, _get_widget_styles_defs()"""
         return self._get_widget_styles_defs(getattr(self, 'klass', None))
@@ -208,6 +232,9 @@ class BitmapMixin(object):
                       "focus_bitmap":   "Bitmap to be shown when the widget has the keyboard focus."}
     _NAMES = ( ("disabled_bitmap", "Disabled"), ("pressed_bitmap", "Pressed"),
                ("current_bitmap", "Current"),   ("focus_bitmap", "Focus") )
+    # all properties that are shown as bitmaps; see update_bitmaps()
+    _BITMAP_PROPERTIES = ("bitmap", "disabled_bitmap", "pressed_bitmap", "current_bitmap", "focus_bitmap",
+                          "icon", "tools")
     def __init__(self):
         self.bitmap_reference = None # size of reference bitmap
 
@@ -240,7 +267,8 @@ class BitmapMixin(object):
             if not current.IsOk() or current.Size != ref_size or (modified and p.name in modified):
                 self._set_preview_bitmap(p, name, ref_size)
         if set_size or not modified or "bitmap" in modified:
-            self._set_widget_best_size()
+            # no immediate layout if called on widget creation
+            self._set_widget_best_size(immediate=bool(modified))
 
     def _set_preview_bitmap(self, prop, name, ref_size=None):
         bmp = prop.get_value()
@@ -276,6 +304,13 @@ class BitmapMixin(object):
             self._set_preview_bitmap(self.properties["bitmap"], "")
         self._check_bitmaps(modified)
 
+    def update_bitmaps(self):
+        "Set the bitmaps of the widget again, e.g. after the files have been modified; see misc.reload_bitmaps()"
+        if not self.widget: return
+        modified = [name for name in self._BITMAP_PROPERTIES if name in self.properties]
+        if modified:
+            self.properties_changed(modified)
+
     def get_preview_obj_bitmap(self, bitmap=None):
         """Create a wx.Bitmap or wx.EmptyBitmap from the given statement.
         If no statement is given, the instance variable named "bitmap" is used.
@@ -296,8 +331,7 @@ class BitmapMixin(object):
         elif bitmap.startswith('art:'):
             return self.get_preview_obj_artprovider(bitmap)
         else:
-            bitmap = misc.get_absolute_path(bitmap)
-            return wx.Bitmap(bitmap, wx.BITMAP_TYPE_ANY)
+            return misc.get_bitmap( misc.get_absolute_path(bitmap) )
 
     def get_preview_obj_artprovider(self, bitmap):
         """Create a wxBitmap or wx.EmptyBitmap from the given statement using wxArtProvider.
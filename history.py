@@ -1,21 +1,48 @@
 """\
 history for undo/redo/repeat
 
+Property changes are stored as deltas (old and new value of a single property).
+Structural changes like adding, removing or pasting widgets are stored as zlib compressed XML snapshots of the
+affected slots of a sizer, keyed by the path of the sizer, or of the toplevel window if a change is not within a sizer.
+The memory used by the history is limited by the preference 'undo_memory_limit'.
+
 copyright: 2017-2018 Dietmar Schwertberger
 license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import common, config, clipboard
+import collections, contextlib, copy, logging, sys, zlib
+import common, config
 
 
 class PropertyValue(object):
+    __slots__ = ("deactivated", "value", "modified")
     def __init__(self, deactivated, value, modified):
         self.deactivated = deactivated
         self.value = value
         self.modified = modified
+    def __eq__(self, other):
+        return (self.deactivated, self.value, self.modified) == (other.deactivated, other.value, other.modified)
+    def __ne__(self, other):
+        return not self == other
     def __repr__(self):
         return "(%r, %r, %r)"%(self.deactivated, self.value, self.modified)
 
+    @classmethod
+    def from_property(cls, prop):
+        if hasattr(prop, "value_set"):
+            # check list property: store the flags, as prop.value is calculated on demand only
+            value = prop.get_string_value()
+        elif isinstance(prop.value, (list, dict)):
+            # e.g. a GridProperty; avoid side effects
+            value = copy.deepcopy(prop.value)
+        else:
+            value = prop.value
+        return cls(prop.deactivated, value, prop.modified)
+
+    def get_size(self):
+        return sys.getsizeof(self.value)
+
+
 class HistoryItem(object):
     def __init__(self, prop):
         path = common.app_tree.get_widget_path(prop.owner)
@@ -23,6 +50,9 @@ class HistoryItem(object):
         self.name = prop.name
     def get_key(self):
         return self.name
+    def get_size(self):
+        "estimated memory usage"
+        return 200
 
 class HistoryPropertyItem(HistoryItem):
     def __init__(self, prop, old, new):
@@ -33,11 +63,18 @@ class HistoryPropertyItem(HistoryItem):
         self.new = new
     def __repr__(self):
         return "%s(%s, %r, %r, %r)"%(self.__class__.__name__, self.path, self.name, self.old, self.new)
+    def get_size(self):
+        return HistoryItem.get_size(self) + sum(value.get_size() for value in (self.old, self.new) if value is not None)
+
+    def get_path(self, undo):
+        "path of the widget before undo or redo; for a modified name, the last path element needs to be adjusted"
+        if self.name!="name": return self.path
+        return self.path[:-1] + ((self.new if undo else self.old).value,)
 
 
 class HistorySetPropertyItem(HistoryPropertyItem):
-    def __init__(self, prop, value, checked):
-        HistoryItem.__init__(self, prop)
+    def __init__(self, prop, value, checked, old=None, new=None):
+        HistoryPropertyItem.__init__(self, prop, old, new)
         self.value = value
         self.checked = checked
     def __repr__(self):
@@ -46,22 +83,109 @@ class HistorySetPropertyItem(HistoryPropertyItem):
         return (self.name, self.value)
 
 
+# a toplevel window; data is None if the toplevel did not exist
+ToplevelSnapshot = collections.namedtuple("ToplevelSnapshot", ["name", "index", "data", "shown"])
+# the slots pos, pos+1, ... of the sizer at path; items are the compressed clipboard data or None for an empty slot;
+# count is the number of children of the sizer when the snapshot was taken
+SlotsSnapshot = collections.namedtuple("SlotsSnapshot", ["path", "pos", "count", "items"])
+
+
+class HistoryStructureItem(object):
+    "structural change; the snapshots are ToplevelSnapshot or SlotsSnapshot instances, to be restored newest first"
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+    def __repr__(self):
+        names = [snapshot.name if isinstance(snapshot, ToplevelSnapshot) else "/".join(snapshot.path)
+                 for snapshot in self.snapshots]
+        return "%s(%s)"%(self.__class__.__name__, ", ".join(names))
+    def get_size(self):
+        size = 200
+        for snapshot in self.snapshots:
+            if isinstance(snapshot, ToplevelSnapshot):
+                if snapshot.data is not None: size += len(snapshot.data)
+            else:
+                size += sum(len(data) for data in snapshot.items if data is not None)
+        return size
+
+
 class History(object):
-    def __init__(self, depth=20):
-        self.actions = []
-        self.actions_redo = [] # on undo, the action is moved from actions to actions_redo
-        self.depth = depth
+    def __init__(self, depth=None, memory_limit=None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        # the newest action is first; on undo, the action is moved from actions to actions_redo
+        self.actions = collections.deque()
+        self.actions_redo = collections.deque()
+        self.depth = depth                # optional maximum number of actions
+        self.memory_limit = memory_limit  # in bytes; if None, the preference 'undo_memory_limit' is used
+        self.memory = 0                   # estimated memory usage of actions and actions_redo
         self._buffer = None
         self._redo_widget = None # the widget that originally was modified
         self._repeating = False
+        self._restoring = False  # True while undo/redo is applied; no actions will be recorded
+        self._structure_level = 0
+        self._structure_buffer = None  # list of (region, snapshot) before a structural change; see _get_region
+        self._structure_toplevels = None  # names of the toplevels before a structural change
+        self._structure_modifications = None  # app_tree.modifications before a structural change
+
+    def _get_memory_limit(self):
+        if self.memory_limit is not None: return self.memory_limit
+        return config.preferences.undo_memory_limit * 1024 * 1024
+
+    def _find_widget(self, path):
+        widget = common.app_tree.find_widget_from_path(path)
+        if widget is None:
+            self._logger.warning( _("Widget not found for undo/redo: %s"), "/".join(path) )
+        return widget
+
+    ####################################################################################################################
+    # undo/redo/repeat
+    def can_undo(self):
+        return bool(self.actions)
 
-    def undo(self, focused_widget):
-        pass
+    def can_redo(self):
+        return bool(self.actions_redo)
 
-    def redo(self, focused_widget):
+    def undo(self, focused_widget=None):
+        if not self.actions: return
+        action = self.actions.popleft()
+        self._apply(action, undo=True)
+        self.actions_redo.appendleft(action)
+
+    def redo(self, focused_widget=None):
         if not self.actions_redo:
             self.repeat(focused_widget, multiple=False)
             return
+        action = self.actions_redo.popleft()
+        self._apply(action, undo=False)
+        self.actions.appendleft(action)
+
+    def _apply(self, action, undo):
+        if config.debugging:
+            print("%s %s"%(undo and "Undo" or "Redo", action))
+        self._restoring = True
+        try:
+            if isinstance(action, HistoryStructureItem):
+                self.memory -= action.get_size()
+                self._restore_snapshots(action)
+                self.memory += action.get_size()
+            else:
+                self._set_property_value(action, undo)
+        finally:
+            self._restoring = False
+            self._buffer = None
+        common.app_tree.app.saved = False
+
+    def _set_property_value(self, action, undo):
+        value = action.old if undo else action.new
+        widget = self._find_widget(action.get_path(undo))
+        if value is None or widget is None or action.name not in widget.properties: return
+        prop = widget.properties[action.name]
+        prop.previous_value = prop.value  # e.g. used by the owner if the name has been changed
+        prop.set(value.value)
+        if value.deactivated is not None:
+            prop.set_active(not value.deactivated)
+        prop._notify()
+        prop.modified = value.modified
+        prop.previous_value = None
 
     def repeat(self, focused_widget, multiple=True):
         "apply action(s) to another widget"
@@ -104,45 +228,247 @@ class History(object):
         self._repeating = False
 
     def _add_item(self, item):
-        self.actions.insert(0, item)
-        if len(self.actions)>self.depth:
-            del self.actions[-1]
+        self.actions.appendleft(item)
+        self.memory += item.get_size()
         if not self._repeating and isinstance(item, HistoryPropertyItem):
             self._redo_widget = item.path
 
-        if self.actions_redo:
-            del self.actions_redo[:]
+        while self.actions_redo:
+            self.memory -= self.actions_redo.pop().get_size()
+
+        # drop the oldest actions if the limits are exceeded; the newest one is always kept
+        memory_limit = self._get_memory_limit()
+        while len(self.actions)>1 and (self.memory>memory_limit or (self.depth and len(self.actions)>self.depth)):
+            self.memory -= self.actions.pop().get_size()
 
         if config.debugging:
             print("UndoBuffer:")
             for entry in self.actions:
                 print(entry)
 
+    def clear(self):
+        "to be called when a new file is loaded"
+        self.actions.clear()
+        self.actions_redo.clear()
+        self.memory = 0
+        self._redo_widget = None
+
+    ####################################################################################################################
+    # snapshots of toplevel windows and of slots of sizers
+    def _get_toplevel_node(self, name):
+        for node in common.app_tree.root.children or []:
+            if node.widget.name==name: return node
+        return None
+
+    def _take_snapshot(self, node):
+        xml_unicode = []
+        node.write(xml_unicode, 0)
+        return zlib.compress( u"".join(xml_unicode).encode("utf-8") )
+
+    def _is_shown(self, node):
+        widget = node.widget
+        return bool(widget.widget) and widget.is_visible()
+
+    def _take_slots_snapshot(self, sizer, pos, length):
+        import clipboard, edit_sizers
+        items = []
+        for child in sizer.children[pos:pos+length]:
+            if isinstance(child, edit_sizers.SizerSlot):
+                items.append(None)
+            else:
+                items.append( zlib.compress(clipboard.dump_widget(child)) )
+        return SlotsSnapshot(common.app_tree.get_widget_path(sizer), pos, len(sizer.children), items)
+
+    def _restore_snapshots(self, action):
+        """restore the snapshots from action, the newest first;
+        they are replaced with snapshots of the current state, such that applying again will reverse the change"""
+        import misc
+        misc.set_focused_widget(None)
+        current = []
+        for snapshot in reversed(action.snapshots):
+            if isinstance(snapshot, ToplevelSnapshot):
+                current.append( self._restore_toplevel(snapshot) )
+            else:
+                current.append( self._restore_slots(snapshot) )
+        action.snapshots = current
+
+    def _restore_toplevel(self, snapshot):
+        "replace the toplevel window with the snapshot; returns a snapshot of the current state"
+        node = self._get_toplevel_node(snapshot.name)
+        shown = snapshot.shown
+        if node is None:
+            current = ToplevelSnapshot(snapshot.name, snapshot.index, None, False)
+        else:
+            # the restored toplevel will be shown if the replaced one is currently shown
+            position = common.app_tree.root.children.index(node)
+            shown = self._is_shown(node)
+            current = ToplevelSnapshot(snapshot.name, position, self._take_snapshot(node), shown)
+            node.widget.remove()
+        if snapshot.data is not None:
+            node = self._paste_toplevel(snapshot.data, snapshot.index)
+            if shown: common.app_tree.show_toplevel(None, node.widget)
+        return current
+
+    def _paste_toplevel(self, data, index):
+        import xml_parse
+        parser = xml_parse.ClipboardXmlWidgetBuilder(None, None, 0, 0, (1,1), None, 0, rename=False)
+        parser.parse_string( zlib.decompress(data) )
+        node = common.app_tree.root.children[-1]
+        if index < len(common.app_tree.root.children)-1:
+            common.app_tree.change_node_pos(node, index)
+        return node
+
+    def _restore_slots(self, snapshot):
+        "replace the slots of the sizer with the snapshot; returns a snapshot of the current state"
+        import edit_sizers
+        sizer = self._find_widget(snapshot.path)
+        if sizer is None: return snapshot
+        pos = snapshot.pos
+        length = len(snapshot.items) + len(sizer.children) - snapshot.count  # slots may have been added or removed
+        current = self._take_slots_snapshot(sizer, pos, length)
+        with sizer.frozen():
+            # remove the surplus slots or insert the missing ones
+            for p in range(pos+length-1, pos+len(snapshot.items)-1, -1):
+                if not isinstance(sizer.children[p], edit_sizers.SizerSlot): sizer.free_slot(p)
+                sizer.children[p]._remove()
+            for p in range(pos+length, pos+len(snapshot.items)):
+                sizer._insert_slot(p, select=False)
+            for p, data in enumerate(snapshot.items, pos):
+                if not isinstance(sizer.children[p], edit_sizers.SizerSlot): sizer.free_slot(p)
+                if data is not None: self._paste_item(sizer, p, data)
+            if sizer.widget: sizer.layout(True)
+        return current
+
+    def _paste_item(self, sizer, pos, data):
+        "paste into the empty slot at pos"
+        import clipboard, xml_parse
+        proportion, span, flag, border, xml_unicode = clipboard.clipboard2widget( zlib.decompress(data) )
+        parser = xml_parse.ClipboardXmlWidgetBuilder(sizer.window, sizer, pos, proportion, span, flag, border,
+                                                     rename=False)
+        parser.parse_string( xml_unicode.encode("utf8") )
+
     ####################################################################################################################
     # interface from Property instances
     def property_changing(self, prop):
         "to be called when property value is still the old one"
-        value = prop.value
-        self._buffer = (prop.deactivated, prop.value, prop.modified)
+        if self._restoring: return
+        self._buffer = PropertyValue.from_property(prop)
 
     def property_changed(self, prop, user=True):
         "argument user: True if set by the user, False if set in dependence to another change"
+        if self._restoring: return
         old = self._buffer
-        new = (prop.deactivated, prop.value, prop.modified)
+        new = PropertyValue.from_property(prop)
         self._buffer = None
-        if new==old: return
-        self._add_item( HistoryPropertyItem(prop,old, new) )
+        if old is None or new==old: return
+        self._add_item( HistoryPropertyItem(prop, old, new) )
 
     def set_property_changed(self, prop, value, checked, user=True):
-        self._add_item( HistorySetPropertyItem(prop, value, checked) )
+        if self._restoring: return
+        old = self._buffer
+        new = PropertyValue.from_property(prop)
+        self._buffer = None
+        if old is not None and new==old: return
+        self._add_item( HistorySetPropertyItem(prop, value, checked, old, new) )
 
-    def widget_added(self):
-        self.actions.append( ("widget", path, "add", xml_data))
-        pass
+    ####################################################################################################################
+    # interface for structural changes: adding, removing, pasting, moving widgets
+    def structure_changing(self, *widgets):
+        """to be called before widgets or their children are added or removed; calls may be nested;
+        widgets are the edit objects to be removed or replaced or whose children will change,
+        or (sizer, pos) if slots will be inserted into a sizer at pos"""
+        self._structure_level += 1
+        if self._restoring: return
+        if self._structure_buffer is None:
+            self._structure_buffer = []
+            self._structure_modifications = common.app_tree.modifications
+            # toplevels that don't exist yet will be removed on undo
+            self._structure_toplevels = set(node.widget.name for node in common.app_tree.root.children or [])
+        regions = []
+        for widget in widgets:
+            region = self._get_region(widget)
+            if region is None or region in regions or self._is_new(region): continue
+            # slots of the same sizer are stored together
+            for i, other in enumerate(regions):
+                if isinstance(region, tuple) and isinstance(other, tuple) and region[0] is other[0]:
+                    start = min(region[1], other[1])
+                    end = max(region[1]+region[2], other[1]+other[2])
+                    regions[i] = (region[0], start, end-start)
+                    break
+            else:
+                regions.append(region)
+        # with nested calls or multiple widgets, regions may be part of others
+        for region in regions:
+            if any(self._contains(other, region) for other in regions if other is not region): continue
+            if any(self._contains(self._get_current_region(*item), region) for item in self._structure_buffer): continue
+            if isinstance(region, tuple):
+                snapshot = self._take_slots_snapshot(*region)
+            else:
+                snapshot = ToplevelSnapshot( region.widget.name, common.app_tree.root.children.index(region),
+                                             self._take_snapshot(region), self._is_shown(region) )
+            self._structure_buffer.append( (region, snapshot) )
 
-    def widget_removing(self, widget):
-        self._buffer = clipboard.dump_widget(widget)
+    def _get_region(self, widget):
+        """returns the part of the tree that contains all changes to widget and it's children:
+        the toplevel node or the slots (sizer, pos, length) of a sizer; None for the application"""
+        if isinstance(widget, tuple):
+            sizer, pos = widget
+            return (sizer, pos, 0)
+        node = getattr(widget, "node", None)
+        while node is not None and node is not common.app_tree.root:
+            if node.parent is common.app_tree.root: return node
+            sizer = getattr(node.widget, "sizer", None)
+            if sizer is not None and not sizer.is_virtual():
+                return (sizer, node.widget.pos, 1)
+            # e.g. a sizer of a window or a page of a notebook
+            node = node.parent
+        return None
 
-    def widget_removed(self):
-        self.actions.append( ("widget", path, "remove", self._buffer))
-        self._buffer = None
+    def _get_current_region(self, region, snapshot):
+        "the region of a buffered snapshot after the changes so far; slots may have been added or removed"
+        if not isinstance(region, tuple): return region
+        sizer, pos, length = region
+        return (sizer, pos, length + len(sizer.children) - snapshot.count)
+
+    def _is_new(self, region):
+        "True if region is part of a toplevel that has been added during the current change"
+        node = region[0].node if isinstance(region, tuple) else region
+        while node.parent is not common.app_tree.root:
+            node = node.parent
+        return node.widget.name not in self._structure_toplevels
+
+    def _contains(self, region, other):
+        "True if other is part of region"
+        if isinstance(region, tuple):
+            sizer, pos, length = region
+            if isinstance(other, tuple) and other[0] is sizer:
+                return pos <= other[1] and other[1]+other[2] <= pos+length
+            nodes = [child.node for child in sizer.children[pos:pos+length]]
+        else:
+            nodes = [region]
+        node = other[0].node if isinstance(other, tuple) else other
+        return any(node is n or node.has_ancestor(n) for n in nodes)
+
+    def structure_changed(self):
+        self._structure_level -= 1
+        if self._structure_level or self._structure_buffer is None: return
+        buffer = self._structure_buffer
+        self._structure_buffer = None
+        # the tree was not modified, e.g. the builder was cancelled
+        if common.app_tree.modifications==self._structure_modifications: return
+        snapshots = [snapshot for region, snapshot in buffer]
+        # toplevels that have been added
+        for node in common.app_tree.root.children or []:
+            if node.widget.name not in self._structure_toplevels:
+                snapshots.append( ToplevelSnapshot(node.widget.name, None, None, False) )
+        if snapshots:
+            self._add_item( HistoryStructureItem(snapshots) )
+
+    @contextlib.contextmanager
+    def structure_change(self, *widgets):
+        "context manager to record a structural change"
+        self.structure_changing(*widgets)
+        try:
+            yield
+        finally:
+            self.structure_changed()
@@ -9,7 +9,7 @@ widgets and initializes all the stuff (tree, frame_property, etc.)
 """
 
 # import general python modules
-import logging, os, os.path, sys, math, time, functools
+import collections, logging, os, os.path, sys, math, time, functools
 import wx
 from xml.sax import SAXParseException
 
@@ -21,7 +21,7 @@ import preferencesdialog, msgdialog, bugdialog, about
 import log
 import template
 from tree import WidgetTree
-from xml_parse import XmlWidgetBuilder, ProgressXmlWidgetBuilder, XmlParsingError
+from xml_parse import XmlWidgetBuilder, ProgressXmlWidgetBuilder, XmlParsingError, get_input_file_version
 
 
 
@@ -65,8 +65,21 @@ class FileDropTarget(wx.FileDropTarget):
         return False
 
 
+class _PropertyPage(object):
+    "A notebook page of the property editor; see wxGladePropertyPanel.create_editor()"
+    def __init__(self, name, scrolled, key, properties):
+        self.name = name
+        self.scrolled = scrolled      # the ScrolledWindow that is added to the notebook
+        self.key = key                # editor keys of the properties; None if the page can't be re-used
+        self.properties = properties  # the properties owning the editor controls; None while in the pool
+        self.states = None            # editor states while in the pool; see Property.release_editor()
+
+
 class wxGladePropertyPanel(wx.Panel):
     "Panel used to display the Properties of the various widgets"
+    DELAY = 150      # delay in ms before the editors are created for a widget class that is not in the pool
+    POOL_SIZE = 10   # number of widget classes to keep the editors for
+
     def __init__(self, parent):
         wx.Panel.__init__( self, parent, -1, name='PropertyPanel' )
         self.SetBackgroundColour( compat.wx_SystemSettings_GetColour(wx.SYS_COLOUR_BTNFACE) )
@@ -75,6 +88,8 @@ class wxGladePropertyPanel(wx.Panel):
         self.next_widget = None           # the next one, will only be edited after a small delay
 
         self.pagenames = None
+        self._pages = []                        # the current pages; instances of _PropertyPage
+        self._pool = collections.OrderedDict()  # widget class -> { page name: _PropertyPage }
 
         sizer = wx.BoxSizer(wx.VERTICAL)
         self.heading = wx.TextCtrl(self, style=wx.TE_READONLY)
@@ -98,8 +113,9 @@ class wxGladePropertyPanel(wx.Panel):
             if p_name[0].isupper(): continue
             prop = self.current_widget.properties.get(p_name)
             if not prop or not hasattr(prop, "on_drop_file"): continue
-            if ( hasattr(prop, "label_ctrl") and prop.label_ctrl.ScreenRect.Contains( screen_xy ) and
-                 prop.label_ctrl.IsShownOnScreen() ) or prop.has_control(ctrl):
+            label_ctrl = getattr(prop, "label_ctrl", None)
+            if ( label_ctrl and label_ctrl.ScreenRect.Contains( screen_xy ) and
+                 label_ctrl.IsShownOnScreen() ) or prop.has_control(ctrl):
                 return prop.on_drop_file(filename)
         return False
 
@@ -111,10 +127,13 @@ class wxGladePropertyPanel(wx.Panel):
             return
         self.next_widget = widget
         if self.current_widget:
-            for editor in self.current_widget.properties.values():
-                editor.destroy_editor()
+            self._release_editors()
             self.current_widget = None   # delete the reference
-        wx.CallLater( 150, self.edit_properties, widget )
+        if widget is not None and widget.__class__ in self._pool:
+            # the editors can be re-used, so there's no need to wait for further selection changes
+            wx.CallAfter( self.edit_properties, widget )
+        else:
+            wx.CallLater( self.DELAY, self.edit_properties, widget )
 
     def edit_properties(self, edit_widget):
         # this will be called with a delay
@@ -123,7 +142,7 @@ class wxGladePropertyPanel(wx.Panel):
             return
         if self._notebook_decoration_size is None:
             # try again later
-            wx.CallLater( 150, self.edit_properties, edit_widget )
+            wx.CallLater( self.DELAY, self.edit_properties, edit_widget )
             return
 
         self.current_widget = None
@@ -135,6 +154,61 @@ class wxGladePropertyPanel(wx.Panel):
         else:
             self.heading.SetValue( _('Properties') )
 
+    def _release_editors(self):
+        "Detach the editors from the properties; re-usable ones are kept, the others are destroyed"
+        for page in self._pages:
+            if page.properties is None: continue
+            if page.key is None:
+                for prop in page.properties:
+                    prop.destroy_editor()
+            else:
+                page.states = [prop.release_editor() for prop in page.properties]
+            page.properties = None
+
+    def _remove_pages(self):
+        "Remove all pages from the notebook; re-usable pages are hidden and kept in the pool"
+        self._release_editors()
+        while self.notebook.PageCount:
+            self.notebook.RemovePage(self.notebook.PageCount-1)
+        for page in self._pages:
+            if page.key is None:
+                page.scrolled.Destroy()
+            else:
+                page.scrolled.Hide()
+        self._pages = []
+
+    def _get_pool(self, widget_class):
+        "Return the pooled pages for the widget class; the least recently used class is removed if the pool is full"
+        pages = self._pool.pop(widget_class, None)
+        if pages is None:
+            pages = {}
+            while len(self._pool) >= self.POOL_SIZE:
+                old_class = next(iter(self._pool))
+                for page in self._pool.pop(old_class).values():
+                    page.scrolled.Destroy()
+        self._pool[widget_class] = pages
+        return pages
+
+    def _get_pages(self, edit_widget):
+        "Return a list of tuples (page name, list of properties) for the widget"
+        pages = []
+        properties = None
+        for name in edit_widget.PROPERTIES:
+            if name[0].isupper():
+                # start new page
+                properties = None
+                if name=="Layout" and not edit_widget._has_layout: continue
+                if name=="Events" and edit_widget.events is None: continue
+                properties = []
+                pages.append( (name, properties) )
+                continue
+            if properties is None: continue
+            # a property or None
+            prop = edit_widget.properties.get(name)
+            if prop is not None:
+                properties.append(prop)
+        return pages
+
     def create_editor(self, edit_widget):
         # fill the frame with a notebook of property editors
         
@@ -149,46 +223,40 @@ class wxGladePropertyPanel(wx.Panel):
         select_page = self.pagenames[selection]  if selection!=-1  else None
 
         # clear notebook pages
-        if self.notebook.PageCount:
-            #self.notebook.DeleteAllPages()  # deletes also the windows on the pages
-            while self.notebook.PageCount:
-                self.notebook.DeletePage(self.notebook.PageCount-1)
+        self._remove_pages()
 
         self.pagenames = pagenames = []
-        self.sizers = []
         if not edit_widget: return
-        current_page = current_sizer = current_pagename = None
-        property_instance = None
-        for prop in edit_widget.PROPERTIES:
-            if prop[0].isupper():
-                # end previous page
-                if current_page is not None:
-                    self.end_page(current_page, current_sizer, current_pagename)
-                    current_page = None
-
-                # start new page
-                current_pagename = prop
-                if prop=="Layout" and not edit_widget._has_layout:continue
-                if prop=="Events" and edit_widget.events is None: continue
-
-                current_page = self.start_page(prop)
-                current_sizer = wx.BoxSizer(wx.VERTICAL)
-                self.sizers.append(current_sizer)
-
-                self.pagenames.append(prop)
-
-                continue
-
-            if current_pagename=="Layout" and not edit_widget._has_layout: continue
-
-            # a property or None
-            property_instance_ = edit_widget.properties.get(prop)
-            if property_instance_ is not None:
-                property_instance = property_instance_
-                property_instance.create_editor(current_page, current_sizer)
-
-        if current_page is not None:
-            self.end_page(current_page, current_sizer, current_pagename)
+        pool = self._get_pool(edit_widget.__class__)
+        for pagename, properties in self._get_pages(edit_widget):
+            keys = [prop.get_editor_key() for prop in properties]
+            key = None  if None in keys else  tuple(keys)
+            page = pool.get(pagename)
+            if page is not None and key is not None and page.key==key:
+                # re-use the editors; just display the values of the properties
+                for prop, state in zip(properties, page.states):
+                    prop.take_editor(state)
+                page.states = None
+                page.properties = properties
+                self.notebook.AddPage(page.scrolled, _(pagename))
+                panel = [w for w in page.scrolled.GetChildren() if isinstance(w, wx.Panel)][0]
+                panel.GetSizer().Layout()
+                self._set_page_size(page.scrolled)
+            else:
+                if page is not None:
+                    # different layout
+                    del pool[pagename]
+                    page.scrolled.Destroy()
+                panel = self.start_page(pagename)
+                sizer = wx.BoxSizer(wx.VERTICAL)
+                for prop in properties:
+                    prop.create_editor(panel, sizer)
+                self.end_page(panel, sizer, pagename)
+                page = _PropertyPage(pagename, panel.GetParent(), key, properties)
+                if key is not None:
+                    pool[pagename] = page
+            self._pages.append(page)
+            pagenames.append(pagename)
 
         if select_page and select_page in pagenames:
             index = pagenames.index(select_page)
@@ -437,8 +505,11 @@ class wxGladeFrame(wx.Frame):
         edit_menu = wx.Menu(style=wx.MENU_TEAROFF)
 
         # XXX update menu items
-        item = append_menu_item(edit_menu, -1, _('Re-do\tCtrl+Y'), helpString="Re-do the last property modification on another widget")
-        misc.bind_menu_item(self, item, lambda: common.history.repeat(misc.focused_widget))
+        item = append_menu_item(edit_menu, -1, _('Undo\tCtrl+Z'), helpString="Undo the last modification")
+        misc.bind_menu_item(self, item, lambda: common.history.undo(misc.focused_widget))
+
+        item = append_menu_item(edit_menu, -1, _('Re-do\tCtrl+Y'), helpString="Re-do the last undone modification")
+        misc.bind_menu_item(self, item, lambda: common.history.redo(misc.focused_widget))
 
         item = append_menu_item(edit_menu, -1, _('Repeat\tCtrl-R'), helpString="Repeat the last property modifications on another widget (multiple modifications, if applicable)")
         misc.bind_menu_item(self, item, lambda: common.history.repeat(misc.focused_widget))
@@ -491,6 +562,9 @@ class wxGladeFrame(wx.Frame):
 
         item = append_menu_item(view_menu, wx.ID_REFRESH, _("&Refresh Preview\tF5"), "refresh.xpm")
         misc.bind_menu_item(self, item, self.preview)
+        item = append_menu_item(view_menu, -1, _("Reload Changed &Images"),
+                                helpString="Load the modified image files again and update the Design windows")
+        misc.bind_menu_item(self, item, self.reload_bitmaps)
 
         menu_bar.Append(view_menu, _("&Windows"))
 
@@ -661,10 +735,19 @@ class wxGladeFrame(wx.Frame):
         self.autosave_timer.Start( int(config.preferences.autosave_delay) * 1000 )
 
     def on_autosave_timer(self, event):
-        res = common.autosave_current()
+        # the design is serialized here, the file is written in a background thread
+        callback = functools.partial(wx.CallAfter, self.on_autosave_done)
+        res = common.autosave_current(callback)
         if res == 2:
-            self.user_message(_("Auto saving... done"))
+            self.user_message(_("Auto saving..."))
+
+    def on_autosave_done(self, res, snapshot_duration, write_duration):
+        "called via wx.CallAfter when the background autosave has finished"
+        if res == 2:
+            self.user_message( _("Auto saving... done (snapshot: %.2f s, writing: %.2f s)") %
+                               (snapshot_duration, write_duration) )
         elif not res:
+            if self.autosave_timer is None: return
             self.autosave_timer.Stop()
             config.preferences.autosave = False
             self._logger.info(_('Disable autosave function permanently'))
@@ -722,6 +805,18 @@ class wxGladeFrame(wx.Frame):
         if toplevel is not None:
             toplevel.preview(refresh=True)
 
+    def reload_bitmaps(self):
+        "Remove modified image files from the bitmap cache and set the bitmaps of all widgets again"
+        from gui_mixins import BitmapMixin
+        removed = misc.reload_bitmaps()
+        def update(node):
+            if isinstance(node.widget, BitmapMixin):
+                node.widget.update_bitmaps()
+            for c in (node.children or []):
+                update(c)
+        update(common.app_tree.root)
+        self.user_message( _("%d changed image(s) reloaded")%removed )
+
     def show_tree(self):
         if self.IsIconized(): self.Iconize(False)
         common.app_tree.SetFocus()
@@ -887,15 +982,7 @@ class wxGladeFrame(wx.Frame):
                         infile = open(filename, "r", encoding="UTF8")
                     if hasattr(infile, "seek"):
                         # try to read file version number from the first few lines
-                        import re
-                        version_re = re.compile("<!-- generated by wxGlade (\d+)\.(\d+)\.(\d+)(\S*)\s*")
-                        for n in range(3):
-                            match = version_re.match( infile.readline() )
-                            if match:
-                                major, minor, sub, extension = match.groups()
-                                input_file_version = (int(major), int(minor), int(major), extension)
-                                break
-                        infile.seek(0)
+                        input_file_version = get_input_file_version(infile)
 
                 else:
                     common.app_tree.app.filename = None
@@ -983,9 +1070,8 @@ class wxGladeFrame(wx.Frame):
 
     def _save_app(self, filename):
         try:
-            obuffer = []
-            common.app_tree.write(obuffer)
-            common.save_file(filename, obuffer, 'wxg')
+            with common.XmlWriter(filename, config.preferences.wxg_backup) as outfile:
+                common.app_tree.write(outfile)
         except EnvironmentError as inst:
             if config.debugging: raise
             common.app_tree.app.saved = False
@@ -1313,7 +1399,10 @@ class wxGlade(wx.App):
         return 0
 
     def OnIdle(self, event):
-        "Idle tasks - currently show error messages only;  @see: L{show_msgdialog()}"
+        "Idle tasks - do pending sizer layouts and show error messages;  @see: L{show_msgdialog()}"
+        import edit_sizers
+        if edit_sizers.layout_scheduler is not None:
+            edit_sizers.layout_scheduler.flush()
         self.show_msgdialog()
         event.Skip()
 
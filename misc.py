@@ -7,7 +7,7 @@ Miscellaneous stuff, used in many parts of wxGlade
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import common, config, compat
+import common, config, compat, decorators
 import logging, os, re
 import wx
 
@@ -18,6 +18,8 @@ currently_under_mouse = None
 
 _get_xpm_bitmap_re = re.compile(r'"(?:[^"]|\\")*"')
 _item_bitmaps = {}
+# bitmaps loaded from files, shared by all widgets; see get_bitmap(), get_xpm_bitmap() and reload_bitmaps()
+_bitmap_cache = decorators.Cache("misc.bitmaps", max_cost=config.bitmap_cache_size)
 
 design_windows = []
 
@@ -233,12 +235,21 @@ def check_wx_version(major, minor=0, release=0, revision=0):
 ########################################################################################################################
 # error/warning/info messages
 def error_message(msg, title="Error", display_traceback=False):
+    if not config.use_gui:
+        logging.error( _(msg) )
+        return
     wx.MessageBox( _(msg), _(title), wx.OK | wx.CENTRE | wx.ICON_ERROR )
 
 def info_message(msg, title="Information"):
+    if not config.use_gui:
+        logging.info( _(msg) )
+        return
     wx.MessageBox( _(msg), _(title), wx.OK | wx.CENTRE | wx.ICON_INFORMATION )
 
 def warning_message(msg, title="Warning"):
+    if not config.use_gui:
+        logging.warning( _(msg) )
+        return
     wx.MessageBox( _(msg), _(title), wx.OK | wx.CENTRE | wx.ICON_WARNING )
 
 
@@ -325,7 +336,8 @@ def _remove():
     global focused_widget
     if not _can_remove(): return
     previous_focus = focused_widget
-    focused_widget.remove()
+    with common.history.structure_change(focused_widget):
+        focused_widget.remove()
     if focused_widget==previous_focus:
         # usually, remove() should set the focus to the empty slot or the parent of the widget, if not clear it here
         focused_widget = None
@@ -590,29 +602,79 @@ def design_title(title):
     return _('Design - <%s>') % title
 
 
+def _bitmap_cost(bmp):
+    "Approximate memory usage of the bitmap in bytes"
+    return bmp.GetWidth() * bmp.GetHeight() * 4
+
+
+def get_bitmap(path, bitmap_type=wx.BITMAP_TYPE_ANY):
+    """Return a wx.Bitmap for the image file.
+
+    The bitmaps are cached by absolute path, modification time and file size; i.e. a modified file will be loaded
+    again. The returned bitmap is shared and must not be modified."""
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except EnvironmentError:
+        return wx.Bitmap(path, bitmap_type)  # will fail and report the error
+    key = (path, stat.st_mtime, stat.st_size, bitmap_type)
+    bmp = _bitmap_cache.get(key)
+    if bmp is None:
+        bmp = wx.Bitmap(path, bitmap_type)
+        if bmp.IsOk():
+            _bitmap_cache.put(key, bmp, _bitmap_cost(bmp))
+    return bmp
+
+
 def get_xpm_bitmap(path):
+    "Return a wx.Bitmap for the XPM file; the path may point into a zip archive, e.g. 'icons.zip/tool.xpm'"
+    if os.path.exists(path):
+        return get_bitmap(path, wx.BITMAP_TYPE_XPM)
     bmp = wx.NullBitmap
-    if not os.path.exists(path):
-        if '.zip' in path:
-            import zipfile
-            archive, name = path.split('.zip', 1)
-            archive += '.zip'
-            if name.startswith(os.sep):
-                name = name.split(os.sep, 1)[1]
-            if zipfile.is_zipfile(archive):
-                # extract the XPM lines...
-                try:
-                    data = zipfile.ZipFile(archive).read(name)
-                    data = [d[1:-1] for d in _get_xpm_bitmap_re.findall(data)]
-                    bmp = wx.BitmapFromXPMData(data)
-                except:
-                    logging.exception(_('Internal Error'))
-                    bmp = wx.NullBitmap
-    else:
-        bmp = wx.Bitmap(path, wx.BITMAP_TYPE_XPM)
+    if '.zip' in path:
+        import zipfile
+        archive, name = path.split('.zip', 1)
+        archive += '.zip'
+        if name.startswith(os.sep):
+            name = name.split(os.sep, 1)[1]
+        try:
+            stat = os.stat(archive)
+        except EnvironmentError:
+            return bmp
+        key = (os.path.abspath(archive), stat.st_mtime, stat.st_size, name)
+        cached = _bitmap_cache.get(key)
+        if cached is not None:
+            return cached
+        if zipfile.is_zipfile(archive):
+            # extract the XPM lines...
+            try:
+                data = zipfile.ZipFile(archive).read(name)
+                data = [d[1:-1] for d in _get_xpm_bitmap_re.findall(data)]
+                bmp = wx.BitmapFromXPMData(data)
+            except:
+                logging.exception(_('Internal Error'))
+                bmp = wx.NullBitmap
+            if bmp.IsOk():
+                _bitmap_cache.put(key, bmp, _bitmap_cost(bmp))
     return bmp
 
 
+def reload_bitmaps():
+    """Remove the cached bitmaps of modified or deleted files; returns the number of removed bitmaps.
+    The widgets need to be updated separately; see gui_mixins.BitmapMixin.update_bitmaps()"""
+    removed = 0
+    for key in _bitmap_cache.keys():
+        path, mtime, size = key[:3]
+        try:
+            stat = os.stat(path)
+        except EnvironmentError:
+            stat = None
+        if stat is None or (stat.st_mtime, stat.st_size) != (mtime, size):
+            _bitmap_cache.discard(key)
+            removed += 1
+    return removed
+
+
 def get_absolute_path(path, for_preview=False):
     "Get an absolute path relative to the current output directory (where the code is generated)."
     if os.path.isabs(path):
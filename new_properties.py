@@ -45,6 +45,21 @@ def flush_current_property():
     current_property.flush()
 
 
+class _EditorHandler(object):
+    "Event handler for editor controls; calls the method of the property that currently owns the controls"
+    __slots__ = ("prop", "name")
+    def __init__(self, prop, name):
+        self.prop = prop
+        self.name = name
+
+    def __call__(self, event):
+        if self.prop is None:
+            # the controls are kept for re-use, but currently not owned by a property
+            event.Skip()
+            return
+        return getattr(self.prop, self.name)(event)
+
+
 class Property(object):
     "Base class for property editors"
     deactivated = None # None: can not be deactivated; otherwise bool value
@@ -53,23 +68,30 @@ class Property(object):
     TOOLTIP = None
     LABEL = None # defaults to property name
     CONTROLNAMES = ["enabler"]  # for activation; also these attributes will be set to None when the editor is destroyed
+    EDITOR_ATTRIBUTES = ["label_ctrl"]  # further editor state to be passed on with the controls; see release_editor()
     GROW = False # if this is True, no spacer is added after the control, so it may grow down to the lower edge
     HAS_DATA = True
     min_version = None  # can be overwritten in instances; currently only used by BitmapProperty
+    # the following defaults are overwritten in instances only when required; as a design may have many thousands of
+    # properties, they are not stored with each instance
+    previous_value = None  # only set during call of self.owner.properties_modified
+    modified = False  # either by the user or from loaded file; WidgetStyleProperty.write uses it
+    # this can be set to True by the owner, depending on another property value; value will still be written to XML
+    blocked = False
+    controls = None  # editor state, only set while the property is displayed in the property editor
+    editing = False
+    enabler = label_ctrl = None  # editor controls; see CONTROLNAMES and EDITOR_ATTRIBUTES
+    _handlers = None  # event handlers of the editor controls; see _handler()
     def __init__(self, value, default_value=_DefaultArgument, name=None):#, write_always=False):
-        self._logger = logging.getLogger(self.__class__.__name__)
         self.value = value
-        self.previous_value = None  # only set during call of self.owner.properties_modified
         # when the property is assigned to an instance property, these will be set:
         self.owner = None
         self.name = name
         self.attributename = None
-        self.modified = False  # either by the user or from loaded file; WidgetStyleProperty.write uses it
-        # this can be set to True by the owner, depending on another property value; value will still be written to XML
-        self.blocked = False
         self.default_value = default_value
-        self.controls = None
-        self.editing = False
+    @property
+    def _logger(self):
+        return logging.getLogger(self.__class__.__name__)
     def set_owner(self, owner, attributename=None):
         self.owner = owner
         self.attributename = attributename
@@ -196,30 +218,40 @@ class Property(object):
 
     def write(self, output, tabs=0):
         """Writes the xml code for this property onto the given file or file-like object.
-        Argument tabs (int) is the indentation level.
-        This is the default implementation."""
+        Argument tabs (int) is the indentation level."""
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            self.write_snapshot(output, tabs, snapshot)
+
+    def snapshot(self):
+        """Returns the values to be written by write_snapshot() as immutable object or None if nothing is to be written.
+        The snapshot is taken on the GUI thread; write_snapshot() may be called from another thread, e.g. for autosave.
+        This is the default implementation: the value as string."""
         if not self.is_active():
-            return
+            return None
         if self.default_value is wx.NullColour:  # workaround for wxPython Phoenix bug 404
             if self.value is self.default_value:
-                return
+                return None
         elif self.default_value is not _DefaultArgument and self.value==self.default_value:
             #if self.default_value is not _DefaultArgument and self.value==self.default_value:
             # value is the default value -> not to be written
-            return
+            return None
         if self.value is None or isinstance(self.value, compat.basestring) and not self.value:
             # value is empty string
-            return
+            return None
 
-        # get the value as string
-        string_getter = getattr(self.owner, "get_%s_string"%self.attributename, None)
+        # get the value as string; the getter is looked up in the class to avoid PropertyOwner.__getattr__
+        string_getter = getattr(self.owner.__class__, "get_%s_string"%self.attributename, None)
         if string_getter:
-            value = string_getter()
-            if not value: return
+            value = string_getter(self.owner)
+            if not value: return None
         else:
             value = self.get_string_value()
-        # write the value
-        output.extend( common.format_xml_tag(self.name, value, tabs) )
+        return value
+
+    def write_snapshot(self, output, tabs, snapshot):
+        "Writes the xml code for a snapshot; must not access the owner or other mutable state; see snapshot()"
+        output.extend( common.format_xml_tag(self.name, snapshot, tabs) )
 
     ####################################################################################################################
     # editor (controls are added to common.property_panel)
@@ -229,9 +261,50 @@ class Property(object):
 
     def destroy_editor(self):
         # delete e.g. references to controls
-        for att in self.CONTROLNAMES:
-            setattr(self, att, None)
-        self.editing = False
+        # the class attributes are the defaults
+        for att in self.CONTROLNAMES + ["editing", "_handlers"]:
+            self.__dict__.pop(att, None)
+
+    def _handler(self, method):
+        "Return an event handler for editor controls; when the controls are taken over, the handler is re-directed"
+        handler = _EditorHandler(self, method.__name__)
+        if self._handlers is None: self._handlers = []
+        self._handlers.append(handler)
+        return handler
+
+    def get_editor_key(self):
+        """Return a hashable key describing the editor controls, or None if they can not be re-used.
+        The controls can be passed on to another property with the same key; see release_editor() and take_editor()"""
+        if type(self).create_editor == Property.create_editor:
+            return (self.__class__, self.name)  # no editor
+        return None
+
+    def release_editor(self):
+        """Detach the editor controls without destroying them.
+        Returns the editor state to be passed to take_editor() of another property with the same editor key."""
+        state = {"editing":self.editing, "_handlers":self._handlers or []}
+        for att in self.CONTROLNAMES + self.EDITOR_ATTRIBUTES:
+            if att in self.__dict__:
+                state[att] = self.__dict__[att]
+                setattr(self, att, None)
+        for handler in state["_handlers"]:
+            handler.prop = None
+        self.destroy_editor()
+        return state
+
+    def take_editor(self, state):
+        "Take over the editor controls that were detached from another property by release_editor()"
+        for att, value in state.items():
+            setattr(self, att, value)
+        for handler in self._handlers:
+            handler.prop = self
+        if self.editing:
+            self._refresh_editor()
+
+    def _refresh_editor(self):
+        "Display value and state of this property with editor controls that have been taken over"
+        self.activate_controls()
+        self.update_display()
 
     def update_display(self, start_editing=False):
         # when the value has changed
@@ -260,6 +333,9 @@ class Property(object):
         if "enabler" in self.CONTROLNAMES and self.enabler is not None:
             self.enabler.Enable(not self.blocked)
             self.enabler.SetValue(not self.deactivated)
+    def on_enabler(self, event):
+        self.toggle_active(event.IsChecked())
+
     def has_control(self, control):
         "check whether control belongs to this property (e.g. for dropping onto property"
         for controlname in self.CONTROLNAMES:
@@ -346,6 +422,7 @@ class PropertyRO(Property):
 class SpinProperty(Property):
     # int
     CONTROLNAMES = ["enabler", "spin"]
+    spin = None
     def __init__(self, value, val_range=(0,1000), immediate=False, default_value=_DefaultArgument, name=None):
         # val_range: (min_value,max_value)
         if isinstance(val_range, (int,float)):    # we allow val_range to be supplied as integer
@@ -385,7 +462,7 @@ class SpinProperty(Property):
         if self.deactivated is not None:
             self.enabler = wx.CheckBox(panel, -1, '')#, size=(1,-1))
             self.enabler.SetValue(not self.deactivated)
-            self.enabler.Bind( wx.EVT_CHECKBOX, lambda event: self.toggle_active(event.IsChecked()) )
+            self.enabler.Bind( wx.EVT_CHECKBOX, self._handler(self.on_enabler) )
             hsizer.Add(self.enabler, 0, wx.ALIGN_CENTER_VERTICAL|wx.LEFT, 3)
         #else:
             #hsizer.AddSpacer(20)
@@ -406,13 +483,23 @@ class SpinProperty(Property):
 
         self._set_tooltip(label, self.spin, self.enabler)
 
-        self.spin.Bind(wx.EVT_KILL_FOCUS, self.on_kill_focus) # by default, the value is only set when the focus is lost
-        self.spin.Bind(wx.EVT_SET_FOCUS, self.on_focus)
+        # by default, the value is only set when the focus is lost
+        self.spin.Bind(wx.EVT_KILL_FOCUS, self._handler(self.on_kill_focus))
+        self.spin.Bind(wx.EVT_SET_FOCUS, self._handler(self.on_focus))
         if wx.Platform == '__WXMAC__' or self.immediate:
-            self.spin.Bind(wx.EVT_SPINCTRL, self.on_spin)
-            self.spin.Bind(wx.EVT_TEXT_ENTER, self.on_spin)   # we want the enter key (see style above)
+            self.spin.Bind(wx.EVT_SPINCTRL, self._handler(self.on_spin))
+            self.spin.Bind(wx.EVT_TEXT_ENTER, self._handler(self.on_spin))   # we want the enter key (see style above)
         self.editing = True
 
+    def get_editor_key(self):
+        return (self.__class__, self.name, self.deactivated is not None, self.immediate, self.readonly)
+
+    def _refresh_editor(self):
+        self.spin.SetRange(*self.val_range)
+        Property._refresh_editor(self)
+        if self.deactivated is None and self.readonly:
+            self.spin.Enable(False)
+
     def _create_spin_ctrl(self, panel):
         style = wx.TE_PROCESS_ENTER | wx.SP_ARROW_KEYS
         self.spin = wx.SpinCtrl( panel, -1, style=style, min=self.val_range[0], max=self.val_range[1] )
@@ -492,6 +579,10 @@ class SpinDoubleProperty(SpinProperty):
         if self.spin:
             self._check_for_user_modification(event.GetString())
 
+    def _refresh_editor(self):
+        SpinProperty._refresh_editor(self)
+        self.spin.SetIncrement(0.1 if abs(self.val_range[1]-self.val_range[0])<=1.0 else 1.0)
+
 
 class SpinDoublePropertyA(SpinDoubleProperty):
     deactivated = False
@@ -509,14 +600,17 @@ class LayoutProportionProperty(SpinProperty):
     def __init__(self, value):
         SpinProperty.__init__(self, value, name="option", immediate=True)
 
-    def write(self, outfile, tabs=0):
-        if not _is_gridbag(self.owner.sizer):
-            Property.write(self, outfile, tabs)
+    def snapshot(self):
+        if _is_gridbag(self.owner.sizer): return None
+        return SpinProperty.snapshot(self)
 
     def create_editor(self, panel, sizer):
         if _is_gridbag(self.owner.sizer): return
         SpinProperty.create_editor(self, panel, sizer)
 
+    def get_editor_key(self):
+        return SpinProperty.get_editor_key(self) + (_is_gridbag(self.owner.sizer),)
+
 
 class LayoutPosProperty(SpinProperty):
     readonly = True
@@ -528,15 +622,16 @@ class LayoutPosProperty(SpinProperty):
     #def create_editor(self, panel, sizer):
         #SpinProperty.create_editor(self, panel, sizer)
 
-    def write(self, *args, **kwds):
+    def snapshot(self):
         # maybe, for GridBagSizers row/col should be written
-        pass
+        return None
 
 
 class LayoutSpanProperty(Property):
     TOOLTIP = "cell spanning for GridBagSizer items: rows, columns"
     # (int,int)
     CONTROLNAMES = ["rowspin","colspin"]
+    rowspin = colspin = None
     def __init__(self, value):
         self.immediate = True
         Property.__init__(self, value, default_value=(1,1), name="span")
@@ -558,6 +653,10 @@ class LayoutSpanProperty(Property):
     def get_string_value(self):
         return "%d, %d"%self.value
 
+    def get_editor_key(self):
+        if _is_gridbag(self.owner.sizer): return None  # the ranges depend on the position
+        return (self.__class__, self.name)  # no editor
+
     def create_editor(self, panel, sizer):
         if not _is_gridbag(self.owner.sizer): return
         max_rows, max_cols = self.owner.sizer.check_span_range(self.owner.pos, *self.value)
@@ -586,15 +685,16 @@ class LayoutSpanProperty(Property):
 
         self._set_tooltip(label, self.rowspin, self.colspin)
 
-        self.rowspin.Bind(wx.EVT_KILL_FOCUS, self.on_kill_focus) # by default, the value is only set when the focus is lost
-        self.colspin.Bind(wx.EVT_KILL_FOCUS, self.on_kill_focus)
-        self.rowspin.Bind(wx.EVT_SET_FOCUS, self.on_focus)
-        self.colspin.Bind(wx.EVT_SET_FOCUS, self.on_focus)
+        # by default, the value is only set when the focus is lost
+        self.rowspin.Bind(wx.EVT_KILL_FOCUS, self._handler(self.on_kill_focus))
+        self.colspin.Bind(wx.EVT_KILL_FOCUS, self._handler(self.on_kill_focus))
+        self.rowspin.Bind(wx.EVT_SET_FOCUS, self._handler(self.on_focus))
+        self.colspin.Bind(wx.EVT_SET_FOCUS, self._handler(self.on_focus))
         if self.immediate:
-            self.rowspin.Bind(wx.EVT_SPINCTRL, self.on_spin)
-            self.rowspin.Bind(wx.EVT_TEXT_ENTER, self.on_spin)   # we want the enter key (see style above)
-            self.colspin.Bind(wx.EVT_SPINCTRL, self.on_spin)
-            self.colspin.Bind(wx.EVT_TEXT_ENTER, self.on_spin)
+            self.rowspin.Bind(wx.EVT_SPINCTRL, self._handler(self.on_spin))
+            self.rowspin.Bind(wx.EVT_TEXT_ENTER, self._handler(self.on_spin))   # we want the enter key (see style above)
+            self.colspin.Bind(wx.EVT_SPINCTRL, self._handler(self.on_spin))
+            self.colspin.Bind(wx.EVT_TEXT_ENTER, self._handler(self.on_spin))
         self.editing = True
 
     def on_kill_focus(self, event=None):
@@ -624,14 +724,15 @@ class LayoutSpanProperty(Property):
             self.rowspin.Enable(max_rows!=1)
             self.colspin.Enable(max_cols!=1)
 
-    def write(self, outfile, tabs=0):
-        if _is_gridbag(self.owner.sizer):
-            Property.write(self, outfile, tabs)
+    def snapshot(self):
+        if not _is_gridbag(self.owner.sizer): return None
+        return Property.snapshot(self)
 
 
 class CheckBoxProperty(Property):
     # bool
     CONTROLNAMES = ["checkbox"]
+    checkbox = None
 
     def _set_converter(self, value):
         if isinstance(value, compat.basestring):
@@ -641,6 +742,9 @@ class CheckBoxProperty(Property):
     def _display_value(self):
         self.checkbox.SetValue( bool(self.value) )
 
+    def get_editor_key(self):
+        return (self.__class__, self.name)
+
     def create_editor(self, panel, sizer):
         self.checkbox = wx.CheckBox(panel, -1, '')
         self._display_value()
@@ -654,7 +758,7 @@ class CheckBoxProperty(Property):
         hsizer.AddStretchSpacer(5)
         sizer.Add(hsizer, 0, wx.EXPAND)
         self._set_tooltip(label, self.checkbox)
-        self.checkbox.Bind(wx.EVT_CHECKBOX, self.on_change_val)
+        self.checkbox.Bind(wx.EVT_CHECKBOX, self._handler(self.on_change_val))
         self.editing = True
 
     def update_display(self, start_editing=False):
@@ -682,6 +786,7 @@ class InvCheckBoxProperty(CheckBoxProperty):
 class RadioProperty(Property):
     # choice
     CONTROLNAMES = ["options"]
+    options = None
 
     def __init__(self, value, values, labels=None, columns=1, aliases=None, tooltips=None, default_value=_DefaultArgument,
                  name=None):
@@ -702,6 +807,14 @@ class RadioProperty(Property):
             return self.aliases[self.values.index(self.value)]
         return Property.get_string_value(self)
 
+    def get_editor_key(self):
+        return (self.__class__, self.name, tuple(self.labels), self.columns, tuple(self.tooltips or ()))
+
+    def _refresh_editor(self):
+        for i in range(len(self.labels)):
+            self.options.EnableItem(i, True)
+        Property._refresh_editor(self)
+
     def create_editor(self, panel, sizer):
         label = self._find_label()
         style = wx.RA_SPECIFY_COLS | wx.NO_BORDER | wx.CLIP_CHILDREN
@@ -716,7 +829,7 @@ class RadioProperty(Property):
             self._set_tooltip(self.options)
 
         self.update_display(True)
-        self.options.Bind(wx.EVT_RADIOBOX, self.on_radio)
+        self.options.Bind(wx.EVT_RADIOBOX, self._handler(self.on_radio))
 
     def update_display(self, start_editing=False):
         if start_editing: self.editing = True
@@ -744,13 +857,13 @@ class IntRadioProperty(RadioProperty):
 class _CheckListProperty(Property):
     # common base class for Flags and WidgetStyleFlags; keeps self.value_set as a set of strings
     CONTROLNAMES = ["enabler", "_choices"]
+    _choices = None
     EXCLUDES = None
 
     def __init__(self, value, default_value=_DefaultArgument, name=None, names=None, values=None):
         self._names = names
         self._values = values  # these will sometimes only be calculated on demand, especially for WidgetStyle
         self.value_set = self._decode_value(value)
-        self.enabler = self._choices = None
         Property.__init__(self, None, default_value, name) # with value=None, as this is to be calculated on demand only
 
     def _ensure_values(self):
@@ -760,7 +873,7 @@ class _CheckListProperty(Property):
         if not value:
             return set()
         if isinstance(value, compat.basestring):
-            new_value = set( value.split("|") )
+            new_value = set( compat.intern(name) for name in value.split("|") )
         elif isinstance(value, int):
             new_value = set()
             if value:
@@ -828,10 +941,11 @@ class _CheckListProperty(Property):
                 ret.append(name)
         return '|'.join(ret)
 
-    def write(self, output, tabs=0):
-        value = self.get_string_value()
-        if value:
-            output.extend( common.format_xml_tag(self.name, value, tabs) )
+    def snapshot(self):
+        return self.get_string_value() or None
+
+    def get_editor_key(self):
+        return (self.__class__, self.name, tuple(self._names))
 
     def create_editor(self, panel, sizer):
         self._choices = []
@@ -851,7 +965,7 @@ class _CheckListProperty(Property):
         self.update_display(True)
         for checkbox in self._choices:
             if checkbox is None: continue  # derived classes may not use all options, e.g. obsolete ones
-            checkbox.Bind(wx.EVT_CHECKBOX, self.on_checkbox)
+            checkbox.Bind(wx.EVT_CHECKBOX, self._handler(self.on_checkbox))
 
     def on_checkbox(self, event):
         index = self._choices.index( event.GetEventObject() )
@@ -863,6 +977,7 @@ class _CheckListProperty(Property):
 
     def _change_value(self, value, checked):
         "user has clicked checkbox or History is setting"
+        common.history.property_changing(self)
         if checked:
             if value in self.value_set: return
             self.value_set.add(value)
@@ -1043,16 +1158,12 @@ class ManagedFlags(_CheckListProperty):
         "Return the selected styles joined with '|', for writing to XML file"
         if not self.value_set: return ""
         # handle combinations
-        ret_set = set(self.value_set)
+        ret_set = self.value_set
         #for name, combination in self.combinations.items():
             #if ret_set.intersection(combination) == combination:
                 #ret_set.add(name)
                 #ret_set -= combination
-        ret = []
-        for name in self._names:
-            if name in ret_set:
-                ret.append(name)
-        return '|'.join(ret)
+        return '|'.join([name for name in self._names if name in ret_set])
 
 
 class WidgetStyleProperty(_CheckListProperty):
@@ -1150,13 +1261,11 @@ class WidgetStyleProperty(_CheckListProperty):
         self.update_display(True)
         for checkbox in self._choices:
             if checkbox is not None:
-                checkbox.Bind(wx.EVT_CHECKBOX, self.on_checkbox)
+                checkbox.Bind(wx.EVT_CHECKBOX, self._handler(self.on_checkbox))
 
-    def write(self, output, tabs=0):
-        if isinstance(self.default_value, set) and self.value_set==self.default_value and not self.modified: return
-        value = self.get_string_value()
-        if value:
-            output.extend( common.format_xml_tag(self.name, value, tabs) )
+    def snapshot(self):
+        if isinstance(self.default_value, set) and self.value_set==self.default_value and not self.modified: return None
+        return self.get_string_value() or None
 
 
 import wx.lib.expando
@@ -1181,12 +1290,13 @@ class TextProperty(Property):
     # text
     _HORIZONTAL_LAYOUT = True # label, checkbox, text in the same line; otherwise text will be in the second line
     CONTROLNAMES = ["enabler", "text"]
+    EDITOR_ATTRIBUTES = ["label_ctrl", "additional_controls"]
+    text = additional_controls = None
     validation_re = None # for derived classes
     STRIP = False
     _PROPORTION = 1
     def __init__(self, value="", multiline=False, strip=False, default_value=_DefaultArgument, name=None, fixed_height=False):
         self.multiline = multiline
-        self.text = self.previous_value = None
         self.strip = strip
         self.fixed_height = fixed_height  # don't grow the edit field in vertical
         Property.__init__(self, value, default_value, name)
@@ -1239,6 +1349,10 @@ class TextProperty(Property):
         if value: value = self._unescape(value)
         self.set(value, activate, deactivate, notify)
 
+    def get_editor_key(self):
+        return (self.__class__, self.name, self.deactivated is not None, self.auto_activated, self.readonly,
+                self.multiline, self.fixed_height, self.min_version)
+
     def create_editor(self, panel, sizer):
         "Actually builds the text control to set the value of the property interactively"
 
@@ -1252,7 +1366,7 @@ class TextProperty(Property):
         if self.deactivated is not None and not self.auto_activated:
             self.enabler = wx.CheckBox(panel, -1, '')#, size=(1,-1))
             self.enabler.SetValue(not self.deactivated)
-            self.enabler.Bind( wx.EVT_CHECKBOX, lambda event: self.toggle_active(event.IsChecked()) )
+            self.enabler.Bind( wx.EVT_CHECKBOX, self._handler(self.on_enabler) )
             #hsizer.Add(self.enabler, 0, wx.ALIGN_CENTER_VERTICAL)
             hsizer.Add(self.enabler, 0, wx.ALIGN_CENTER_VERTICAL|wx.LEFT, 3)
         #else:
@@ -1268,7 +1382,7 @@ class TextProperty(Property):
                 self.enabler.Disable()
         elif self.deactivated is not None:
             self.text.Enable(not self.deactivated)
-            panel.Bind( wx.EVT_LEFT_DOWN, self._on_text_click )
+            panel.Bind( wx.EVT_LEFT_DOWN, self._handler(self._on_text_click) )
         # layout of the controls / sizers
         if self._HORIZONTAL_LAYOUT:
             #self.text.SetMaxSize( (-1,200) )
@@ -1302,7 +1416,7 @@ class TextProperty(Property):
         self.editing = True
         
         if hasattr(self, "_on_label_dblclick"):
-            label.Bind(wx.EVT_LEFT_DCLICK, self._on_label_dblclick)
+            label.Bind(wx.EVT_LEFT_DCLICK, self._handler(self._on_label_dblclick))
             label.SetForegroundColour(wx.BLUE)
 
     def _on_text_click(self, event):
@@ -1332,12 +1446,12 @@ class TextProperty(Property):
         else:
             text = wx.TextCtrl( panel, -1, value or "", style=style )
         # bind KILL_FOCUS and Enter for non-multilines
-        text.Bind(wx.EVT_KILL_FOCUS, self.on_kill_focus)
-        text.Bind(wx.EVT_SET_FOCUS, self.on_focus)
+        text.Bind(wx.EVT_KILL_FOCUS, self._handler(self.on_kill_focus))
+        text.Bind(wx.EVT_SET_FOCUS, self._handler(self.on_focus))
         # XXX
-        text.Bind(wx.EVT_CHAR, self.on_char)
+        text.Bind(wx.EVT_CHAR, self._handler(self.on_char))
         if self.validation_re:
-            text.Bind(wx.EVT_TEXT, self._on_text)
+            text.Bind(wx.EVT_TEXT, self._handler(self._on_text))
         return text
 
     def _on_text(self, event):
@@ -1476,6 +1590,10 @@ class ClassProperty(TextProperty):
         self._check(value, text)  # do the check now, not only on changes; to indicated non-unique class names
         return text
 
+    def _refresh_editor(self):
+        TextProperty._refresh_editor(self)
+        self._check(self.value)
+
     def _check_class_uniqueness(self, klass):
         """Check whether the class name is unique, as otherwise the source code would be overwritten.
         Returns string message if not unique, None else."""
@@ -1652,16 +1770,19 @@ class ComboBoxProperty(TextProperty):
         self.choices = choices
         TextProperty.__init__(self, value, False, default_value, name)
 
+    def get_editor_key(self):
+        return TextProperty.get_editor_key(self) + (tuple(self.choices),)
+
     def create_text_ctrl(self, panel, value):
         combo = wx.ComboBox( panel, -1, self.value, choices=self.choices, style=self._CB_STYLE )
         if self.value in self.choices:
             combo.SetStringSelection(self.value)
         else:
             combo.SetSelection(-1)
-        combo.Bind(wx.EVT_COMBOBOX, self.on_combobox)
-        combo.Bind(wx.EVT_KILL_FOCUS, self.on_kill_focus)
-        combo.Bind(wx.EVT_SET_FOCUS, self.on_focus)
-        combo.Bind(wx.EVT_CHAR, self.on_char)
+        combo.Bind(wx.EVT_COMBOBOX, self._handler(self.on_combobox))
+        combo.Bind(wx.EVT_KILL_FOCUS, self._handler(self.on_kill_focus))
+        combo.Bind(wx.EVT_SET_FOCUS, self._handler(self.on_focus))
+        combo.Bind(wx.EVT_CHAR, self._handler(self.on_char))
         return combo
 
     def set_choices(self, choices=None):
@@ -1727,13 +1848,14 @@ class ListBoxPropertyD(ListBoxProperty):
 class DialogProperty(TextProperty):
     # for now, this is only a base class for FileName, Color and FontProperty
     CONTROLNAMES = ["enabler", "text"]#, "button"]
+    EDITOR_ATTRIBUTES = ["label_ctrl", "additional_controls", "button"]
+    dialog = button = None
     def __init__(self, value="", multiline=False, strip=True, default_value=_DefaultArgument, name=None):
         TextProperty.__init__(self, value, multiline, strip, default_value, name)
-        self.dialog = self.button = None
     def create_additional_controls(self, panel, sizer, hsizer):
         # used e.g. by DialogProperty to create the button
         self.button = wx.Button(panel, -1, " ... ", size=(40,-1))
-        self.button.Bind(wx.EVT_BUTTON, self.display_dialog)
+        self.button.Bind(wx.EVT_BUTTON, self._handler(self.display_dialog))
         hsizer.Add(self.button, 0, wx.ALL | wx.ALIGN_CENTER, 3)
         self._update_button()
         return [self.button]
@@ -1935,6 +2057,10 @@ class BitmapProperty(FileNameProperty):
         # show help
         common.main._show_html( config.bmp_manual_file )
 
+    def _refresh_editor(self):
+        FileNameProperty._refresh_editor(self)
+        compat.SetToolTip(self.text, self._find_tooltip())
+
 
 class BitmapPropertyD(BitmapProperty):
     deactivated = True
@@ -2054,16 +2180,19 @@ class FontProperty(DialogProperty):
     font_styles = {'normal': 'wxNORMAL', 'slant': 'wxSLANT', 'italic': 'wxITALIC'}
     font_weights = {'normal': 'wxNORMAL', 'light': 'wxLIGHT', 'bold': 'wxBOLD'}
 
-    def write(self, output, tabs=0):
-        if not self.is_active(): return
+    def snapshot(self):
+        if not self.is_active(): return None
         try:
-            props = [common.encode_to_unicode(s) for s in self.value]
+            props = tuple(common.encode_to_unicode(s) for s in self.value)
         except:
             self._logger.exception(_('Internal Error'))
-            return
+            return None
         if len(props) < 6:
             self._logger.error( _('error in the value of the property "%s"'), self.name )
-            return
+            return None
+        return props
+
+    def write_snapshot(self, output, tabs, props):
         inner_xml =  common.format_xml_tag(u'size',       props[0], tabs+1)
         inner_xml += common.format_xml_tag(u'family',     props[1], tabs+1)
         inner_xml += common.format_xml_tag(u'style',      props[2], tabs+1)
@@ -2124,6 +2253,10 @@ class GridProperty(Property):
     _DEFAULT_VALUES = {STRING:"",  INT:0, FLOAT:0.0, BOOL:False}
 
     CONTROLNAMES = ["btn", "buttons", "grid"]
+    EDITOR_ATTRIBUTES = ["_width_delta"]
+    btn = buttons = grid = None
+    cur_row = cur_col = 0
+    editing_values = None # before pressing Apply; stored here because the editor grid might be deleted
     GROW = True
     _PROPORTION = 5
     validation_res = None # one per column
@@ -2150,9 +2283,6 @@ class GridProperty(Property):
             self.col_sizes = []
         else:
             self.col_sizes = col_sizes
-        self.cur_row = self.cur_col = 0
-        self.editing_values = None # before pressing Apply; stored here because the editor grid might be deleted
-        self.grid = None
 
     def set(self, value, *args, **kwargs):
         Property.set(self, value, *args, **kwargs)
@@ -2177,6 +2307,10 @@ class GridProperty(Property):
                     break
         return ret
 
+    def get_editor_key(self):
+        return (self.__class__, self.name, self.immediate, self.can_add, self.can_insert, self.can_remove,
+                self.with_index, tuple(tuple(col_def) for col_def in self.col_defs), tuple(self.col_sizes))
+
     def create_editor(self, panel, sizer):
         "Actually builds the grid to set the value of the property interactively"
 
@@ -2197,14 +2331,14 @@ class GridProperty(Property):
             if self.can_add:
                 add_btn = wx.Button(panel, wx.ID_ANY, _("  A&dd  "), style=wx.BU_EXACTFIT)
                 compat.SetToolTip(add_btn, "Ctrl-A")
-                add_btn.Bind(wx.EVT_BUTTON, self.add_row)
+                add_btn.Bind(wx.EVT_BUTTON, self._handler(self.add_row))
             if self.can_insert:
                 insert_btn = wx.Button(panel, wx.ID_ANY, _("  &Insert  "), style=wx.BU_EXACTFIT)
-                insert_btn.Bind(wx.EVT_BUTTON, self.insert_row)
+                insert_btn.Bind(wx.EVT_BUTTON, self._handler(self.insert_row))
                 compat.SetToolTip(insert_btn, "Ctrl-I")
             if self.can_remove:
                 remove_btn = wx.Button(panel, wx.ID_ANY, _("  &Remove  "), style=wx.BU_EXACTFIT)
-                remove_btn.Bind(wx.EVT_BUTTON, self.remove_row)
+                remove_btn.Bind(wx.EVT_BUTTON, self._handler(self.remove_row))
                 compat.SetToolTip(remove_btn, "Ctrl-R")
             self.buttons = [add_btn, insert_btn, remove_btn]
             for btn in self.buttons:
@@ -2213,7 +2347,7 @@ class GridProperty(Property):
                 self.buttons.insert(0, apply_btn)
                 reset_btn = wx.Button(panel, wx.ID_ANY, _("  Rese&t  "), style=wx.BU_EXACTFIT)
                 compat.SetToolTip(reset_btn, "Alt-T or Ctrl-T")
-                reset_btn.Bind(wx.EVT_BUTTON, self.reset)
+                reset_btn.Bind(wx.EVT_BUTTON, self._handler(self.reset))
                 btn_sizer.AddStretchSpacer()
                 btn_sizer.Add(reset_btn, 0, extra_flag | wx.LEFT, 16)
                 self.buttons.append(reset_btn)
@@ -2247,19 +2381,19 @@ class GridProperty(Property):
 
         self.update_display(start_editing=True)
 
-        self.grid.Bind(wx.grid.EVT_GRID_SELECT_CELL, self.on_select_cell)
+        self.grid.Bind(wx.grid.EVT_GRID_SELECT_CELL, self._handler(self.on_select_cell))
         if self.buttons and not self.immediate:
-            apply_btn.Bind(wx.EVT_BUTTON, self.apply)
+            apply_btn.Bind(wx.EVT_BUTTON, self._handler(self.apply))
         if compat.IS_CLASSIC:
-            self.grid.Bind(wx.grid.EVT_GRID_CMD_CELL_CHANGE, self.on_cell_changed)
+            self.grid.Bind(wx.grid.EVT_GRID_CMD_CELL_CHANGE, self._handler(self.on_cell_changed))
         else:
-            self.grid.Bind(wx.grid.EVT_GRID_CELL_CHANGED, self.on_cell_changed)
-            self.grid.Bind(wx.grid.EVT_GRID_CELL_CHANGING, self.on_cell_changing)  # for validation
-        self.grid.Bind(wx.EVT_SET_FOCUS, self.on_focus)
+            self.grid.Bind(wx.grid.EVT_GRID_CELL_CHANGED, self._handler(self.on_cell_changed))
+            self.grid.Bind(wx.grid.EVT_GRID_CELL_CHANGING, self._handler(self.on_cell_changing))  # for validation
+        self.grid.Bind(wx.EVT_SET_FOCUS, self._handler(self.on_focus))
 
         self._set_tooltip(self.grid.GetGridWindow(), *self.buttons)
 
-        self.grid.Bind(wx.EVT_SIZE, self.on_size)
+        self.grid.Bind(wx.EVT_SIZE, self._handler(self.on_size))
         # On wx 2.8 the EVT_CHAR_HOOK handler for the control does not get called, so on_char will be called from main
         #self.grid.Bind(wx.EVT_CHAR_HOOK, self.on_char)
         self._width_delta = None
@@ -2804,21 +2938,23 @@ class ExtraPropertiesProperty(GridProperty):
         value = []
         GridProperty.__init__(self, value, cols, immediate=True)
 
-    def write(self, output, tabs):
-        if not self.value: return
+    def snapshot(self):
+        if not self.value: return None
+        # tuples (name, value)
+        rows = tuple( (row[0], row[1].strip()) for row in self.value if row is not None and row[1] )
+        return rows or None
+
+    def write_snapshot(self, output, tabs, rows):
         inner_xml = []
-        for row in self.value:
-            if row is None: continue
-            name, value = row
-            if value:
-                inner_xml += common.format_xml_tag( u'property', value.strip(), tabs+1, name=name )
-        if inner_xml:
-            output.extend( common.format_xml_tag( u'extraproperties', inner_xml, tabs, is_xml=True ) )
+        for name, value in rows:
+            inner_xml += common.format_xml_tag( u'property', value, tabs+1, name=name )
+        output.extend( common.format_xml_tag( u'extraproperties', inner_xml, tabs, is_xml=True ) )
 
 
 class ActionButtonProperty(Property):
     # just a button to start an action
     CONTROLNAMES = ["button"]
+    button = None
     background_color = None
     HAS_DATA = False # to be ignored by owner.get_properties()
     def __init__(self, callback):
@@ -2829,13 +2965,22 @@ class ActionButtonProperty(Property):
     def get(self):
         return self
 
+    def get_editor_key(self):
+        return (self.__class__, self.name)
+
+    def _refresh_editor(self):
+        if self.label is None: self.label = self._find_label()
+        self.button.SetLabel(self.label)
+        self.button.SetBackgroundColour(self.background_color or wx.NullColour)
+        Property._refresh_editor(self)
+
     def create_editor(self, panel, sizer):
         if self.label is None: self.label = self._find_label()
         self.button = wx.Button( panel, -1, self.label )
         sizer.Add(self.button, 0, wx.EXPAND|wx.TOP|wx.LEFT|wx.RIGHT, 4)
         tooltip = self._find_tooltip()
         if tooltip: compat.SetToolTip(self.button, tooltip)
-        self.button.Bind(wx.EVT_BUTTON, self.on_button)
+        self.button.Bind(wx.EVT_BUTTON, self._handler(self.on_button))
         self.editing = True
         if self.background_color is not None:
             self.button.SetBackgroundColour(self.background_color)
@@ -2854,8 +2999,8 @@ class ActionButtonProperty(Property):
     def __call__(self, *args, **kwargs):
         self.callback(*args, **kwargs)
 
-    def write(self, output, tabs=0):
-        return
+    def snapshot(self):
+        return None
 
 
 ########################################################################################################################
@@ -187,6 +187,9 @@ def _process_widget_config(module):
             config_dict
     except KeyError:
         pass
+    else:
+        import gui_mixins
+        gui_mixins.invalidate_style_cache()
 
     return True
 
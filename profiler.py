@@ -0,0 +1,182 @@
+"""
+Opt-in instrumentation of the code generation: wall time and number of calls per stage and the number of bytes
+written per file; optionally the whole run is profiled with cProfile.
+
+The stages are measured only if enabled; nested stages are included in the time of the enclosing stage, e.g. the
+time of 'add_object' is part of the time of '_generate_code:<toplevel>'.
+
+Stage names:
+  parse, _generate_code:<toplevel>, add_class, add_object, get_code:<widget base class>, finalize, save_file
+
+@license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
+"""
+
+import json, logging
+from timeit import default_timer
+
+
+enabled = False  # set by enable(); the instrumentation is a no-op otherwise
+_stages = {}     # stage name -> [calls, time]
+_files = {}      # file name -> [bytes, written]
+
+
+class _Stage(object):
+    "Context manager to measure a single call of a stage"
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = default_timer()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = default_timer() - self.start
+        entry = _stages.get(self.name)
+        if entry is None:
+            _stages[self.name] = [1, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+
+
+class _NoStage(object):
+    "Context manager for disabled instrumentation"
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+_no_stage = _NoStage()
+
+
+def stage(name, detail=None):
+    "Return a context manager measuring the stage; the detail, e.g. a class name, is appended to the name"
+    if not enabled:
+        return _no_stage
+    if detail is not None:
+        name = "%s:%s" % (name, detail)
+    return _Stage(name)
+
+
+def add_file(filename, size, written):
+    "Record a generated file; written is False if the file was not modified"
+    if not enabled: return
+    entry = _files.setdefault(filename, [0, False])
+    entry[0] = size
+    entry[1] = entry[1] or written
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    _stages.clear()
+    _files.clear()
+
+
+def get_statistics():
+    "Return the collected data as dict; see merge()"
+    return {"stages": dict( (name, {"calls": calls, "time": duration})
+                            for name, (calls, duration) in _stages.items() ),
+            "files": dict( (filename, {"bytes": size, "written": written})
+                           for filename, (size, written) in _files.items() )}
+
+
+def pop_statistics():
+    "Return the collected data and reset; used to transfer the data from worker processes"
+    ret = get_statistics()
+    reset()
+    return ret
+
+
+def merge(statistics):
+    "Add the data returned by get_statistics() of e.g. another process"
+    for name, entry in statistics["stages"].items():
+        current = _stages.setdefault(name, [0, 0.0])
+        current[0] += entry["calls"]
+        current[1] += entry["time"]
+    for filename, entry in statistics["files"].items():
+        current = _files.setdefault(filename, [0, False])
+        current[0] = entry["bytes"]
+        current[1] = current[1] or entry["written"]
+
+
+def get_report(total_time=None):
+    "Return a report as dict, with the stages sorted by time"
+    stages = sorted(_stages.items(), key=lambda item: item[1][1], reverse=True)
+    return {"total_time": total_time,
+            "stages": [{"name": name, "calls": calls, "time": duration} for name, (calls, duration) in stages],
+            "files": [{"name": filename, "bytes": size, "written": written}
+                      for filename, (size, written) in sorted(_files.items())],
+            "bytes_generated": sum(size for size, written in _files.values()),
+            "bytes_written": sum(size for size, written in _files.values() if written)}
+
+
+def write_report(filename, total_time=None):
+    "Write the report as JSON file"
+    with open(filename, "w") as outfile:
+        json.dump(get_report(total_time), outfile, indent=1, sort_keys=True)
+
+
+def log_report(total_time=None, count=15):
+    "Log the most expensive stages and the number of bytes"
+    report = get_report(total_time)
+    logging.info( _("Code generation statistics:") )
+    for entry in report["stages"][:count]:
+        logging.info( "  %8.3fs  %7d  %s", entry["time"], entry["calls"], entry["name"] )
+    logging.info( _("%d files, %d bytes generated, %d bytes written"),
+                  len(report["files"]), report["bytes_generated"], report["bytes_written"] )
+
+
+class Session(object):
+    """Context manager to collect statistics and/or to run cProfile; the results are written on exit.
+
+    stats_filename:   JSON file for the report of get_report()
+    profile_filename: file for the cProfile data, e.g. to be read by pstats or snakeviz"""
+
+    def __init__(self, stats_filename=None, profile_filename=None):
+        self.stats_filename = stats_filename
+        self.profile_filename = profile_filename
+        self._profile = None
+        self._start = None
+
+    def __enter__(self):
+        if self.stats_filename:
+            reset()
+            enable()
+        if self.profile_filename:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        total_time = default_timer() - self._start
+        if self._profile is not None:
+            self._profile.disable()
+            try:
+                self._profile.dump_stats(self.profile_filename)
+                logging.info( _('Profile data written to "%s"'), self.profile_filename )
+            except EnvironmentError as inst:
+                logging.error( _('Can not write profile data to "%s": %s'), self.profile_filename, inst )
+            self._profile = None
+        if self.stats_filename:
+            disable()
+            log_report(total_time)
+            try:
+                write_report(self.stats_filename, total_time)
+                logging.info( _('Code generation statistics written to "%s"'), self.stats_filename )
+            except EnvironmentError as inst:
+                logging.error( _('Can not write code generation statistics to "%s": %s'), self.stats_filename, inst )
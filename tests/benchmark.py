@@ -0,0 +1,258 @@
+"""
+Benchmark for loading designs, generating code and saving designs.
+
+The test case files and synthetic designs are loaded, code is generated for each language and the design is saved
+again. The synthetic designs are created by SyntheticDesign from synthetic_design.py with the given number of widgets.
+The best time of several runs is recorded per design, stage and language:
+  load:     parse the .wxg file and build the tree
+  generate: code generation, without load and write
+  write:    writing the generated files
+  save:     writing the design as .wxg file
+
+The results are appended to a history file with one JSON document per line; by default it's stored in wxGlade's
+application data directory. Each run is compared to the last one with the same Python version and platform;
+with --check the exit code is 1 if a stage got slower than the threshold.
+
+Usage: python tests/benchmark.py [OPTIONS] [WXG_FILES]
+
+@license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
+"""
+
+import os, sys
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(1, os.path.dirname(TESTS_PATH))
+
+import datetime, json, logging, optparse, platform, shutil, subprocess, tempfile
+import xml.etree.ElementTree as ElementTree
+from timeit import default_timer
+
+import gettext
+t = gettext.translation(domain="wxglade", localedir="locale", fallback=True)
+t.install("wxglade")
+
+import common
+common.init_paths()
+import config, wxglade, profiler
+from synthetic_design import SyntheticDesign
+
+
+CASE_DIRECTORY = os.path.join(TESTS_PATH, 'casefiles')
+
+# representative designs from the test case files
+CASE_FILES = ['AllWidgets_28.wxg', 'AllWidgets_30.wxg', 'SizersSizeTests.wxg', 'CPPOgg1.wxg', 'CPPOgg2.wxg',
+              'PyOgg2.wxg', 'Bugs_2018-01-16.wxg']
+SYNTHETIC_SIZES = [1000, 10000, 50000]
+LANGUAGES = ['C++', 'XRC', 'lisp', 'perl', 'python']
+EXTENSIONS = {'C++': '.cpp', 'XRC': '.xrc', 'lisp': '.lisp', 'perl': '.pl', 'python': '.py'}
+
+# kept in the application data directory, i.e. outside of the source tree
+HISTORY_FILE = os.path.join(config.appdata_path, 'benchmark_history.jsonl')
+THRESHOLD = 0.15      # relative slow down that is reported as regression
+MIN_DIFFERENCE = 0.005  # differences below this number of seconds are noise
+
+
+# measurements #########################################################################################################
+
+def count_widgets(elem):
+    "Number of widgets and sizers in the XML element; sizer items and slots are not counted"
+    return sum(1 for e in elem.iter('object') if 'base' in e.attrib)
+
+
+def _is_multiple_files(filename):
+    for event, elem in ElementTree.iterparse(filename, ('start',)):
+        return elem.get('option') == '1'
+
+
+def benchmark_design(name, filename, languages, repeat, out_dir):
+    "Generate code and save the design; returns a list of results and a list of errors"
+    import xml_parse
+    with open(filename, 'rb') as infile:
+        widgets = count_widgets(ElementTree.parse(infile).getroot())
+    multiple_files = _is_multiple_files(filename)
+    best = {}   # (stage, language) -> time
+    errors = []
+
+    def record(stage, language, duration):
+        key = (stage, language)
+        if key not in best or duration < best[key]:
+            best[key] = duration
+
+    for language in languages:
+        if language == 'XRC' and multiple_files:
+            continue  # not supported
+        for i in range(repeat):
+            # always write to a new directory, as unchanged files would not be written again
+            target = os.path.join(out_dir, '%s_%s_%d' % (name, language, i))
+            os.makedirs(target)
+            if not multiple_files:
+                target = os.path.join(target, os.path.splitext(name)[0] + EXTENSIONS[language])
+            profiler.reset()
+            profiler.enable()
+            start = default_timer()
+            try:
+                xml_parse.CodeWriter( common.code_writers[language], filename, out_path=target )
+            except Exception as inst:
+                errors.append( (name, language, repr(inst)) )
+                break
+            finally:
+                total = default_timer() - start
+                profiler.disable()
+            stages = profiler.get_statistics()["stages"]
+            load = stages.get("parse", {}).get("time", 0.0)
+            write = stages.get("save_file", {}).get("time", 0.0)
+            record('load', None, load)
+            record('generate', language, total - load - write)
+            record('write', language, write)
+
+        if ('save', None) not in best and ('load', None) in best:
+            # save the design that has just been loaded
+            for i in range(repeat):
+                wxg_filename = os.path.join(out_dir, '%s_%d.wxg' % (name, i))
+                start = default_timer()
+                with common.XmlWriter(wxg_filename) as outfile:
+                    common.app_tree.write(outfile)
+                record('save', None, default_timer() - start)
+    profiler.reset()
+
+    results = [{"design": name, "widgets": widgets, "stage": stage, "language": language, "time": duration}
+               for (stage, language), duration in sorted(best.items(), key=lambda item: (item[0][0], item[0][1] or ''))]
+    return results, errors
+
+
+def get_revision():
+    "Return the git revision of the source tree or None"
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=devnull,
+                                             cwd=os.path.dirname(TESTS_PATH))
+        return output.decode('ascii').strip()
+    except (EnvironmentError, subprocess.CalledProcessError):
+        return None
+
+
+# history ##############################################################################################################
+
+def read_history(filename):
+    "Return the list of entries of the history file"
+    if not os.path.isfile(filename):
+        return []
+    with open(filename) as infile:
+        return [json.loads(line) for line in infile if line.strip()]
+
+
+def append_history(filename, entry):
+    with open(filename, 'a') as outfile:
+        outfile.write(json.dumps(entry, sort_keys=True))
+        outfile.write('\n')
+
+
+def find_previous(history, entry):
+    "Return the last entry that was recorded in the same environment"
+    for previous in reversed(history):
+        if previous.get("python") == entry["python"] and previous.get("platform") == entry["platform"]:
+            return previous
+    return None
+
+
+def compare(previous, entry, threshold=THRESHOLD):
+    "Returns a list of tuples (result, previous time) for results that are slower by more than the threshold"
+    old_times = dict( ((r["design"], r["stage"], r["language"]), r["time"]) for r in previous["results"] )
+    regressions = []
+    for result in entry["results"]:
+        old = old_times.get( (result["design"], result["stage"], result["language"]) )
+        if old is None: continue
+        if result["time"] > old * (1.0 + threshold) and result["time"] - old > MIN_DIFFERENCE:
+            regressions.append( (result, old) )
+    return regressions
+
+
+# main #################################################################################################################
+
+def parse_command_line():
+    parser = optparse.OptionParser( usage="python tests/benchmark.py [OPTIONS] [WXG_FILES]" )
+    parser.add_option("-l", "--language", dest="languages", action="append", metavar="LANG",
+                      help="language to generate code for; may be given multiple times; default: all")
+    parser.add_option("-s", "--sizes", dest="sizes", metavar="N,N,...",
+                      default=",".join(str(size) for size in SYNTHETIC_SIZES),
+                      help="number of widgets of the synthetic designs; empty for none; default: %default")
+    parser.add_option("-r", "--repeat", dest="repeat", type="int", default=3,
+                      help="number of runs per measurement; the best time is recorded; default: %default")
+    parser.add_option("--history", dest="history", metavar="FILE", default=HISTORY_FILE,
+                      help="history file; default: %default")
+    parser.add_option("--no-history", dest="history", action="store_const", const=None,
+                      help="don't read or write the history")
+    parser.add_option("--threshold", dest="threshold", type="float", default=THRESHOLD,
+                      help="relative slow down to report as regression; default: %default")
+    parser.add_option("--check", dest="check", action="store_true", default=False,
+                      help="exit with code 1 if a regression was detected")
+    parser.add_option("--keep", dest="keep", action="store_true", default=False,
+                      help="don't delete the generated files")
+    options, args = parser.parse_args()
+    options.sizes = [int(size) for size in options.sizes.split(",") if size.strip()]
+    options.languages = options.languages or LANGUAGES
+    return options, args
+
+
+def main():
+    options, args = parse_command_line()
+
+    logging.disable(logging.WARNING)
+    wxglade.init_stage1()
+    wxglade.init_stage2(False)
+
+    designs = []  # (name, filename)
+    if args:
+        designs += [(os.path.basename(filename), os.path.abspath(filename)) for filename in args]
+    else:
+        designs += [(name, os.path.join(CASE_DIRECTORY, name)) for name in CASE_FILES]
+
+    out_dir = tempfile.mkdtemp(prefix='wxglade_benchmark_')
+    entry = {"date": datetime.datetime.now().isoformat(), "revision": get_revision(), "version": config.version,
+             "python": platform.python_version(), "platform": platform.platform(), "repeat": options.repeat,
+             "results": []}
+    errors = []
+    try:
+        for size in options.sizes:
+            name = 'synthetic_%d.wxg' % size
+            filename = os.path.join(out_dir, name)
+            design = SyntheticDesign()
+            design.set_size(size)
+            design.save(filename)
+            designs.append( (name, filename) )
+
+        for name, filename in designs:
+            results, design_errors = benchmark_design(name, filename, options.languages, options.repeat, out_dir)
+            for result in results:
+                print( "%-28s %7d  %-8s  %-6s  %9.4fs" % ( result["design"], result["widgets"], result["stage"],
+                                                         result["language"] or '', result["time"] ) )
+            entry["results"] += results
+            errors += design_errors
+    finally:
+        if options.keep:
+            print( "Generated files: %s" % out_dir )
+        else:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    # errors are reported, but don't fail the benchmark; the test suite is responsible for them
+    for name, language, error in errors:
+        print( "Failed: %s %s: %s" % (name, language, error) )
+
+    regressions = []
+    if options.history:
+        previous = find_previous(read_history(options.history), entry)
+        if previous is not None:
+            regressions = compare(previous, entry, options.threshold)
+            print( "Compared with %s (revision %s):" % (previous["date"], previous.get("revision")) )
+            for result, old in regressions:
+                print( "  slower: %s %s %s: %.4fs -> %.4fs" % ( result["design"], result["stage"],
+                                                               result["language"] or '', old, result["time"] ) )
+            if not regressions:
+                print( "  no regressions" )
+        append_history(options.history, entry)
+
+    if options.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Generator for synthetic designs of configurable size and shape, e.g. to profile loading, code generation and the
+widget tree with large projects.
+
+The .wxg files have the same structure as the files written by Tree.write() / Node.write():
+  toplevel (frames and dialogs alternate)
+    menu bar, status bar and tool bar (frames only)
+    sizer
+      notebook with pages (optional)
+        panel
+          nested box sizers with alternating orientation
+            grid sizers with controls
+
+Usage: python tests/synthetic_design.py [OPTIONS] WXG_FILE
+
+@license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
+"""
+
+import os, sys
+if __name__ == "__main__":
+    sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import gettext
+    gettext.translation(domain="wxglade", localedir="locale", fallback=True).install("wxglade")
+
+import optparse, time
+
+import common, config
+from common import format_xml_tag, format_xml_open_tag, format_xml_close_tag
+
+
+# class, base, name prefix, label for the controls in the grid sizers; the label is None if the control has none
+CONTROLS = [("wxStaticText", "EditStaticText", "label",     "Label %d"),
+            ("wxTextCtrl",   "EditTextCtrl",   "text_ctrl", None),
+            ("wxButton",     "EditButton",     "button",    "Button %d"),
+            ("wxCheckBox",   "EditCheckBox",   "checkbox",  "Check %d")]
+
+
+class SyntheticDesign(object):
+    """Writes a design with the given shape; all arguments are available as attributes:
+
+    toplevels:   number of toplevel windows; frames and dialogs alternate, starting with a frame
+    depth:       nesting depth of the box sizers above the grid sizers; 0 for grid sizers only
+    branches:    number of items of each box sizer
+    pages:       number of notebook pages per toplevel; 0 for no notebook
+    menus:       number of menus per frame; 0 for no menu bar
+    menu_items:  number of items per menu; each item has an event handler
+    tools:       number of tools per frame; 0 for no tool bar
+    rows, cols:  dimensions of the grid sizers, which are filled with controls"""
+
+    def __init__(self, toplevels=1, depth=2, branches=2, pages=2, menus=3, menu_items=5, tools=5, rows=3, cols=2,
+                 language="python", for_version="3.0"):
+        self.toplevels = toplevels
+        self.depth = depth
+        self.branches = branches
+        self.pages = pages
+        self.menus = menus
+        self.menu_items = menu_items
+        self.tools = tools
+        self.rows = rows
+        self.cols = cols
+        self.language = language
+        self.for_version = for_version
+        self._counters = {}  # name prefix -> last used number
+
+    # statistics #######################################################################################################
+    def count_widgets(self):
+        "Number of widgets and sizers, i.e. of objects with a base class; sizer items and slots are not counted"
+        frames = (self.toplevels + 1) // 2
+        dialogs = self.toplevels // 2
+        toplevel = 1 + self._count_body()
+        bars = (self.menus > 0) + (self.tools > 0) + 1  # the frames have a status bar always
+        return frames * (toplevel + bars) + dialogs * toplevel
+
+    def _count_sizer(self, depth):
+        if depth == 0:
+            return 1 + self.rows * self.cols
+        return 1 + self.branches * self._count_sizer(depth - 1)
+
+    def _count_body(self):
+        if not self.pages:
+            return self._count_sizer(self.depth)
+        # sizer, notebook and the panels with their sizers
+        return 2 + self.pages * (1 + self._count_sizer(self.depth))
+
+    def set_size(self, widgets):
+        "Set the number of toplevels to get at least the given number of widgets; returns the number of widgets"
+        self.toplevels = 1
+        per_frame = self.count_widgets()
+        self.toplevels = 2
+        per_pair = self.count_widgets()
+        self.toplevels = 2 * (widgets // per_pair)
+        remaining = widgets - self.toplevels // 2 * per_pair
+        if remaining > per_frame:
+            self.toplevels += 2
+        elif remaining > 0:
+            self.toplevels += 1
+        self.toplevels = max(1, self.toplevels)
+        return self.count_widgets()
+
+    # output ###########################################################################################################
+    def _get_name(self, prefix):
+        number = self._counters.get(prefix, 0) + 1
+        self._counters[prefix] = number
+        return "%s_%d" % (prefix, number)
+
+    def save(self, filename):
+        "Write the design to a .wxg file; returns the number of widgets"
+        with common.XmlWriter(filename) as outfile:
+            self.write(outfile)
+        return self.count_widgets()
+
+    def write(self, output):
+        """Write the design to the given output, which is a list or a file like object with append and extend methods,
+        e.g. common.XmlWriter"""
+        self._counters.clear()
+        timestring = time.asctime()  if not config.testing else  'XXX XXX NN NN:NN:NN NNNN'
+        output.append( u'<?xml version="1.0"?>\n'
+                       u'<!-- generated by wxGlade %s on %s -->\n\n' % (config.version, timestring) )
+        extension = {"python": ".py", "perl": ".pl", "lisp": ".lisp", "XRC": ".xrc"}.get(self.language, "")
+        attrs = {"name": "SyntheticApp", "class": "SyntheticApp", "language": self.language, "top_window": "frame_1",
+                 "encoding": "UTF-8", "use_gettext": 1, "overwrite": 1, "mark_blocks": 1,
+                 "for_version": self.for_version, "is_template": 0, "indent_amount": 4, "option": 0,
+                 "indent_symbol": "space", "path": "synthetic" + extension, "use_new_namespace": 1,
+                 "source_extension": ".cpp", "header_extension": ".h"}
+        output.append( format_xml_open_tag(u'application', 0, **attrs) )
+        for index in range(self.toplevels):
+            if index % 2 == 0:
+                self._write_frame(output, 1)
+            else:
+                self._write_dialog(output, 1)
+        output.append( format_xml_close_tag(u'application', 0) )
+
+    def _write_object(self, output, tabs, klass, name, base):
+        # the attributes in the same order as Node.write()
+        output.append( u'%s<object %s %s %s>\n' % ( u'    ' * tabs, common.format_xml_attrs(**{'class': klass}),
+                                                    common.format_xml_attrs(name=name),
+                                                    common.format_xml_attrs(base=base) ) )
+
+    def _write_frame(self, output, tabs):
+        name = self._get_name("frame")
+        self._write_object(output, tabs, "Synthetic" + name.capitalize(), name, "EditFrame")
+        output.extend( format_xml_tag(u'title', name, tabs+1) )
+        output.extend( format_xml_tag(u'style', u'wxDEFAULT_FRAME_STYLE', tabs+1) )
+        if self.menus:
+            output.extend( format_xml_tag(u'menubar', 1, tabs+1) )
+        if self.tools:
+            output.extend( format_xml_tag(u'toolbar', 1, tabs+1) )
+        output.extend( format_xml_tag(u'statusbar', 1, tabs+1) )
+        if self.menus:
+            self._write_menubar(output, tabs+1, name + "_menubar")
+        self._write_statusbar(output, tabs+1, name + "_statusbar")
+        if self.tools:
+            self._write_toolbar(output, tabs+1, name + "_toolbar")
+        self._write_body(output, tabs+1)
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_dialog(self, output, tabs):
+        name = self._get_name("dialog")
+        self._write_object(output, tabs, "Synthetic" + name.capitalize(), name, "EditDialog")
+        output.extend( format_xml_tag(u'title', name, tabs+1) )
+        output.extend( format_xml_tag(u'style', u'wxDEFAULT_DIALOG_STYLE', tabs+1) )
+        self._write_body(output, tabs+1)
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_menubar(self, output, tabs, name):
+        self._write_object(output, tabs, "wxMenuBar", name, "EditMenuBar")
+        menus = []
+        for m in range(self.menus):
+            items = []
+            for i in range(self.menu_items):
+                item = self._get_name("menu_item")
+                inner_xml = format_xml_tag(u'label', u'Item %d' % (i+1), tabs+4)
+                inner_xml += format_xml_tag(u'name', item, tabs+4)
+                inner_xml += format_xml_tag(u'help_str', u'Help for %s' % item, tabs+4)
+                inner_xml += format_xml_tag(u'handler', u'on_%s' % item, tabs+4)
+                items += format_xml_tag(u'item', inner_xml, tabs+3, is_xml=True)
+            menus += format_xml_tag(u'menu', items, tabs+2, is_xml=True, name="", label=u'Menu %d' % (m+1))
+        output.extend( format_xml_tag(u'menus', menus, tabs+1, is_xml=True) )
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_statusbar(self, output, tabs, name):
+        self._write_object(output, tabs, "wxStatusBar", name, "EditStatusBar")
+        fields = format_xml_tag(u'field', name, tabs+2, width=-1)
+        output.extend( format_xml_tag(u'fields', fields, tabs+1, is_xml=True) )
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_toolbar(self, output, tabs, name):
+        self._write_object(output, tabs, "wxToolBar", name, "EditToolBar")
+        tools = []
+        for t in range(self.tools):
+            inner_xml = format_xml_tag(u'id', u'wxID_ANY', tabs+3)
+            inner_xml += format_xml_tag(u'label', u'Tool %d' % (t+1), tabs+3)
+            inner_xml += format_xml_tag(u'type', 0, tabs+3)
+            inner_xml += format_xml_tag(u'short_help', u'Tool %d' % (t+1), tabs+3)
+            inner_xml += format_xml_tag(u'long_help', u'', tabs+3)
+            inner_xml += format_xml_tag(u'bitmap1', u'art:wxART_NEW,wxART_TOOLBAR,16,16', tabs+3)
+            inner_xml += format_xml_tag(u'bitmap2', u'', tabs+3)
+            tools += format_xml_tag(u'tool', inner_xml, tabs+2, is_xml=True)
+        output.extend( format_xml_tag(u'tools', tools, tabs+1, is_xml=True) )
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_sizeritem(self, output, tabs, proportion, border, flag):
+        output.append( format_xml_open_tag(u'object', tabs, **{'class': 'sizeritem'}) )
+        output.extend( format_xml_tag(u'option', proportion, tabs+1) )
+        output.extend( format_xml_tag(u'border', border, tabs+1) )
+        output.extend( format_xml_tag(u'flag', flag, tabs+1) )
+
+    def _write_body(self, output, tabs):
+        "The sizer of a toplevel window"
+        if not self.pages:
+            self._write_sizer(output, tabs, self.depth)
+            return
+        self._write_object(output, tabs, "wxBoxSizer", self._get_name("sizer"), "EditBoxSizer")
+        output.extend( format_xml_tag(u'orient', u'wxVERTICAL', tabs+1) )
+        self._write_sizeritem(output, tabs+1, 1, 0, u'wxEXPAND')
+        self._write_notebook(output, tabs+2)
+        output.append( format_xml_close_tag(u'object', tabs+1) )
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_notebook(self, output, tabs):
+        self._write_object(output, tabs, "wxNotebook", self._get_name("notebook"), "EditNotebook")
+        panels = [self._get_name("notebook_pane") for p in range(self.pages)]
+        inner_xml = []
+        for p, panel in enumerate(panels):
+            inner_xml += format_xml_tag(u'tab', u'Page %d' % (p+1), tabs+2, window=panel)
+        output.extend( format_xml_tag(u'tabs', inner_xml, tabs+1, is_xml=True) )
+        for panel in panels:
+            self._write_object(output, tabs+1, "wxPanel", panel, "EditPanel")
+            self._write_sizer(output, tabs+2, self.depth)
+            output.append( format_xml_close_tag(u'object', tabs+1) )
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_sizer(self, output, tabs, depth):
+        "Nested box sizers, alternating between vertical and horizontal, with grid sizers at the innermost level"
+        if depth == 0:
+            self._write_grid_sizer(output, tabs)
+            return
+        self._write_object(output, tabs, "wxBoxSizer", self._get_name("sizer"), "EditBoxSizer")
+        output.extend( format_xml_tag(u'orient', u'wxHORIZONTAL' if depth % 2 else u'wxVERTICAL', tabs+1) )
+        for b in range(self.branches):
+            self._write_sizeritem(output, tabs+1, 1, 0, u'wxEXPAND')
+            self._write_sizer(output, tabs+2, depth-1)
+            output.append( format_xml_close_tag(u'object', tabs+1) )
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+    def _write_grid_sizer(self, output, tabs):
+        self._write_object(output, tabs, "wxGridSizer", self._get_name("grid_sizer"), "EditGridSizer")
+        output.extend( format_xml_tag(u'rows', self.rows, tabs+1) )
+        output.extend( format_xml_tag(u'cols', self.cols, tabs+1) )
+        output.extend( format_xml_tag(u'vgap', 0, tabs+1) )
+        output.extend( format_xml_tag(u'hgap', 0, tabs+1) )
+        for i in range(self.rows * self.cols):
+            klass, base, prefix, label = CONTROLS[i % len(CONTROLS)]
+            name = self._get_name(prefix)
+            self._write_sizeritem(output, tabs+1, 0, 5, u'wxALL|wxEXPAND')
+            self._write_object(output, tabs+2, klass, name, base)
+            if label is not None:
+                output.extend( format_xml_tag(u'label', label % self._counters[prefix], tabs+3) )
+            output.append( format_xml_close_tag(u'object', tabs+2) )
+            output.append( format_xml_close_tag(u'object', tabs+1) )
+        output.append( format_xml_close_tag(u'object', tabs) )
+
+
+def parse_command_line():
+    parser = optparse.OptionParser( usage="python tests/synthetic_design.py [OPTIONS] WXG_FILE" )
+    design = SyntheticDesign()
+    for option, dest, help_text in [("-t", "toplevels", "number of toplevel windows"),
+                                    ("-d", "depth", "nesting depth of the box sizers"),
+                                    ("-b", "branches", "number of items per box sizer"),
+                                    ("-p", "pages", "number of notebook pages; 0 for no notebook"),
+                                    ("-m", "menus", "number of menus per frame"),
+                                    (None, "menu_items", "number of items per menu"),
+                                    (None, "tools", "number of tools per frame"),
+                                    (None, "rows", "number of rows of the grid sizers"),
+                                    (None, "cols", "number of columns of the grid sizers")]:
+        names = ["--" + dest.replace("_", "-")]
+        if option: names.insert(0, option)
+        parser.add_option(*names, dest=dest, type="int", default=getattr(design, dest),
+                          help=help_text + "; default: %default")
+    parser.add_option("-w", "--widgets", dest="widgets", type="int", metavar="N",
+                      help="set the number of toplevels to get at least N widgets")
+    parser.add_option("-l", "--language", dest="language", default=design.language,
+                      help="output language of the design; default: %default")
+    options, args = parser.parse_args()
+    if len(args) != 1:
+        parser.error("exactly one output file is required")
+    return options, args[0]
+
+
+def main():
+    options, filename = parse_command_line()
+    common.init_paths()
+    design = SyntheticDesign(options.toplevels, options.depth, options.branches, options.pages, options.menus,
+                             options.menu_items, options.tools, options.rows, options.cols, options.language)
+    if options.widgets:
+        design.set_size(options.widgets)
+    widgets = design.save(filename)
+    print( "%s: %d toplevels, %d widgets" % (filename, design.toplevels, widgets) )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ Code genera Commandline / non-graphical tests
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import os
+import glob, os
 import unittest
 
 from testsupport_new import WXGladeCLITest
@@ -765,6 +765,84 @@ class TestCodeGen(WXGladeCLITest):
                 )
             )
 
+    def test_cn_f_cache(self):
+        "Test that the results of cn_f() are cached per language, wx version and set of flags"
+        import gui_mixins
+        gui_mixins.invalidate_style_cache()
+        handler = common.code_writers['C++'].obj_builders['wxStaticText']
+        common.code_writers['C++'].for_version = (2, 8)
+        self.assertEqual( handler.cn_f('wxALL|wxST_ELLIPSIZE_MIDDLE'), 'wxALL' )
+        self.assertEqual( handler.cn_f('wxST_ELLIPSIZE_MIDDLE|wxALL|wxALL'), 'wxALL' )
+        self.assertEqual( len(gui_mixins._cn_f_cache), 1 )
+        common.code_writers['C++'].for_version = (3, 0)
+        self.assertEqual( handler.cn_f('wxALL|wxST_ELLIPSIZE_MIDDLE'), 'wxALL|wxST_ELLIPSIZE_MIDDLE' )
+        python_handler = common.code_writers['python'].obj_builders['wxStaticText']
+        common.code_writers['python'].for_version = (3, 0)
+        self.assertEqual( python_handler.cn_f('wxALL|wxST_ELLIPSIZE_MIDDLE'), 'wx.ALL | wx.ST_ELLIPSIZE_MIDDLE' )
+        self.assertEqual( len(gui_mixins._cn_f_cache), 3 )
+
+        gui_mixins.invalidate_style_cache()
+        self.assertFalse( gui_mixins._cn_f_cache )
+        self.assertEqual( handler.cn_f('wxALL|wxST_ELLIPSIZE_MIDDLE'), 'wxALL|wxST_ELLIPSIZE_MIDDLE' )
+
+    def test_memoize(self):
+        "Test the result cache of decorators.memoize() with LRU eviction, statistics and unhashable arguments"
+        import decorators
+        calls = []
+
+        @decorators.memoize(maxsize=2)
+        def square(value):
+            calls.append(value)
+            return value*value
+
+        self.assertEqual( [square(2), square(3), square(2)], [4, 9, 4] )
+        self.assertEqual( calls, [2, 3] )
+        self.assertEqual( (square.cache.hits, square.cache.misses), (1, 2) )
+        # 3 is the least recently used entry and will be evicted
+        self.assertEqual( square(4), 16 )
+        self.assertEqual( len(square.cache), 2 )
+        self.assertTrue( (2,) in square.cache and (4,) in square.cache and (3,) not in square.cache )
+        square(3)
+        self.assertEqual( calls, [2, 3, 4, 3] )
+
+        # unhashable arguments are not cached
+        length = decorators.memoize(len)
+        self.assertEqual( length([1, 2]), 2 )
+        self.assertFalse( length.cache )
+
+        square.cache.clear()
+        self.assertFalse( square.cache )
+        self.assertEqual( square.cache.hits, 1 )
+
+        # key function; instances of the same class share the entries
+        @decorators.memoize(key=decorators.class_key)
+        def attr(obj, name):
+            calls.append(name)
+            return getattr(obj.__class__, name)
+
+        self.assertEqual( attr(1, "real"), attr(2, "real") )
+        self.assertEqual( attr.cache.keys(), [(int, "real")] )
+        self.assertEqual( calls[-1:], ["real"] )
+        self.assertEqual( len(calls), 5 )
+
+    def test_cache_cost(self):
+        "Test eviction of the least recently used entries of decorators.Cache if the memory budget is exceeded"
+        import decorators
+        cache = decorators.Cache("test", max_cost=100)
+        cache.put("a", 1, 40)
+        cache.put("b", 2, 40)
+        self.assertEqual( cache.get("a"), 1 )
+        cache.put("c", 3, 40)  # "b" is the least recently used entry
+        self.assertEqual( cache.keys(), ["a", "c"] )
+        self.assertEqual( cache.cost, 80 )
+        # too large to be cached
+        self.assertEqual( cache.put("d", 4, 101), 4 )
+        self.assertEqual( cache.keys(), ["a", "c"] )
+        cache.discard("a")
+        self.assertEqual( (len(cache), cache.cost), (1, 40) )
+        cache.clear()
+        self.assertEqual( (len(cache), cache.cost), (0, 0) )
+
     def test_cn_class(self):
         """\
         Test formatting of names with cn_class().
@@ -1011,6 +1089,268 @@ class TestCodeGen(WXGladeCLITest):
         self.assertNotEqual( id(old_gen.codegen.for_version), id(new_gen.codegen.for_version),
                             'for_version used by widget generators are not different' )
 
+    def test_CodeWriter_headless(self):
+        "Test code generation from the command line; the design is loaded without wx.App and GUI"
+        import xml_parse, tree
+        infilename = self._get_inputfile_path('PyOgg1.wxg')
+        expected_filename = self._get_casefile_path('PyOgg1.py')
+        generated_filename = self._get_outputfile_path(expected_filename)
+        if os.path.exists(generated_filename): os.remove(generated_filename)
+
+        xml_parse.CodeWriter( common.code_writers['python'], infilename, out_path=generated_filename )
+
+        self.assertTrue( isinstance(common.app_tree, tree.BatchTree) )
+        self._compare_files(expected_filename, generated_filename)
+
+    def test_profiler(self):
+        "Test the statistics of the code generation stages"
+        import xml_parse, profiler
+        infilename = self._get_inputfile_path('PyOgg1.wxg')
+        generated_filename = self._get_outputfile_path('PyOgg1_profiler.py')
+        if os.path.exists(generated_filename): os.remove(generated_filename)
+
+        profiler.reset()
+        profiler.enable()
+        try:
+            xml_parse.CodeWriter( common.code_writers['python'], infilename, out_path=generated_filename )
+            xml_parse.CodeWriter( common.code_writers['python'], infilename, out_path=generated_filename )
+        finally:
+            profiler.disable()
+        report = profiler.get_report()
+        profiler.reset()
+
+        stages = dict( (entry["name"], entry["calls"]) for entry in report["stages"] )
+        for name in ("parse", "_generate_code:Mp3_To_Ogg", "add_class", "add_object", "get_code:wxButton",
+                     "finalize", "save_file"):
+            self.assertTrue( stages.get(name), "stage %s missing" % name )
+        self.assertEqual( stages["parse"], 2 )
+        # both runs generate the same file
+        self.assertEqual( [f["name"] for f in report["files"]], [generated_filename] )
+        self.assertEqual( report["bytes_generated"], os.path.getsize(generated_filename) )
+
+    def test_synthetic_design(self):
+        "Test that synthetic designs are written in the same format as saved designs"
+        import xml_parse, synthetic_design
+        import xml.etree.ElementTree as ElementTree
+        design = synthetic_design.SyntheticDesign(toplevels=3, depth=2, pages=2, menus=2, menu_items=2, tools=2)
+        infilename = self._get_outputfile_path('Synthetic.wxg')
+        generated_filename = self._get_outputfile_path('Synthetic.py')
+        widgets = design.save(infilename)
+        self.assertEqual( widgets, sum(1 for e in ElementTree.parse(infilename).iter('object') if 'base' in e.attrib) )
+
+        # load the design, generate code and write it again
+        xml_parse.CodeWriter( common.code_writers['python'], infilename, out_path=generated_filename )
+        expected = []
+        design.write(expected)
+        saved = []
+        common.app_tree.write(saved)
+        self.assertEqual( "".join(expected), "".join(saved) )
+
+        # the number of toplevels is set for the required size
+        self.assertTrue( design.set_size(1000) >= 1000 )
+        design.toplevels -= 1
+        self.assertTrue( design.count_widgets() < 1000 )
+
+    def test_tree_snapshot(self):
+        "Test that a design written from a snapshot is identical to a design written directly"
+        if not os.path.isdir(self.outDirectory): os.makedirs(self.outDirectory)
+        import xml_parse
+        infilename = self._get_casefile_path('AllWidgets_30.wxg')
+        generated_filename = self._get_outputfile_path('AllWidgets_30.py')
+        xml_parse.CodeWriter( common.code_writers['python'], infilename, out_path=generated_filename )
+        expected = []
+        common.app_tree.write(expected)
+        snapshot = common.app_tree.snapshot()
+        # the snapshot does not change when the design is modified afterwards
+        common.app_tree.app.properties["name"].set("modified")
+        saved = []
+        common.app_tree.write_snapshot(saved, snapshot)
+        self.assertEqual( "".join(expected), "".join(saved) )
+
+    def test_XmlWriter(self):
+        "Test streaming of XML files with atomic replacement of the target file"
+        filename = os.path.join(self.outDirectory, 'XmlWriter.wxg')
+        if os.path.exists(filename): os.remove(filename)
+        lines = [u'<?xml version="1.0"?>\n<!-- generated by wxGlade 1 on A -->\n\n',
+                 u'<application>\n', u'    <label>\xe4</label>\n', u'</application>\n']
+
+        with common.XmlWriter(filename) as outfile:
+            outfile.extend(lines)
+        self.assertTrue(outfile.modified)
+        self.assertFalse( os.path.exists(outfile.tmp_filename) )
+        with open(filename, 'rb') as f:
+            self.assertEqual( f.read().replace(b'\r\n', b'\n'), u''.join(lines).encode('utf-8') )
+
+        # a different timestamp is not a modification
+        lines[0] = lines[0].replace(u'on A', u'on B')
+        with common.XmlWriter(filename) as outfile:
+            outfile.extend(lines)
+        self.assertFalse(outfile.modified)
+
+        # on errors, the existing file is kept
+        try:
+            with common.XmlWriter(filename) as outfile:
+                outfile.append(u'<application>\n')
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertFalse( os.path.exists(outfile.tmp_filename) )
+        with open(filename, 'rb') as f:
+            self.assertTrue( b'generated by wxGlade 1 on A' in f.read() )
+
+    def test_save_file_checksum_cache(self):
+        "Test that common.save_file() caches the checksums of generated files"
+        filename = os.path.join(self.outDirectory, 'checksums.py')
+        if os.path.exists(filename): os.remove(filename)
+        content = [b'# generated by wxGlade\n', b'print(1)\n']
+        common.save_file(filename, content, 'codegen')
+        common.save_checksum_manifests()
+
+        manifest_name = os.path.join(self.outDirectory, common._ChecksumManifest.FILENAME)
+        self.assertTrue( os.path.isfile(manifest_name) )
+        manifest = common._ChecksumManifest(self.outDirectory)
+        self.assertEqual( manifest.get_checksum(filename), common._smart_checksum(content) )
+        self.assertFalse(manifest.modified)
+
+        # modified files are detected
+        with open(filename, 'ab') as f:
+            f.write(b'print(2)\n')
+        common.save_file(filename, content, 'codegen')
+        with open(filename, 'rb') as f:
+            self.assertEqual( f.read().replace(b'\r\n', b'\n'), b''.join(content) )
+
+    def test_checksum_cache_merge(self):
+        "Test that the checksum caches written by several processes for the same directory are merged"
+        if not os.path.isdir(self.outDirectory): os.makedirs(self.outDirectory)
+        filenames = [os.path.join(self.outDirectory, 'checksums_%d.py'%i) for i in (1, 2)]
+        for filename in filenames:
+            with open(filename, 'wb') as f:
+                f.write(b'print(1)\n')
+        # e.g. two worker processes with the --jobs option
+        manifests = [common._ChecksumManifest(self.outDirectory) for filename in filenames]
+        for manifest, filename in zip(manifests, filenames):
+            manifest.set_checksum(filename, common._smart_checksum([b'print(1)\n']))
+        for manifest in manifests:
+            manifest.save()
+        entries = common._ChecksumManifest(self.outDirectory).entries
+        self.assertTrue( 'checksums_1.py' in entries and 'checksums_2.py' in entries )
+        self.assertFalse( os.path.exists(manifests[0].filename + ".lock") )
+
+    def test_memory_footprint(self):
+        "Test that nodes and properties of a loaded design don't store editor state per instance"
+        if not os.path.isdir(self.outDirectory): os.makedirs(self.outDirectory)
+        import xml_parse
+        infilename = self._get_casefile_path('AllWidgets_30.wxg')
+        generated_filename = self._get_outputfile_path('AllWidgets_30.py')
+        xml_parse.CodeWriter( common.code_writers['python'], infilename, out_path=generated_filename )
+
+        editor_state = set(["controls", "editing", "previous_value", "_handlers", "_logger"])
+        def check(node):
+            self.assertFalse( hasattr(node, "__dict__") )
+            for prop in node.widget.properties.values():
+                attributes = editor_state.union(prop.CONTROLNAMES, prop.EDITOR_ATTRIBUTES)
+                self.assertFalse( attributes.intersection(prop.__dict__), prop.name )
+            for child in node.children or []:
+                check(child)
+        for toplevel in common.app_tree.root.children:
+            check(toplevel)
+
+    def test_NameRegistry(self):
+        "Test the allocation of unique widget names"
+        import tree
+        names = tree.NameRegistry(['button_1', 'button_2', 'button_4', 'button_05', 'frame', 'a1'])
+        self.assertEqual( names.get_free_suffix('button_'), 3 )
+        self.assertEqual( names.get_free_suffix('button_', 4), 5 )
+        self.assertEqual( names.get_free_suffix('label_'), 1 )
+        self.assertEqual( names.get_free_suffix('a'), 2 )
+        names.add('button_3')
+        self.assertEqual( names.get_free_suffix('button_'), 5 )
+        names.discard('button_2')
+        self.assertEqual( names.get_free_suffix('button_'), 2 )
+        self.assertEqual( names.get_free_suffix('button_', 3), 5 )
+
+        # names are reference counted
+        names.add('button_1')
+        names.discard('button_1')
+        self.assertTrue('button_1' in names)
+        names.discard('button_1')
+        self.assertFalse('button_1' in names)
+        self.assertEqual( names.get_free_suffix('button_'), 1 )
+
+    def test_clipboard_names(self):
+        "Test the names of pasted toplevel widgets"
+        import tree, xml_parse
+        builder = xml_parse.ClipboardXmlWidgetBuilder.__new__(xml_parse.ClipboardXmlWidgetBuilder)
+        builder._renamed = {}
+        builder.parent_node = None
+        builder.have_names = tree.NameRegistry(['panel_1', 'frame', u'label_\u00b2'])
+        self.assertEqual( builder._get_new_name('panel_01'), 'panel_01' )  # unused names are kept
+        self.assertEqual( builder._get_new_name('panel_1'), 'panel_2' )
+        self.assertEqual( builder._get_new_name('frame'), 'frame_copy' )
+        self.assertEqual( builder._get_new_name('frame'), 'frame_copy_1' )
+        self.assertEqual( builder._get_new_name(u'label_\u00b2'), u'label_\u00b2_copy' )
+
+    def test_incremental_codegen(self):
+        "Test that unchanged toplevel classes are not generated again in multiple files mode"
+        import xml_parse
+        infilename = self._get_inputfile_path('CPPOgg2.wxg')
+        out_dir = os.path.join(self.outDirectory, 'incremental')
+        if not os.path.isdir(out_dir): os.makedirs(out_dir)
+        for name in os.listdir(out_dir):
+            os.remove( os.path.join(out_dir, name) )
+
+        config.preferences.incremental_codegen = True
+        try:
+            xml_parse.CodeWriter( common.code_writers['C++'], infilename, out_path=out_dir )
+            self.assertTrue( os.path.isfile(os.path.join(out_dir, '.wxglade_cpp.cache')) )
+            generated = os.path.join(out_dir, 'CPPOgg2_MyFrame.cpp')
+            self._compare_files( self._get_casefile_path('CPPOgg2_MyFrame.cpp'), generated )
+
+            # second run: the class files must not be touched; modify one file without changing size and mtime
+            st = os.stat(generated)
+            with open(generated, "rb") as infile:
+                content = infile.read()
+            with open(generated, "wb") as outfile:
+                outfile.write( content.replace(b"MyFrame", b"MyFramX") )
+            os.utime( generated, (st.st_atime, st.st_mtime) )
+            xml_parse.CodeWriter( common.code_writers['C++'], infilename, out_path=out_dir )
+            with open(generated, "rb") as infile:
+                self.assertTrue( b"MyFramX" in infile.read(), "unchanged class was generated again" )
+
+            # a deleted file must be generated again
+            os.remove(generated)
+            xml_parse.CodeWriter( common.code_writers['C++'], infilename, out_path=out_dir )
+            self._compare_files( self._get_casefile_path('CPPOgg2_MyFrame.cpp'), generated )
+        finally:
+            del config.preferences.incremental_codegen
+
+    def test_incremental_codegen_shared_class(self):
+        "Test that an unchanged toplevel keeps its class if a later toplevel with the same class is generated"
+        import xml_parse
+        out_dir = os.path.join(self.outDirectory, 'incremental_shared')
+        if not os.path.isdir(out_dir): os.makedirs(out_dir)
+        for name in os.listdir(out_dir):
+            os.remove( os.path.join(out_dir, name) )
+        with open(self._get_inputfile_path('CPPOgg2.wxg'), "rb") as infile:
+            content = infile.read().replace(b'class="CPPOgg2_MyFrame"', b'class="CPPOgg2_MyDialog"')
+        infilename = os.path.join(out_dir, 'CPPOgg2.wxg')
+
+        config.preferences.incremental_codegen = True
+        try:
+            # the first toplevel generates the class; the frame is modified and generated again in the second run
+            generated = []
+            for frame_title in (b'FrameOggCompressionDetails', b'Details'):
+                with open(infilename, "wb") as outfile:
+                    outfile.write( content.replace(b'<title>FrameOggCompressionDetails</title>',
+                                                   b'<title>%s</title>'%frame_title) )
+                xml_parse.CodeWriter( common.code_writers['C++'], infilename, out_path=out_dir )
+                with open(os.path.join(out_dir, 'CPPOgg2_MyDialog.cpp'), "rb") as infile:
+                    generated.append( infile.read() )
+            self.assertTrue( b"wxDialog(parent" in generated[1], "class was generated from the frame" )
+            self.assertEqual( generated[0], generated[1] )
+        finally:
+            del config.preferences.incremental_codegen
+
     @unittest.skip("XXX")
     def test_xrc2wxg(self):
         "Test converting XRC files into WXG files"
@@ -1024,6 +1364,15 @@ class TestCodeGen(WXGladeCLITest):
 
         self._compare(expected, generated, "wxg")
 
+    def test_xrc2wxg_streaming(self):
+        "Test that the streaming XRC converter creates the same output as the minidom based one"
+        for fullpath in sorted(glob.glob(os.path.join(self.caseDirectory, '*.xrc'))):
+            expected = []
+            generated = []
+            xrc2wxg.convert_minidom(fullpath, expected)
+            xrc2wxg.convert(fullpath, generated)
+            self.assertEqual(expected, generated, "different output for %s"%os.path.basename(fullpath))
+
     @unittest.skip("XXX")
     def test_Format_flags(self):
         "Test code cn_f() for XRC code generator"
@@ -130,6 +130,115 @@ class TestGui(WXGladeGUITest):
         # store sizer references
         self.load_and_generate('Sizers_classattr', test_GUI=False)
 
+    def test_undo_redo(self):
+        "Test undo and redo of property and structural changes"
+        infilename = self._get_casefile_path('PyOgg1.wxg')
+        self.frame._open_app(infilename, use_progress_dialog=False, add_to_history=False)
+        history = common.history
+        self.assertFalse( history.can_undo() )
+        dialog = common.app_tree.root.children[0].widget
+
+        # property change
+        dialog.properties["title"]._check_for_user_modification(u"new title")
+        self.assertEqual(dialog.title, u"new title")
+        history.undo()
+        self.assertEqual(dialog.title, u"mp3 2 ogg")
+        history.redo()
+        self.assertEqual(dialog.title, u"new title")
+
+        # renaming; the widget is found by the new name afterwards
+        dialog.properties["name"]._check_for_user_modification(u"Mp3_To_Ogg_2")
+        history.undo()
+        self.assertEqual(dialog.name, u"Mp3_To_Ogg")
+        self.assertTrue( common.app_tree.has_name(u"Mp3_To_Ogg") )
+        history.undo()
+        self.assertEqual(dialog.title, u"mp3 2 ogg")
+
+        # removal of a widget is restored from a snapshot
+        sizer = common.app_tree.find_widget_from_path(common.app_tree.get_widget_path(dialog) + (u"sizer_1",))
+        self.assertTrue(sizer is not None)
+        notebook = [c.widget for c in sizer.node.children if c.widget.name==u"notebook_1"][0]
+        with history.structure_change(notebook):
+            notebook.remove()
+        self.assertFalse( common.app_tree.has_name(u"notebook_1") )
+        # only the affected slot of the sizer is stored
+        snapshots = [(s.path, s.pos, len(s.items)) for s in history.actions[0].snapshots]
+        self.assertEqual( snapshots, [(common.app_tree.get_widget_path(sizer), 1, 1)] )
+        history.undo()
+        self.assertTrue( common.app_tree.has_name(u"notebook_1") )
+        self.assertTrue( common.app_tree.has_name(u"label_1") )
+        history.redo()
+        self.assertFalse( common.app_tree.has_name(u"label_1") )
+
+        # inserted slots are removed by undo
+        count = len(sizer.children)
+        sizer.insert_slot(1)
+        self.assertEqual( len(sizer.children), count+1 )
+        history.undo()
+        self.assertEqual( len(sizer.children), count )
+
+        # nothing is recorded if the tree is not modified, e.g. if a builder was cancelled
+        actions = len(history.actions)
+        dialog = common.app_tree.root.children[0].widget
+        with history.structure_change(dialog):
+            pass
+        self.assertEqual( len(history.actions), actions )
+
+        # a shown toplevel is shown again after undo and redo
+        common.app_tree.show_toplevel(None, dialog)
+        self.assertTrue( dialog.is_visible() )
+        sizer = common.app_tree.find_widget_from_path(common.app_tree.get_widget_path(dialog) + (u"sizer_1",))
+        widget = [c.widget for c in sizer.node.children if c.widget.klass!="sizerslot"][0]
+        with history.structure_change(widget):
+            widget.remove()
+        history.undo()
+        self.assertTrue( common.app_tree.root.children[0].widget.is_visible() )
+        history.redo()
+        self.assertTrue( common.app_tree.root.children[0].widget.is_visible() )
+
+        # the memory limit drops the oldest actions
+        history.memory_limit = 0
+        dialog = common.app_tree.root.children[0].widget
+        dialog.properties["title"]._check_for_user_modification(u"title 2")
+        self.assertEqual( len(history.actions), 1 )
+        history.memory_limit = None
+
+    def test_layout_scheduler(self):
+        "Test that the layouts of a sizer are coalesced: adding N items results in one layout when idle"
+        import edit_sizers
+        infilename = self._get_casefile_path('PyOgg1.wxg')
+        self.frame._open_app(infilename, use_progress_dialog=False, add_to_history=False)
+        dialog = common.app_tree.root.children[0].widget
+        common.app_tree.show_toplevel(None, dialog)
+        scheduler = edit_sizers.layout_scheduler
+        scheduler.flush()
+
+        sizer = common.app_tree.find_widget_from_path(common.app_tree.get_widget_path(dialog) + (u"sizer_4",))
+        performed = []
+        _layout = sizer._layout
+        def layout(recursive=True, immediate=False):
+            performed.append(immediate)
+            _layout(recursive, immediate)
+        sizer._layout = layout
+
+        # N items are added; the layout is requested N times, but not done yet
+        requested = scheduler.requested
+        for i in range(5):
+            sizer._add_slot()
+            common.widgets['EditButton'](sizer.window, sizer, sizer.children[-1].pos)
+        self.assertTrue( scheduler.requested - requested >= 5 )
+        self.assertEqual(performed, [])
+
+        # one layout when the application is idle
+        scheduler.flush()
+        self.assertEqual(performed, [False])
+        self.assertTrue( scheduler.get_saved() >= 4 )
+
+        # a property change by the user is laid out immediately
+        button = sizer.children[-1]
+        button.properties["border"]._check_for_user_modification(5)
+        self.assertTrue( performed[1:] and all(performed[1:]) )
+
     def test_Python_Ogg1(self):
         "Test Python code generation with overwriting a single existing file, preserving manually added code"
         # set up filenames, copy the old file to the output path and modify it to trigger re-writing
@@ -463,6 +572,72 @@ class TestGui(WXGladeGUITest):
         self.frame._open_app(generated_filename, use_progress_dialog=False, add_to_history=False)
         self.assertFalse(self._messageBox,'Loading test wxg file caused an error message: %s'%self._messageBox)
 
+    def test_property_editor_pool(self):
+        "Test that the property editors are re-used when another widget of the same class is selected"
+        infilename = self._get_casefile_path('CPPOgg2.wxg')
+        self.frame._open_app(infilename, use_progress_dialog=False, add_to_history=False)
+        buttons = []
+        def collect(node):
+            if node.widget is not None and node.widget.__class__.__name__=="EditButton":
+                buttons.append(node.widget)
+            for c in node.children or []:
+                collect(c)
+        collect(common.app_tree.root)
+        button_1, button_2 = buttons[:2]
+
+        panel = self.frame.property_panel
+        if panel._notebook_decoration_size is None: panel._notebook_decoration_size = (0, 0)
+        panel.set_widget(button_1)
+        panel.edit_properties(button_1)
+        text = button_1.properties["name"].text
+        self.assertTrue( text )
+        panel.set_widget(button_2)
+        panel.edit_properties(button_2)
+        self.assertTrue( button_2.properties["name"].text is text )
+        self.assertTrue( button_1.properties["name"].text is None )
+        self.assertEqual( text.GetValue(), button_2.name )
+        self.assertTrue( all(handler.prop is button_2.properties["name"]
+                             for handler in button_2.properties["name"]._handlers) )
+
+    def test_bitmap_cache(self):
+        "Test that bitmaps are shared and loaded again after the file has been modified"
+        import misc, shutil
+        filename = self._get_outputfile_path("bitmap_cache.xpm")
+        shutil.copyfile(self._get_casefile_path("icon.xpm"), filename)
+        bmp = misc.get_bitmap(filename)
+        self.assertTrue( bmp.IsOk() )
+        self.assertTrue( misc.get_bitmap(filename) is bmp )
+        self.assertEqual( misc.reload_bitmaps(), 0 )
+        # modify the file
+        with open(filename, "a") as outfile:
+            outfile.write("\n")
+        self.assertEqual( misc.reload_bitmaps(), 1 )
+        self.assertFalse( misc.get_bitmap(filename) is bmp )
+
+    def test_preview_cache(self):
+        "Test that the preview is generated in memory and re-used for an unchanged toplevel window"
+        import application
+        infilename = self._get_casefile_path('CPPOgg2.wxg')
+        self.frame._open_app(infilename, use_progress_dialog=False, add_to_history=False)
+        files = sorted( os.listdir(os.path.dirname(infilename)) )
+        app = common.app_tree.app
+        window = app.node.children[0].widget
+        klass = window.klass
+        application._preview_cache.clear()
+
+        frame = app.preview(window)
+        self.assertTrue( frame )
+        frame.Destroy()
+        hits = application._preview_cache.hits
+        frame = app.preview(window)
+        self.assertTrue( frame )
+        frame.Destroy()
+        self.assertEqual( application._preview_cache.hits, hits + 1 )
+        self.assertEqual( len(application._preview_cache), 1 )
+        self.assertEqual( window.klass, klass )
+        # no temporary files
+        self.assertEqual( sorted( os.listdir(os.path.dirname(infilename)) ), files )
+
     def test_toplevels_no_size(self):
         "Test frame, panel, dialog without size"
         self.load_and_generate('toplevels_no_size', test_GUI=True)
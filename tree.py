@@ -7,20 +7,38 @@ Classes to handle and display the structure of a wxGlade app
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import logging, os.path, sys, time
+import bisect, collections, copy, logging, os.path, re, sys, time
 import wx
 import misc, common, compat, config, clipboard
 import edit_sizers, application
 
 
 
+# the values of a Node to be written to the XML file; see Node.snapshot(), Node.write_snapshot()
+NodeSnapshot = collections.namedtuple( "NodeSnapshot", ["klass", "name", "base", "no_custom_class", "custom_widget",
+                                                        "properties", "children"] )
+SLOT_SNAPSHOT = "sizerslot"  # snapshot of a SlotNode that is to be written
+
+
+def _snapshot_properties(properties):
+    "Returns a tuple of (property, snapshot) for the properties to be written; see Property.snapshot()"
+    ret = []
+    for prop in properties:
+        value = prop.snapshot()
+        if value is not None:
+            ret.append( (prop, value) )
+    return tuple(ret)
+
+
 class Node(object):
     __empty_win = None
+    __slots__ = ("widget", "children", "parent", "item")  # there's one node per widget, so keep them small
 
     def __init__(self, widget=None, children=None):
         self.widget = widget      # e.g. EditPanel or EditBoxSizer
         self.children = children  # list of Node or SlotNode instances
         self.parent = None        # parent node; will be set in Tree.add/insert
+        self.item = None          # the item in the WidgetTree, if any
     @property
     def is_toplevel(self):
         if self.parent.parent is None:
@@ -55,60 +73,105 @@ class Node(object):
             parent = parent.parent
 
     def write(self, output, tabs, class_names=None):
-        "Writes the xml code for the widget to the given output file"
+        """Writes the xml code for the widget to the given output file.
+        output is a list or a file like object with append and extend methods, e.g. common.XmlWriter;
+        the lines are appended directly, without collecting them for the children first"""
+        self.write_snapshot(output, tabs, self.snapshot(), class_names)
+
+    def snapshot(self):
+        """Returns the values of the widget and its children as NodeSnapshot, or None if nothing is to be written.
+        Only the values are collected here; the formatting is done by write_snapshot(), which may run in another
+        thread, e.g. for autosave"""
         # XXX move this to the widget
         assert self.widget is not None
+        widget = self.widget
 
-        # write object tag, including class, name, base
-        classname = getattr(self.widget, '_classname', self.widget.__class__.__name__)
+        classname = getattr(widget, '_classname', widget.__class__.__name__)
         # to disable custom class code generation (for panels...)
-        if getattr(self.widget, 'no_custom_class', False):
-            no_custom = u' no_custom_class="1"'
-        else:
-            no_custom = ""
-        outer_tabs = u'    ' * tabs
-        output.append(u'%s<object %s %s %s%s>\n' % ( outer_tabs,
-                                                     common.format_xml_attrs(**{'class': self.widget.klass}),
-                                                     common.format_xml_attrs(name=self.widget.name),
-                                                     common.format_xml_attrs(base=classname),
-                                                     no_custom) )
+        no_custom_class = bool( getattr(widget, 'no_custom_class', False) )
 
-        # write properties, but without name and class
+        # properties, but without name and class
         # XXX be 100% compatible to 0.7.2, where option is written into the object; remove later
-        properties = self.widget.get_properties(without=set(edit_sizers.SizerBase.MANAGED_PROPERTIES))
-        #properties = self.widget.get_properties(without=set(["pos","flag","border"]))
-        for prop in properties:
-            prop.write(output, tabs+1)
+        without = set(edit_sizers.SizerBase.MANAGED_PROPERTIES)
+        properties = _snapshot_properties( widget.get_properties(without=without) )
+        #properties = widget.get_properties(without=set(["pos","flag","border"]))
 
-        if class_names is not None and self.widget.__class__.__name__ != 'CustomWidget':
-            class_names.add(self.widget.klass)
-
-        if isinstance(self.widget, edit_sizers.SizerBase):
+        children = []  # tuples (sizeritem properties or None, snapshot)
+        if isinstance(widget, edit_sizers.SizerBase):
             for child in self.children or []:
                 if not isinstance(child, SlotNode):# hasattr(child, 'widget'):
-                    inner_xml = []
-
-                    for name in edit_sizers.SizerBase.MANAGED_PROPERTIES:
-                        name = child.widget.properties[name]
-                        if name is not None:
-                            name.write(inner_xml, tabs+2)
-
-                    child.write(inner_xml, tabs+2, class_names)
-                    stmt = common.format_xml_tag( u'object', inner_xml, tabs+1,
-                                                  is_xml=True, **{'class': 'sizeritem'} )
-                    output.extend(stmt)
+                    managed = [child.widget.properties[name] for name in edit_sizers.SizerBase.MANAGED_PROPERTIES]
+                    children.append( (_snapshot_properties(prop for prop in managed if prop is not None),
+                                      child.snapshot()) )
                 else:
-                    child.write(output, tabs+1)
+                    children.append( (None, child.snapshot()) )
         elif self.children is not None:
-            for child in self.children:
-                child.write(output, tabs+1, class_names)
+            children = [(None, child.snapshot()) for child in self.children]
+
+        return NodeSnapshot( widget.klass, widget.name, classname, no_custom_class,
+                             widget.__class__.__name__ == 'CustomWidget', properties, tuple(children) )
+
+    @staticmethod
+    def write_snapshot(output, tabs, snapshot, class_names=None):
+        "Writes the xml code for a snapshot, without accessing the widgets; see snapshot() and write()"
+        if snapshot is None: return
+        if snapshot is SLOT_SNAPSHOT:
+            output.extend( common.format_xml_tag( u'object', '', tabs, **{'class': 'sizerslot'}) )
+            return
+
+        # write object tag, including class, name, base
+        no_custom = u' no_custom_class="1"'  if snapshot.no_custom_class else  ""
+        outer_tabs = u'    ' * tabs
+        output.append(u'%s<object %s %s %s%s>\n' % ( outer_tabs,
+                                                     common.format_xml_attrs(**{'class': snapshot.klass}),
+                                                     common.format_xml_attrs(name=snapshot.name),
+                                                     common.format_xml_attrs(base=snapshot.base),
+                                                     no_custom) )
+
+        for prop, value in snapshot.properties:
+            prop.write_snapshot(output, tabs+1, value)
+
+        if class_names is not None and not snapshot.custom_widget:
+            class_names.add(snapshot.klass)
+
+        for sizeritem, child in snapshot.children:
+            if sizeritem is not None:
+                output.append( common.format_xml_open_tag(u'object', tabs+1, **{'class': 'sizeritem'}) )
+                for prop, value in sizeritem:
+                    prop.write_snapshot(output, tabs+2, value)
+                Node.write_snapshot(output, tabs+2, child, class_names)
+                output.append( common.format_xml_close_tag(u'object', tabs+1) )
+            else:
+                Node.write_snapshot(output, tabs+1, child, class_names)
         output.append(u'%s</object>\n' % outer_tabs)
 
+    _image_cache = {}  # image key -> index; see _get_image_key
+
+    def _get_image_key(self):
+        # the image depends on the class and, for some classes, on the orientation only
+        widget = self.widget
+        name = widget.__class__.__name__
+        if name=="SizerSlot":
+            parent = self.parent.widget
+            if hasattr(parent, "orient"): return (name, parent.orient)
+            if hasattr(parent, "orientation"): return (name, None, parent.orientation, widget.pos==1)
+        elif name in ("EditStaticBoxSizer", "EditBoxSizer", "EditWrapSizer"):
+            return (name, widget.orient)
+        elif name == "EditSplitterWindow":
+            return (name, widget.orientation)
+        return (name,)
+
     def get_image(self, image=None):
         # get an image for this node
         if image is not None:
             return image
+        key = self._get_image_key()
+        index = self._image_cache.get(key)
+        if index is None:
+            index = self._image_cache[key] = self._get_image_index()
+        return index
 
+    def _get_image_index(self):
         name = self.widget.__class__.__name__
         widget = self.widget
 
@@ -154,9 +217,102 @@ class Node(object):
 
 class SlotNode(Node):
     "Placeholder for an empty sizer slot"
-    def write(self, output, tabs, class_names=None):
-        if self.widget.sizer is None or self.widget.sizer.is_virtual(): return
-        output.extend( common.format_xml_tag( u'object', '', tabs, **{'class': 'sizerslot'}) )
+    __slots__ = ()
+    def snapshot(self):
+        if self.widget.sizer is None or self.widget.sizer.is_virtual(): return None
+        return SLOT_SNAPSHOT
+
+
+class NameRegistry(object):
+    """Set of widget names with an index of the used numeric suffixes for each prefix.
+
+    e.g. for button_1, button_2 and button_5 the intervals [1,2] and [5,5] are stored for the prefix 'button_';
+    so the next free name can be found by bisection instead of probing one name after another.
+    Names may be added multiple times; they are reference counted."""
+    _SUFFIX_RE = re.compile(r"^(.*?)(0|[1-9][0-9]*)$")
+
+    def __init__(self, names=()):
+        self._counts = {}    # name -> number of registrations
+        self._suffixes = {}  # prefix -> (list of interval starts, list of interval ends), sorted and not adjacent
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name):
+        return name in self._counts
+
+    def __iter__(self):
+        return iter(self._counts)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def keys(self):
+        return list(self._counts)
+
+    def _split(self, name):
+        m = self._SUFFIX_RE.match(name)
+        if m is None: return None, None
+        return m.group(1), int(m.group(2))
+
+    def add(self, name):
+        count = self._counts.get(name, 0)
+        self._counts[name] = count + 1
+        if count: return
+        prefix, number = self._split(name)
+        if prefix is None: return
+        starts, ends = self._suffixes.setdefault(prefix, ([], []))
+        i = bisect.bisect_right(starts, number) - 1
+        join_left  = i >= 0 and ends[i] == number-1
+        join_right = i+1 < len(starts) and starts[i+1] == number+1
+        if join_left and join_right:
+            ends[i] = ends[i+1]
+            del starts[i+1], ends[i+1]
+        elif join_left:
+            ends[i] = number
+        elif join_right:
+            starts[i+1] = number
+        else:
+            starts.insert(i+1, number)
+            ends.insert(i+1, number)
+
+    def discard(self, name):
+        count = self._counts.get(name, 0)
+        if count > 1:
+            self._counts[name] = count - 1
+            return
+        if not count: return
+        del self._counts[name]
+        prefix, number = self._split(name)
+        if prefix is None: return
+        starts, ends = self._suffixes[prefix]
+        i = bisect.bisect_right(starts, number) - 1
+        start, end = starts[i], ends[i]
+        if start == end:
+            del starts[i], ends[i]
+            if not starts: del self._suffixes[prefix]
+        elif number == start:
+            starts[i] = number + 1
+        elif number == end:
+            ends[i] = number - 1
+        else:
+            # split the interval
+            ends[i] = number - 1
+            starts.insert(i+1, number+1)
+            ends.insert(i+1, end)
+
+    def get_free_suffix(self, prefix, start=1):
+        "returns the lowest number >= start such that prefix+number is not a registered name"
+        if prefix[-1:].isdigit():
+            # the suffix index can't be used, as e.g. 'a1' + '2' is stored with prefix 'a'
+            while "%s%d"%(prefix, start) in self._counts:
+                start += 1
+            return start
+        if prefix not in self._suffixes: return start
+        starts, ends = self._suffixes[prefix]
+        i = bisect.bisect_right(starts, start) - 1
+        if i >= 0 and ends[i] >= start:
+            return ends[i] + 1
+        return start
 
 
 class Tree(object):
@@ -171,7 +327,9 @@ class Tree(object):
         if self.root is None: self.root = Node()
         self.current = self.root
         self.app = app   # reference to the app properties
-        self.names = {}  # dictionary of names of the widgets: each entry is a dictionary, one for each toplevel widget
+        self.names = {}  # names of the widgets: each entry is a NameRegistry, one for each toplevel widget
+        self.all_names = NameRegistry()  # names of all toplevel widgets together
+        self.modifications = 0  # incremented on each structural change; used by history to detect cancelled builders
 
     def _find_toplevel(self, node):
         assert node is not None, _("None node in _find_toplevel")
@@ -198,20 +356,44 @@ class Tree(object):
         return ret
 
     def get_all_names(self):
-        ret = set()
-        for n in self.names:
-            ret.update(self.names[n].keys())
-        return ret
+        return set(self.all_names)
 
     def has_name(self, name, node=None):
         if node is None:
-            for n in self.names:
-                if name in self.names[n]:
-                    return True
-            return False
-        else:
-            node = self._find_toplevel(node) # node is a name
-            return name in self.names[node]
+            return name in self.all_names
+        node = self._find_toplevel(node)
+        return node in self.names and name in self.names[node]
+
+    def get_free_suffix(self, prefix, start=1, node=None):
+        """returns the lowest number >= start such that prefix+number is an unused name;
+        if node is given, only the names within the toplevel of node are checked"""
+        if node is None:
+            return self.all_names.get_free_suffix(prefix, start)
+        node = self._find_toplevel(node)
+        if node not in self.names: return start
+        return self.names[node].get_free_suffix(prefix, start)
+
+    def add_name(self, node, name):
+        "register name for the toplevel of node"
+        toplevel = self._find_toplevel(node)
+        names = self.names.get(toplevel)
+        if names is None:
+            names = self.names[toplevel] = NameRegistry()
+        if name in names: return
+        names.add(name)
+        self.all_names.add(name)
+
+    def remove_name(self, node, name):
+        "unregister name from the toplevel of node"
+        names = self.names.get(self._find_toplevel(node))
+        if names is None or name not in names: return
+        names.discard(name)
+        self.all_names.discard(name)
+
+    def _remove_toplevel_names(self, toplevel):
+        names = self.names.pop(toplevel, None)
+        for name in names or ():
+            self.all_names.discard(name)
 
     def add(self, child, parent=None):
         if parent is None: parent = self.root
@@ -219,7 +401,8 @@ class Tree(object):
         parent.children.append(child)
         child.parent = parent
         self.current = child
-        self.names.setdefault(self._find_toplevel(child), {})[child.widget.name] = 1
+        self.modifications += 1
+        self.add_name(child, child.widget.name)
         if parent is self.root and getattr(child.widget.__class__, '_is_toplevel_window', False):
             self.app.add_top_window(child.widget.name)
 
@@ -230,23 +413,23 @@ class Tree(object):
         parent.children.insert(index, child)
         child.parent = parent
         self.current = child
-        self.names.setdefault(self._find_toplevel(child), {})[child.widget.name] = 1
+        self.modifications += 1
+        self.add_name(child, child.widget.name)
         if parent is self.root:
             self.app.add_top_window(child.widget.name)
 
     def clear_name_rec(self, n):
         if n.parent is self.root:
-            del self.names[n]
+            self._remove_toplevel_names(n)
             return
-        try:
-            del self.names[self._find_toplevel(n)][n.widget.name]
-        except (KeyError, AttributeError):
-            pass
+        if n.widget is not None:
+            self.remove_name(n, n.widget.name)
 
         for c in (n.children or []):
             self.clear_name_rec(c)
 
     def remove(self, node=None):
+        self.modifications += 1
         if node is not None:
             self.clear_name_rec(node)
             if node.parent is self.root and getattr(node.widget, "_is_toplevel_window", False):
@@ -257,15 +440,17 @@ class Tree(object):
                 n.remove()
             self.root.children = None
             self.names = {}
+            self.all_names = NameRegistry()
 
     def write(self, output, tabs=0):
         """Writes the xml equivalent of this tree to the given output file.
-        This function writes unicode to the outfile."""
-        # XXX move this to application.Application
-        timestring = time.asctime()  if not config.testing else  'XXX XXX NN NN:NN:NN NNNN'
-        output.append( u'<?xml version="1.0"?>\n'
-                       u'<!-- generated by wxGlade %s on %s -->\n\n' % (config.version, timestring) )
+        This function writes unicode to the outfile, which is a list or e.g. a common.XmlWriter instance."""
+        return self.write_snapshot(output, self.snapshot(), tabs)
 
+    def snapshot(self):
+        """Returns the values of the design, to be written by write_snapshot(); see Node.snapshot().
+        Taking the snapshot is cheap, so it can be done on the GUI thread while the file is written by another thread."""
+        # XXX move this to application.Application
         attrs = ["name","class","language","top_window","encoding","use_gettext", "overwrite", "mark_blocks",
                  "for_version","is_template","indent_amount"]
         props = [self.app.properties[attr] for attr in attrs]
@@ -281,30 +466,43 @@ class Tree(object):
         attrs["source_extension"] = '.' + self.app.properties["source_extension"].get_string_value()
         attrs["header_extension"] = '.' + self.app.properties["header_extension"].get_string_value()
 
-        inner_xml = []
-
+        template_data = None
         if self.app.is_template and getattr(self.app, 'template_data', None):
-            self.app.template_data.write(inner_xml, tabs+1)
+            template_data = copy.copy(self.app.template_data)
+
+        toplevels = tuple( c.snapshot() for c in self.root.children or [] )
+        return (attrs, template_data, toplevels)
+
+    @staticmethod
+    def write_snapshot(output, snapshot, tabs=0):
+        "Writes the xml equivalent of a snapshot; returns the set of class names; see snapshot() and write()"
+        attrs, template_data, toplevels = snapshot
+        timestring = time.asctime()  if not config.testing else  'XXX XXX NN NN:NN:NN NNNN'
+        output.append( u'<?xml version="1.0"?>\n'
+                       u'<!-- generated by wxGlade %s on %s -->\n\n' % (config.version, timestring) )
+
+        output.append( common.format_xml_open_tag(u'application', tabs, **attrs) )
+
+        if template_data is not None:
+            template_data.write(output, tabs+1)
 
         class_names = set()
-        if self.root.children is not None:
-            for c in self.root.children:
-                c.write(inner_xml, tabs+1, class_names)
+        for toplevel in toplevels:
+            Node.write_snapshot(output, tabs+1, toplevel, class_names)
 
-        output.extend( common.format_xml_tag( u'application', inner_xml, is_xml=True, **attrs ) )
+        output.append( common.format_xml_close_tag(u'application', tabs) )
 
         return class_names
 
     def change_node(self, node, widget):
         "Changes the node 'node' so that it refers to 'widget'"
-        try:
-            del self.names[self._find_toplevel(node)][node.widget.name]
-        except KeyError:
-            pass
+        self.modifications += 1
+        self.remove_name(node, node.widget.name)
         node.widget = widget
-        self.names.setdefault(self._find_toplevel(node), {})[widget.name] = 1
+        self.add_name(node, widget.name)
 
     def change_node_pos(self, node, new_pos, index=None):
+        self.modifications += 1
         if index is None: index = node.parent.children.index(node)
         if index >= new_pos:
             node.parent.children.insert(new_pos, node)
@@ -366,6 +564,51 @@ class Tree(object):
 
 
 
+class BatchTree(Tree):
+    """Tree without display, used for code generation from the command line.
+    The interface used by the edit objects to update the tree view is implemented as no-ops."""
+    auto_expand = False
+
+    def __init__(self, application):
+        root_node = Node(application)
+        application.node = root_node
+        Tree.__init__(self, root_node, application)
+        self.title = ' '
+
+    def clear(self):
+        self.remove()
+
+    def refresh_name(self, node, previous_name=None):
+        if previous_name is not None:
+            self.remove_name(node, previous_name)
+        self.add_name(node, node.widget.name)
+
+    def refresh(self, node, refresh_label=True, refresh_image=True):
+        pass
+
+    def select_item(self, node):
+        pass
+
+    def set_current_widget(self, widget):
+        pass
+
+    def expand(self, node=None, yes=True):
+        pass
+
+    def set_title(self, value):
+        self.title = value
+
+    def get_title(self):
+        return self.title
+
+    def create_widgets(self, node):
+        pass
+
+    def show_toplevel(self, event, widget=None):
+        pass
+
+
+
 class WidgetTree(wx.TreeCtrl, Tree):
     "Tree with the ability to display the hierarchy of widgets"
     images = {} # Dictionary of icons of the widgets displayed
@@ -385,6 +628,7 @@ class WidgetTree(wx.TreeCtrl, Tree):
         image_list.Add(wx.Bitmap(os.path.join(config.icons_path, 'application.xpm'), wx.BITMAP_TYPE_XPM))
         for w in WidgetTree.images:
             WidgetTree.images[w] = image_list.Add(misc.get_xpm_bitmap(WidgetTree.images[w]))
+        Node._image_cache.clear()
         self.AssignImageList(image_list)
         root_node.item = self.AddRoot(_('Application'), 0)
         self._SetItemData(root_node.item, root_node)
@@ -397,7 +641,9 @@ class WidgetTree(wx.TreeCtrl, Tree):
         self.SetDropTarget(self.drop_target)
         self._drag_ongoing = False
         self.auto_expand = True  # this control the automatic expansion of  nodes: it is set to False during xml loading
+        self._pending_refresh = {}  # id(node) -> [node, refresh_label, refresh_image]; see refresh
         self.Bind(wx.EVT_TREE_SEL_CHANGED, self.on_change_selection)
+        self.Bind(wx.EVT_TREE_ITEM_EXPANDING, self.on_expanding)
         self.Bind(wx.EVT_RIGHT_DOWN, self.popup_menu)
         self.Bind(wx.EVT_LEFT_DCLICK, self.on_left_dclick)
         self.Bind(wx.EVT_LEFT_DOWN, self.on_left_click) # allow direct placement of widgets
@@ -661,16 +907,74 @@ class WidgetTree(wx.TreeCtrl, Tree):
             if not bool(item): return None
             return self.GetItemData(item)
 
+    ####################################################################################################################
+    # tree items are created on demand, i.e. when the parent is expanded or a node is to be selected
+    def _is_populated(self, node, exclude=None):
+        "True if the items for the children of node have been created (all or none of them are created)"
+        if node.item is None: return False
+        for c in node.children or []:
+            if c is not exclude: return c.item is not None
+        return node is self.root or self.IsExpanded(node.item)
+
+    def _create_item(self, node, parent, index=None):
+        image = node.get_image()
+        if index is None:
+            node.item = self.AppendItem(parent.item, self._build_label(node), image)
+        else:
+            node.item = compat.wx_Tree_InsertItemBefore(self, parent.item, index, self._build_label(node), image)
+        self._SetItemData(node.item, node)
+        if node.children:
+            # the items for the children will be created when expanded
+            self.SetItemHasChildren(node.item, True)
+
+    def _populate(self, node):
+        "create the items for the children of node, if not yet done"
+        if not node.children or node.children[0].item is not None: return
+        self._ensure_item(node)
+        for c in node.children:
+            self._create_item(c, node)
+
+    def _ensure_item(self, node):
+        "create the item for node and for its ancestors, if not yet done"
+        if node.item is None:
+            self._populate(node.parent)
+        return node.item
+
+    def _clear_items(self, node):
+        # the items of node and its children have been deleted
+        node.item = None
+        for c in node.children or []:
+            if c.item is None: break
+            self._clear_items(c)
+
+    def on_expanding(self, event):
+        node = self._GetItemData(event.GetItem())
+        if node is not None: self._populate(node)
+        event.Skip()
+
+    def GetFirstChild(self, item):
+        node = self._GetItemData(item)
+        if node is not None: self._populate(node)
+        return wx.TreeCtrl.GetFirstChild(self, item)
+
+    def GetLastChild(self, item):
+        node = self._GetItemData(item)
+        if node is not None: self._populate(node)
+        return wx.TreeCtrl.GetLastChild(self, item)
+
+    ####################################################################################################################
     def add(self, child, parent=None, select=True):
         "appends child to the list of parent's children"
         assert isinstance(child, Node)
 
         Tree.add(self, child, parent)
-        image = child.get_image()
-        if parent is None: parent = parent.item = self.GetRootItem()
-        child.item = self.AppendItem(parent.item, self._build_label(child), image)
-        self._SetItemData(child.item, child)
+        if parent is None: parent = self.root
+        if self._is_populated(parent, exclude=child):
+            self._create_item(child, parent)
+        elif parent.item is not None:
+            self.SetItemHasChildren(parent.item, True)
         if self.auto_expand:
+            self._ensure_item(child)
             self.Expand(parent.item)
             if select:
                 self.select_item(child)
@@ -697,10 +1001,12 @@ class WidgetTree(wx.TreeCtrl, Tree):
                 self.remove( parent.children[index] )
 
         Tree.insert(self, child, parent, index)
-        image = child.get_image()
-        child.item = compat.wx_Tree_InsertItemBefore(self, parent.item, index, self._build_label(child), image)
-        self._SetItemData(child.item, child)
+        if self._is_populated(parent, exclude=child):
+            self._create_item(child, parent, index)
+        elif parent.item is not None:
+            self.SetItemHasChildren(parent.item, True)
         if self.auto_expand:
+            self._ensure_item(child)
             self.Expand(parent.item)
             if select:
                 self.select_item(child)
@@ -709,10 +1015,15 @@ class WidgetTree(wx.TreeCtrl, Tree):
 
     def remove(self, node=None, delete=True):
         self.app.saved = False  # update the status of the app
+        item = node.item if node is not None else None
+        if delete and item is not None: self._clear_items(node)
         Tree.remove(self, node)
         if node is not None:
-            if delete:
-                self.Delete(node.item)
+            if delete and item is not None:
+                self.Delete(item)
+            parent = node.parent
+            if parent is not None and not parent.children and parent.item is not None:
+                self.SetItemHasChildren(parent.item, False)
         else:
             wx.TreeCtrl.Destroy(self)
 
@@ -725,23 +1036,40 @@ class WidgetTree(wx.TreeCtrl, Tree):
                 if c.widget: c.widget.remove()
             self.root.children = None
         self.skip_select = False
+        if common.history: common.history.clear()
 
     def refresh_name(self, node, previous_name=None):
-        names = self.names.setdefault(self._find_toplevel(node), {})
-        if previous_name is not None and previous_name in names:
-            del names[previous_name]
-        names[node.widget.name] = 1
-        self.SetItemText(node.item, self._build_label(node))
+        if previous_name is not None:
+            self.remove_name(node, previous_name)
+        self.add_name(node, node.widget.name)
+        self.refresh(node, refresh_label=True, refresh_image=False)
 
     def refresh(self, node, refresh_label=True, refresh_image=True):
-        # refresh label and/or image
-        if refresh_label:
-            self.SetItemText(node.item, self._build_label(node))
-        if refresh_image:
-            image = node.get_image()
-            self.SetItemImage(node.item, image)
+        # refresh label and/or image; this is done in a batch when the application is idle
+        if node.item is None: return  # the label will be built when the item is created
+        entry = self._pending_refresh.get(id(node))
+        if entry is not None:
+            entry[1] = entry[1] or refresh_label
+            entry[2] = entry[2] or refresh_image
+            return
+        if not self._pending_refresh:
+            wx.CallAfter(self.flush_refresh)
+        self._pending_refresh[id(node)] = [node, refresh_label, refresh_image]
+
+    def flush_refresh(self):
+        "update the pending labels and images"
+        pending = self._pending_refresh
+        if not pending: return
+        self._pending_refresh = {}
+        for node, refresh_label, refresh_image in pending.values():
+            if node.item is None or node.widget is None: continue  # deleted in the meantime
+            if refresh_label:
+                self.SetItemText(node.item, self._build_label(node))
+            if refresh_image:
+                self.SetItemImage(node.item, node.get_image())
 
     def select_item(self, node):
+        self._ensure_item(node)
         self.skip_select = True
         self.SelectItem(node.item)
         self.skip_select = False
@@ -750,12 +1078,12 @@ class WidgetTree(wx.TreeCtrl, Tree):
 
     def _set_cur_widget(self, widget):
         # set self.cur_widget; adjust label colors and bold if required (on Windows)
-        if self.cur_widget and wx.Platform == "__WXMSW__":
+        if self.cur_widget and wx.Platform == "__WXMSW__" and self.cur_widget.node.item is not None:
             item = self.cur_widget.node.item
             self.SetItemTextColour(item, wx.NullColour)
             self.SetItemBold( item, False )
         self.cur_widget = widget
-        item = widget.node.item
+        item = self._ensure_item(widget.node)
         self.EnsureVisible(item)
         # ensure that the icon is visible
         text_rect = self.GetBoundingRect(item, True)
@@ -771,6 +1099,7 @@ class WidgetTree(wx.TreeCtrl, Tree):
             node = self.root
         else:
             node = widget.node
+        self._ensure_item(node)
         self.skip_select = True
         self.SelectItem(node.item)
         self.skip_select = False
@@ -863,8 +1192,12 @@ class WidgetTree(wx.TreeCtrl, Tree):
     def expand(self, node=None, yes=True):
         "expands or collapses the given node"
         if node is None: node = self.root
-        if yes: self.Expand(node.item)
-        else: self.Collapse(node.item)
+        if yes:
+            self._ensure_item(node)
+            self._populate(node)
+            self.Expand(node.item)
+        elif node.item is not None:
+            self.Collapse(node.item)
 
     def set_title(self, value):
         if value is None: value = ""
@@ -992,32 +1325,34 @@ class WidgetTree(wx.TreeCtrl, Tree):
             index = parent.children.index(node)
             parent.children[index] = new_node
             new_node.item = node.item
-            self._SetItemData(node.item, new_node)
+            if node.item is not None: self._SetItemData(node.item, new_node)
             old_children = node.children
             self.remove(node, delete=False)  # don't delete the node, as we just want to modify it
             for c in old_children or []:     # but the children
-                self.Delete(c.item)
+                if c.item is not None: self.Delete(c.item)
+            if new_node.item is not None: self.SetItemHasChildren(new_node.item, False)
             node = new_node
-            self.names.setdefault(Tree._find_toplevel(self, node), {})[str(node.widget.name)] = 1
+            self.add_name(node, str(node.widget.name))
         Tree.change_node(self, node, widget)
-        self.SetItemImage(node.item, node.get_image() )
-        self.SetItemText(node.item, self._build_label(node))
+        if node.item is not None:
+            self.SetItemImage(node.item, node.get_image() )
+            self.SetItemText(node.item, self._build_label(node))
 
     def _append_rec(self, parent, node):
-        # helper for the next method
-        idx = WidgetTree.images.get(node.widget.__class__.__name__, -1)
-        node.item = self.AppendItem( parent.item, self._build_label(node), idx )
-        self._SetItemData(node.item, node)
-        if node.children:
+        # helper for the next method; the old items have been deleted, re-create the populated ones
+        populated = node.children and node.children[0].item is not None
+        self._create_item(node, parent)
+        if populated:
             for c in node.children:
                 self._append_rec(node, c)
-        self.Expand(node.item)
+            self.Expand(node.item)
 
     def change_node_pos(self, node, new_pos):
-        if new_pos >= self.GetChildrenCount(node.parent.item, False):
+        if new_pos >= len(node.parent.children):
             return
         index = node.parent.children.index(node)
         Tree.change_node_pos(self, node, new_pos, index)
+        if node.item is None: return  # no items created yet
         old_item = node.item
         image = self.GetItemImage(node.item)
         self.Freeze()
@@ -1027,10 +1362,12 @@ class WidgetTree(wx.TreeCtrl, Tree):
             node.item = compat.wx_Tree_InsertItemBefore( self, node.parent.item, new_pos+1, self._build_label(node), image )
         self._SetItemData(node.item, node)
 
-        if node.children:
+        if node.children and node.children[0].item is not None:
             for c in node.children:
                 self._append_rec(node, c)
-        self.Expand(node.item)
+            self.Expand(node.item)
+        elif node.children:
+            self.SetItemHasChildren(node.item, True)
         self.Delete(old_item)
         self.Thaw()
 
@@ -1073,7 +1410,22 @@ class WidgetTree(wx.TreeCtrl, Tree):
             ret[0] = ret[0][0]
         return tuple(ret)
     def find_widget_from_path(self, path):
-        pass
+        "returns the widget for a path in the form returned by get_widget_path, or None if not found"
+        if len(path)==1 and path[0]==self.root.widget.name and not self.has_name(path[0]):
+            return self.root.widget  # the application
+        node = self.root
+        for name in path:
+            for child in node.children or []:
+                if child.widget is None: continue
+                if isinstance(child.widget, edit_sizers.SizerSlot):
+                    if name=="SLOT %d"%child.widget.pos: break
+                elif child.widget.name==name:
+                    break
+            else:
+                return None
+            node = child
+        return node.widget
+
 
     def select_path(self, path):
         "sets the selected widget from a path_list, which should be in the form returned by get_selected_path"
@@ -10,7 +10,7 @@ from __future__ import absolute_import
 import common, config, misc, compat
 import new_properties as np
 
-import copy, logging, os.path
+import copy, logging, os.path, re
 from .dialogs import *
 from gui_mixins import StylesMixin
 
@@ -258,6 +258,24 @@ class XRCMixin(BaseLanguageMixin):
 
 
 
+class CompiledTemplate(object):
+    """Information about a widget template that is collected once per writer and widget class:
+
+    placeholders:  names of the substitutions in the template, e.g. 'name' for '%(name)s'
+    needs_choices: True if the template contains '%(choices)s' or '%(choices_len)s'
+    properties:    names of the properties of the widget class that are required to fill the templates;
+                   a subset of BaseWidgetWriter.TEMPLATE_PROPERTIES; see _prepare_tmpl_content()
+    bitmaps:       list of tuples (property name, constructor argument, template to set the property, min_version)"""
+    __slots__ = ("placeholders", "needs_choices", "properties", "bitmaps")
+
+    def __init__(self, placeholders, properties, bitmaps):
+        self.placeholders = placeholders
+        self.needs_choices = 'choices' in placeholders or 'choices_len' in placeholders
+        self.properties = properties
+        self.bitmaps = bitmaps
+
+
+
 class BaseWidgetWriter(StylesMixin, BaseCodeWriter):
     """Base class for all widget code writer classes.
 
@@ -287,6 +305,8 @@ class BaseWidgetWriter(StylesMixin, BaseCodeWriter):
     tmpl_concatenate_choices = ', ' # to concatenate choices; see _prepare_choice()
     tmpl_dict  = {}   # dict of content to replace in the templates; see tmpl, tmpl_before, tmpl_props
     tmpl_flags = '%s' # to format the styles parameter; see _prepare_style()
+    _PLACEHOLDER_RE = re.compile(r'%\((\w+)\)s')  # substitutions in templates; see _compile_template()
+    TEMPLATE_PROPERTIES = ('style', 'label', 'value', 'value_unquoted')  # see _prepare_tmpl_content()
 
     # see: generate_code_bitmap(), _prepare_bitmap()
     tmpl_inline_artprovider = '' # to inline a bitmap from wxArtProvider; doesn't end with a newline
@@ -294,6 +314,7 @@ class BaseWidgetWriter(StylesMixin, BaseCodeWriter):
     tmpl_inline_emptybitmap = '' # to create an empty wxBitmap; doesn't end with a newline
 
     tmpl_import_artprovider = '' # to import / include the art provider; see _prepare_bitmap()
+    tmpl2_bitmap_property   = '' # to build a template to set a bitmap after construction; see _compile_template()
 
     tmpl_inline_wxSize = '' # to inline a widget size with wxSize(); doesn't end with a newline; get_inline_stmt_wxSize()
 
@@ -336,6 +357,7 @@ class BaseWidgetWriter(StylesMixin, BaseCodeWriter):
                 self.config[item] = copy.deepcopy(config.widget_config[self.klass][item])
 
         self.codegen = common.code_writers[self.language]
+        self._compiled_templates = {}  # (widget class, tmpl) -> CompiledTemplate; see _get_compiled_template()
         self._reset_vars()
 
     def format_widget_access(self, obj):
@@ -401,11 +423,17 @@ class BaseWidgetWriter(StylesMixin, BaseCodeWriter):
 
         self.tmpl_dict['store_as_attr'] = self.codegen.store_as_attr(obj)
 
-        if obj.check_prop('style'): self.tmpl_dict['style'] = self._prepare_style(obj.properties["style"])
-        if obj.check_prop('label'):
-            self.tmpl_dict['label'] = self.codegen.quote_str( obj.label )
-        if obj.check_prop('value'): self.tmpl_dict['value'] = self.codegen.quote_str( compat.unicode(obj.value) )
-        if obj.check_prop('value_unquoted'): self.tmpl_dict['value_unquoted'] = obj.value
+        # only the properties that the widget class has; see TEMPLATE_PROPERTIES
+        properties = self._get_compiled_template(obj).properties
+        if properties:
+            if 'style' in properties and obj.check_prop('style'):
+                self.tmpl_dict['style'] = self._prepare_style(obj.properties["style"])
+            if 'label' in properties and obj.check_prop('label'):
+                self.tmpl_dict['label'] = self.codegen.quote_str( obj.label )
+            if 'value' in properties and obj.check_prop('value'):
+                self.tmpl_dict['value'] = self.codegen.quote_str( compat.unicode(obj.value) )
+            if 'value_unquoted' in properties and obj.check_prop('value_unquoted'):
+                self.tmpl_dict['value_unquoted'] = obj.value
 
         return
 
@@ -419,28 +447,50 @@ class BaseWidgetWriter(StylesMixin, BaseCodeWriter):
 
     default_style = property(_get_default_style)
 
+    def _compile_template(self, obj):
+        "Collect the template information that depends only on the writer and the widget class; see get_code()"
+        placeholders = frozenset( self._PLACEHOLDER_RE.findall(self.tmpl) )
+        bitmaps = []
+        for p_name in obj.property_names:
+            p = obj.properties[p_name]
+            if not isinstance(p, np.BitmapProperty): continue
+            if p_name in placeholders:
+                # constructor argument
+                bitmaps.append( (p_name, True, None, None) )
+                continue
+            # property to be set after construction, e.g.: ...SetBitmapDisabled(disabled_bitmap)
+            setname = p_name.replace( "_bitmap", "").capitalize()
+            if compat.IS_CLASSIC and setname=="Pressed":
+                setname = "Selected"  # probably only wx 2.8
+            if setname=="Bitmap": setname = ""
+            # build template, e.g. '%(name)s.SetBitmapDisabled(%(disabled_bitmap)s)\n'; see _prepare_bitmaps()
+            tmpl = self.tmpl2_bitmap_property%(setname, p_name)  if self.tmpl2_bitmap_property else  None
+            bitmaps.append( (p_name, False, tmpl, p.min_version) )
+        properties = tuple( name for name in self.TEMPLATE_PROPERTIES if name in obj.properties )
+        return CompiledTemplate(placeholders, properties, bitmaps)
+
+    def _get_compiled_template(self, obj):
+        "Return the CompiledTemplate for the widget; it's created once per widget class"
+        # tmpl is part of the key, as a derived writer could modify it
+        key = (obj.__class__, self.tmpl)
+        compiled = self._compiled_templates.get(key)
+        if compiled is None:
+            compiled = self._compiled_templates[key] = self._compile_template(obj)
+        return compiled
+
     def _prepare_bitmaps(self, obj):
         "Prepare content for widgets with bitmaps"
 
         need_artprovider = have_constructor_argument = False
-        for p_name in obj.property_names:
-            p = obj.properties[p_name]
-            if not isinstance(p, np.BitmapProperty): continue
-            value = p.get_value()
+        for p_name, constructor_argument, tmpl, min_version in self._get_compiled_template(obj).bitmaps:
+            value = obj.properties[p_name].get_value()
             if value.startswith('art:'): need_artprovider = True
-            if '%%(%s)s'%p_name in self.tmpl:
-                # constructor argument
+            if constructor_argument:
                 self.tmpl_dict[p_name] = self.generate_code_bitmap(value)
                 have_constructor_argument = True
-            elif value and (not p.min_version or self.codegen.for_version>=p.min_version):
-                # property to be set after construction, e.g.: ...SetBitmapDisabled(disabled_bitmap)
+            elif value and (not min_version or self.codegen.for_version>=min_version):
+                assert tmpl, "%s: no template tmpl2_bitmap_property to set %s"%(self.__class__.__name__, p_name)
                 self.tmpl_dict[p_name] = self.generate_code_bitmap(value)
-                setname = p_name.replace( "_bitmap", "").capitalize()
-                if compat.IS_CLASSIC and setname=="Pressed":
-                    setname = "Selected"  # probably only wx 2.8
-                if setname=="Bitmap": setname = ""
-                # build template, e.g. '%(name)s.SetBitmapDisabled(%(disabled_bitmap)s)\n'
-                tmpl = self.tmpl2_bitmap_property%(setname, p_name)
                 self.tmpl_props.append(tmpl)
 
         # import artprovider?
@@ -519,7 +569,7 @@ class BaseWidgetWriter(StylesMixin, BaseCodeWriter):
         self._prepare_tmpl_content(obj)
 
         # generate choices automatically if the template contains '%(choices)s' or '%(choices_len)s'
-        if '%(choices)s' in self.tmpl or '%(choices_len)s' in self.tmpl:
+        if self._get_compiled_template(obj).needs_choices:
             self._prepare_choice(obj)
 
         # generate wxBitmap code
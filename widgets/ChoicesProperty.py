@@ -14,8 +14,9 @@ from wcodegen.taghandler import BaseXmlBuilderTagHandler
 __all__ = ['ChoicesProperty', 'ChoicesHandler']
 
 class ChoicesProperty(np.GridProperty):
-    def write(self, output, tabs):
-        inner_xml = []
+    def snapshot(self):
+        # tuples (label, checked or None)
+        choices = []
         #for val in self.get_value():
         for val in self.get():
             value = common.encode_to_unicode(val[0])  # only first column is used
@@ -23,6 +24,12 @@ class ChoicesProperty(np.GridProperty):
                 checked = int(val[1])
             except (IndexError, ValueError):
                 checked = None
+            choices.append( (value, checked) )
+        return tuple(choices)
+
+    def write_snapshot(self, output, tabs, choices):
+        inner_xml = []
+        for value, checked in choices:
             if checked is None:
                 inner_xml += common.format_xml_tag(u'choice', value, tabs+1)
             else:
@@ -54,10 +54,8 @@ class EditBitmapButton(ManagedBase, EditStylesMixin, BitmapMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditBitmapButton objects"
+    number[0] = common.app_tree.get_free_suffix('bitmap_button_', number[0])
     name = 'bitmap_button_%s' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'bitmap_button_%s' % number[0]
     bitmap = wx.FileSelector(_("Select the image for the button"))
     with parent.frozen():
         button = EditBitmapButton(name, parent, wx.NewId(), bitmap, sizer, pos)
@@ -73,10 +73,8 @@ class EditCheckListBox(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditCheckListBox objects"
+    number[0] = common.app_tree.get_free_suffix('check_list_box_', number[0])
     name = 'check_list_box_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'check_list_box_%d' % number[0]
     with parent.frozen():
         check_list_box = EditCheckListBox(name, parent, wx.NewId(), [u'choice 1'], sizer, pos)
         check_list_box.properties["style"].set_to_default()
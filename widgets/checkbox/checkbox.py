@@ -80,10 +80,8 @@ class EditCheckBox(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditCheckBox objects"
+    number[0] = common.app_tree.get_free_suffix('checkbox_', number[0])
     label = 'checkbox_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = 'checkbox_%d' % number[0]
     with parent.frozen():
         checkbox = EditCheckBox(label, parent, wx.NewId(), label, sizer, pos)
         checkbox.properties["style"].set_to_default()
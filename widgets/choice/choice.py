@@ -70,10 +70,8 @@ class EditChoice(ManagedBase):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditChoice objects"
+    number[0] = common.app_tree.get_free_suffix('choice_', number[0])
     name = 'choice_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'choice_%d' % number[0]
     with parent.frozen():
         choice = EditChoice(name, parent, wx.NewId(), [(u'choice 1',)], sizer, pos)
         choice.check_defaults()
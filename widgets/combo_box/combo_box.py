@@ -73,10 +73,8 @@ class EditComboBox(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditComboBox objects"
+    number[0] = common.app_tree.get_free_suffix('combo_box_', number[0])
     name = 'combo_box_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'combo_box_%d' % number[0]
     with parent.frozen():
         combo = EditComboBox(name, parent, wx.NewId(), [], sizer, pos)
         combo.properties["style"].set_to_default()
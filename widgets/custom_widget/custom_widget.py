@@ -19,13 +19,14 @@ class ArgumentsProperty(np.GridProperty):
     SKIP_EMPTY = True
     def __init__(self, arguments, cols):
         np.GridProperty.__init__( self, arguments, cols, immediate=True)
-    def write(self, output, tabs):
-        arguments = self.get()
-        if arguments:
-            inner_xml = []
-            for argument in arguments:
-                inner_xml += common.format_xml_tag(u'argument', argument, tabs+1)
-            output.extend( common.format_xml_tag( u'arguments', inner_xml, tabs, is_xml=True) )
+    def snapshot(self):
+        return tuple(self.get()) or None
+
+    def write_snapshot(self, output, tabs, arguments):
+        inner_xml = []
+        for argument in arguments:
+            inner_xml += common.format_xml_tag(u'argument', argument, tabs+1)
+        output.extend( common.format_xml_tag( u'arguments', inner_xml, tabs, is_xml=True) )
     def get(self):
         "get the value, or the default value if deactivated; usually not used directly, as owner.property will call it"
         ret = np.GridProperty.get(self) or []
@@ -153,10 +154,8 @@ def builder(parent, sizer, pos, number=[1]):
     dialog.Destroy()
     if res != wx.ID_OK: return
 
+    number[0] = common.app_tree.get_free_suffix('window_', number[0])
     name = 'window_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'window_%d' % number[0]
     with parent.frozen():
         win = CustomWidget(name, klass, parent, wx.NewId(), sizer, pos)
         node = Node(win)
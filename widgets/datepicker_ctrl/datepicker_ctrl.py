@@ -38,7 +38,7 @@ class EditDatePickerCtrl(ManagedBase, EditStylesMixin):
         self.widget = DatePickerCtrl(self.parent.widget, self.id, style=self.style)
 
     # handle compatibility:
-    @decorators.memoize
+    @decorators.memoize(key=decorators.class_key)
     def wxname2attr(self, name):
         cn = self.codegen.get_class(self.codegen.cn(name))
         module = wx if compat.IS_CLASSIC else wx.adv
@@ -51,10 +51,8 @@ class EditDatePickerCtrl(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditDatePickerCtrl objects"
+    number[0] = common.app_tree.get_free_suffix('datepicker_ctrl_', number[0])
     label = 'datepicker_ctrl_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = 'datepicker_ctrl_%d' % number[0]
     with parent.frozen():
         datepicker_ctrl = EditDatePickerCtrl(label, parent, wx.NewId(), sizer, pos)
         datepicker_ctrl.properties["style"].set_to_default()
@@ -59,10 +59,8 @@ def builder(parent, sizer, pos, number=[1]):
     if res != wx.ID_OK:
         return
 
+    number[0] = common.app_tree.get_free_suffix(tmpl_label + '_', number[0])
     label = '%s_%d' % (tmpl_label, number[0])
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = '%s_%d' % (tmpl_label, number[0])
     with parent.frozen():
         widget = editor_class(label, parent, wx.ID_ANY, style, sizer, pos)
         node = Node(widget)
@@ -41,7 +41,7 @@ class EditGenericCalendarCtrl(ManagedBase, EditStylesMixin):
         self.widget = GenericCalendarCtrl(self.parent.widget, self.id, style=self.style)
 
     # handle compatibility:
-    @decorators.memoize
+    @decorators.memoize(key=decorators.class_key)
     def wxname2attr(self, name):
         assert name.startswith('wx')
 
@@ -59,10 +59,8 @@ class EditGenericCalendarCtrl(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditGenericCalendarCtrl objects"
+    number[0] = common.app_tree.get_free_suffix('generic_calendar_ctrl_', number[0])
     label = 'generic_calendar_ctrl_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = 'generic_calendar_ctrl_%d' % number[0]
     with parent.frozen():
         calendar_ctrl = EditGenericCalendarCtrl(label, parent, wx.NewId(), sizer, pos)
         calendar_ctrl.properties["style"].set_to_default()
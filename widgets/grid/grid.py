@@ -22,13 +22,15 @@ class GridColsProperty(np.GridProperty):
         default = ['', -1]
         np.GridProperty.__init__(self, value, definition, default)
 
-    def write(self, output, tabs):
-        value = self.get()
-        if value:
-            inner_xml = []
-            for label, size in value:
-                inner_xml += common.format_xml_tag(u'column', label, tabs+1, size=size)
-            output.extend( common.format_xml_tag(u'columns', inner_xml, tabs, is_xml=True) )
+    def snapshot(self):
+        # tuples (label, size)
+        return tuple( (label, size) for label, size in self.get() or [] ) or None
+
+    def write_snapshot(self, output, tabs, columns):
+        inner_xml = []
+        for label, size in columns:
+            inner_xml += common.format_xml_tag(u'column', label, tabs+1, size=size)
+        output.extend( common.format_xml_tag(u'columns', inner_xml, tabs, is_xml=True) )
 
     def _get_label(self, col):
         s = []
@@ -101,10 +103,13 @@ class GridRowsProperty(GridColsProperty):
             value =  [[str(n),-1] for n in range(int(value))]
         np.GridProperty.load(self, value, activate, deactivate, notify)
 
-    def write(self, output, tabs):
+    def snapshot(self):
+        # tuples (label, size); for no rows, rows_number 0 is written
+        return tuple( (label, size) for label, size in self.get() )
+
+    def write_snapshot(self, output, tabs, rows):
         is_default = True
         inner_xml = []
-        rows = self.get()
         for i, (label, size) in enumerate(rows):
             if size!=-1 or label!=str(i):
                 is_default=False
@@ -318,10 +323,8 @@ class EditGrid(ManagedBase):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditGrid objects"
+    number[0] = common.app_tree.get_free_suffix('grid_', number[0])
     label = 'grid_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = 'grid_%d' % number[0]
     with parent.frozen():
         grid = EditGrid(label, parent, wx.NewId(), sizer, pos)
         # A grid should be wx.EXPANDed and 'option' should be 1, or you can't see it.
@@ -59,7 +59,7 @@ class EditHyperlinkCtrl(ManagedBase, EditStylesMixin):
         ManagedBase.properties_changed(self, modified)
 
     # handle compatibility:
-    @decorators.memoize
+    @decorators.memoize(key=decorators.class_key)
     def wxname2attr(self, name):
         cn = self.codegen.get_class(self.codegen.cn(name))
         module = wx if compat.IS_CLASSIC else wx.adv
@@ -68,10 +68,8 @@ class EditHyperlinkCtrl(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditHyperlinkCtrl objects"
+    number[0] = common.app_tree.get_free_suffix(u'hyperlink_', number[0])
     name = u'hyperlink_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = u'hyperlink_%d' % number[0]
     with parent.frozen():
         hyperlink_ctrl = EditHyperlinkCtrl(name, parent, wx.NewId(), name, sizer, pos)
         hyperlink_ctrl.properties["style"].set_to_default()
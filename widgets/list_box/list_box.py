@@ -70,10 +70,8 @@ class EditListBox(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditListBox objects"
+    number[0] = common.app_tree.get_free_suffix('list_box_', number[0])
     name = 'list_box_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'list_box_%d' % number[0]
     with parent.frozen():
         list_box = EditListBox(name, parent, wx.NewId(), [u'choice 1', ], sizer, pos)
         list_box.properties["style"].set_to_default()
@@ -109,10 +109,8 @@ class EditListCtrl(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditListCtrl objects"
+    number[0] = common.app_tree.get_free_suffix('list_ctrl_', number[0])
     name = 'list_ctrl_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'list_ctrl_%d' % number[0]
     with parent.frozen():
         list_ctrl = EditListCtrl(name, parent, wx.NewId(), sizer, pos)
         #list_ctrl.properties["style"].set_to_default()  # default is wxLC_ICON
@@ -7,6 +7,7 @@ wxMenuBar objects
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
+import copy
 import wx
 
 import common, compat, config, misc
@@ -582,9 +583,12 @@ class MenuProperty(np.Property):
             self.on_value_edited(dialog.get_menus())
         dialog.Destroy()
 
-    def write(self, output, tabs):
+    def snapshot(self):
+        return copy.deepcopy( tuple(self.get()) )
+
+    def write_snapshot(self, output, tabs, menus):
         inner_xml = []
-        for menu in self.get():
+        for menu in menus:
             menu.write(inner_xml, tabs+1)
         output.extend( common.format_xml_tag( u'menus', inner_xml, tabs, is_xml=True ) )
 
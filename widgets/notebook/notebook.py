@@ -54,10 +54,10 @@ class NotebookVirtualSizer(Sizer):
         if self.window.sizer is not None:
             self.window.sizer.set_item_best_size( self.window, size=self.window.widget.GetBestSize() )
 
-    def set_item_best_size(self, widget, size=None, force_layout=True):
+    def set_item_best_size(self, widget, size=None, force_layout=True, immediate=False):
         pass
 
-    def item_properties_modified(self, widget, modified=None, force_layout=True):
+    def item_properties_modified(self, widget, modified=None, force_layout=True, immediate=False):
         if not self.window.widget: return
         index = widget.pos-1 # 0 based
         item = self.window.pages[index]
@@ -79,7 +79,8 @@ class NotebookVirtualSizer(Sizer):
                 pass
         if self.window.sizer is not None:
             #self.window.sizer.set_item( self.window.pos, size=self.window.widget.GetBestSize() )
-            self.window.sizer.set_item_best_size( self.window, size=self.window.widget.GetBestSize() )
+            best_size = self.window.widget.GetBestSize()
+            self.window.sizer.set_item_best_size( self.window, size=best_size, immediate=immediate )
 
     ####################################################################################################################
     # new implementation
@@ -157,12 +158,15 @@ class NotebookPagesProperty(np.GridProperty):
         col_widths = [300,]
         np.GridProperty.__init__(self, value, cols, col_sizes=col_widths, can_remove_last=False, with_index=True)
 
-    def write(self, output, tabs):
+    def snapshot(self):
+        # tuples (label, window name)
+        # XXX what happens with empty pages?
+        return tuple( (name, window.name) for (name,), window in zip(self.owner.tabs, self.owner.pages) if window )
+
+    def write_snapshot(self, output, tabs, pages):
         inner_xml = []
-        for (name,), window in zip(self.owner.tabs, self.owner.pages):
-            # XXX what happens with empty pages?
-            if window:
-                inner_xml += common.format_xml_tag(u'tab', name, tabs+1, window=window.name)
+        for name, window_name in pages:
+            inner_xml += common.format_xml_tag(u'tab', name, tabs+1, window=window_name)
         output.extend( common.format_xml_tag(u'tabs', inner_xml, tabs, is_xml=True) )
 
     def flush(self):
@@ -376,12 +380,9 @@ class EditNotebook(ManagedBase, EditStylesMixin):
     # helpers ##########################################################################################################
     def next_notebook_name(self):
         # return new and (still) unused notebook name
-        while True:
-            name = 'notebook_%d' % EditNotebook._next_notebook_number
-            if not common.app_tree.has_name(name):
-                break
-            EditNotebook._next_notebook_number += 1
-        return name
+        number = common.app_tree.get_free_suffix('notebook_', EditNotebook._next_notebook_number)
+        EditNotebook._next_notebook_number = number
+        return 'notebook_%d' % number
 
     def next_pane_name(self, suggestion=None):
         # return new and (still) unused pane name
@@ -392,12 +393,9 @@ class EditNotebook(ManagedBase, EditStylesMixin):
             suggestion = "".join(suggestion)
         if suggestion and not common.app_tree.has_name(suggestion):
             return suggestion
-        while True:
-            pane_name = "%s_pane_%d" % (self.name, self.next_pane_number)
-            self.next_pane_number += 1
-            if not common.app_tree.has_name(pane_name):
-                break
-        return pane_name
+        number = common.app_tree.get_free_suffix("%s_pane_" % self.name, self.next_pane_number)
+        self.next_pane_number = number + 1
+        return "%s_pane_%d" % (self.name, number)
 
     def find_page(self, page):
         "returns the index of the given page in the notebook, or -1 if the page cannot be found"
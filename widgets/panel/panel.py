@@ -339,10 +339,8 @@ class EditTopLevelPanel(PanelBase, TopLevelBase):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditPanel objects"
+    number[0] = common.app_tree.get_free_suffix('panel_', number[0])
     name = 'panel_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'panel_%d' % number[0]
     with parent.frozen():
         panel = EditPanel(name, parent, wx.NewId(), sizer, pos, style='')
         node = Node(panel)
@@ -96,10 +96,8 @@ class EditPropertyGridManager(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditPropertyGridManager objects"
+    number[0] = common.app_tree.get_free_suffix('property_grid_', number[0])
     label = 'property_grid_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = 'property_grid_%d' % number[0]
     with parent.frozen():
         property_grid_manager = EditPropertyGridManager(label, parent, wx.NewId(), sizer, pos)
         property_grid_manager.properties["style"].set_to_default()
@@ -185,10 +185,8 @@ class EditRadioBox(ManagedBase):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditRadioBox objects"
+    number[0] = common.app_tree.get_free_suffix(u'radio_box_', number[0])
     label = u'radio_box_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = u'radio_box_%d' % number[0]
     with parent.frozen():
         radio_box = EditRadioBox(label, parent, wx.NewId(), label, [[u'choice 1'],], 1, 0, sizer, pos)
         node = Node(radio_box)
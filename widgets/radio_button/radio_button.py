@@ -58,10 +58,8 @@ class EditRadioButton(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditRadioButton objects"
+    number[0] = common.app_tree.get_free_suffix(u'radio_btn_', number[0])
     label = u'radio_btn_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = u'radio_btn_%d' % number[0]
     with parent.frozen():
         radio = EditRadioButton(label, parent, wx.NewId(), label, sizer, pos)
         radio.properties["style"].set_to_default()
@@ -69,10 +69,8 @@ class EditSearchCtrl(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditSearchCtrl objects"
+    number[0] = common.app_tree.get_free_suffix('text_ctrl_', number[0])
     name = 'text_ctrl_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'text_ctrl_%d' % number[0]
     with parent.frozen():
         text = EditSearchCtrl(name, parent, wx.NewId(), sizer, pos)
         text.properties["style"].set_to_default()
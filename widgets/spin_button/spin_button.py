@@ -63,10 +63,8 @@ class EditSpinButton(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditSpinButton objects"
+    number[0] = common.app_tree.get_free_suffix('spin_button_', number[0])
     name = 'spin_button_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'spin_button_%d' % number[0]
     with parent.frozen():
         text = EditSpinButton(name, parent, wx.NewId(), sizer, pos)
         text.properties["style"].set_to_default()
@@ -74,10 +74,8 @@ class EditSpinCtrlDouble(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditSpinCtrl objects"
+    number[0] = common.app_tree.get_free_suffix('spin_ctrl_double_', number[0])
     name = 'spin_ctrl_double_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'spin_ctrl_double_%d' % number[0]
     with parent.frozen():
         spin = EditSpinCtrlDouble(name, parent, wx.NewId(), sizer, pos)
         spin.properties["style"].set_to_default()
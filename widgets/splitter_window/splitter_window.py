@@ -29,17 +29,15 @@ class ChildWidgetNameProperty(np.Property):
         if isinstance(child, SizerSlot): return None
         return child.name
 
-    def write(self, output, tabs=0):
-        value = self.get()
-        if value is not None:
-            output.extend( common.format_xml_tag(self.name, value, tabs) )
+    def snapshot(self):
+        return self.get()
 
 
 
 class SplitterWindowSizer(Sizer):
     "'Virtual sizer' responsible for the management of a SplitterWindow"
     PROPERTIES = []
-    def item_properties_modified(self, widget, modified=None, force_layout=True):
+    def item_properties_modified(self, widget, modified=None, force_layout=True, immediate=False):
         "Updates the layout of the item"
         if self.window.widget and self.window.window_old:
             if self.window.window_old.widget:
@@ -50,7 +48,7 @@ class SplitterWindowSizer(Sizer):
         if self.window._window_1 and self.window._window_2:
             self.window.split()
 
-    def set_item_best_size(self, widget, size=None, force_layout=True):
+    def set_item_best_size(self, widget, size=None, force_layout=True, immediate=False):
         pass
 
     def add_item(self, item, pos=None, proportion=0, flag=0, border=0, size=None, force_layout=True):
@@ -272,10 +270,8 @@ def builder(parent, sizer, pos, number=[1]):
     if res != wx.ID_OK:
         return
 
+    number[0] = common.app_tree.get_free_suffix(tmpl_label + '_', number[0])
     label = '%s_%d' % (tmpl_label, number[0])
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = '%s_%d' % (tmpl_label, number[0])
 
     with parent.frozen():
         widget = editor_class(label, parent, -1, None, None, orientation, sizer, pos)
@@ -59,10 +59,8 @@ class EditStaticBitmap(ManagedBase, EditStylesMixin, BitmapMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditStaticBitmap objects"
+    number[0] = common.app_tree.get_free_suffix('bitmap_', number[0])
     name = 'bitmap_%s' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'bitmap_%s' % number[0]
     bitmap = wx.FileSelector(_("Select the image"))
     with parent.frozen():
         static_bitmap = EditStaticBitmap(name, parent, wx.NewId(), bitmap, sizer, pos)
@@ -64,10 +64,8 @@ class EditStaticText(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditStaticText objects"
+    number[0] = common.app_tree.get_free_suffix(u'label_', number[0])
     label = u'label_%d' % number[0]
-    while common.app_tree.has_name(label):
-        number[0] += 1
-        label = u'label_%d' % number[0]
     with parent.frozen():
         static_text = EditStaticText(label, parent, wx.NewId(), label, sizer, pos)
         static_text.properties["style"].set_to_default()
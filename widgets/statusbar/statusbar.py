@@ -47,9 +47,13 @@ class FieldsProperty(np.GridProperty):
         col_sizes = [190, 0]
         np.GridProperty.__init__(self, value, cols, col_sizes=col_sizes)
 
-    def write(self, output, tabs):
+    def snapshot(self):
+        # tuples (label, width)
+        return tuple( (label, width) for label, width in self.value )
+
+    def write_snapshot(self, output, tabs, fields):
         inner_xml = []
-        for label, width in self.value:
+        for label, width in fields:
             inner_xml += common.format_xml_tag( u'field', label, tabs+1, width=width )
         output.extend( common.format_xml_tag( u'fields', inner_xml, tabs, is_xml=True ) )
 
@@ -173,10 +177,8 @@ def builder(parent, sizer, pos):
             number[0] -= 1
         return
 
-    name = 'statusbar_%d' % (number[0] or 1)
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'statusbar_%d' % number[0]
+    number[0] = common.app_tree.get_free_suffix('statusbar_', number[0] or 1)
+    name = 'statusbar_%d' % number[0]
 
     with parent.frozen():
         widget = EditStatusBar(name, klass, parent)
@@ -63,10 +63,8 @@ class EditToggleButton(ManagedBase, EditStylesMixin, BitmapMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditToggleButton objects"
+    number[0] = common.app_tree.get_free_suffix(u'button_', number[0])
     name = u'button_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = u'button_%d' % number[0]
     with parent.frozen():
         button = EditToggleButton(name, parent, wx.NewId(), name, sizer, pos)
         button.properties["style"].set_to_default()
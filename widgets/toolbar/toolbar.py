@@ -12,7 +12,7 @@ from __future__ import absolute_import
 import wx
 
 import common, compat, config, misc
-import os, re
+import copy, os, re
 from tree import Node
 from .tool import *
 import new_properties as np
@@ -461,9 +461,12 @@ class ToolsProperty(np.Property):
             self.on_value_edited(dialog.get_items())
         dialog.Destroy()
 
-    def write(self, output, tabs):
+    def snapshot(self):
+        return copy.deepcopy( tuple(self.get()) )
+
+    def write_snapshot(self, output, tabs, tools):
         inner_xml = []
-        for tool in self.get():
+        for tool in tools:
             tool.write(inner_xml, tabs+1)
         output.extend( common.format_xml_tag( u'tools', inner_xml, tabs, is_xml=True) )
 
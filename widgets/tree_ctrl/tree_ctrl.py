@@ -55,10 +55,8 @@ class EditTreeCtrl(ManagedBase, EditStylesMixin):
 
 def builder(parent, sizer, pos, number=[1]):
     "factory function for EditTreeCtrl objects"
+    number[0] = common.app_tree.get_free_suffix('tree_ctrl_', number[0])
     name = 'tree_ctrl_%d' % number[0]
-    while common.app_tree.has_name(name):
-        number[0] += 1
-        name = 'tree_ctrl_%d' % number[0]
     with parent.frozen():
         tree_ctrl = EditTreeCtrl(name, parent, wx.NewId(), sizer, pos)
         tree_ctrl.properties["style"].set_to_default()
@@ -10,7 +10,7 @@ Entry point of wxGlade
 
 import atexit
 import codecs
-import logging, os, sys, gettext, optparse
+import logging, os, sys, gettext, optparse, shlex, time, traceback
 
 # Use a NullWriter with Unicode support (encoding attribute) to catch and
 # drop all output in PyInstaller environment (standalone Edition)
@@ -44,7 +44,7 @@ def my_displayhook(value):
 sys.displayhook = my_displayhook
 
 
-import common, config, compat, log, errors
+import common, config, compat, decorators, log, errors, profiler
 
 
 def parse_command_line():
@@ -63,17 +63,40 @@ def parse_command_line():
                 "             <http://www.opensource.org/licenses/mit-license.php>") % config.get_version()
     usage = _("Usage: wxglade <WXG File>             start the wxGlade GUI\n"
               " or:   wxglade <Options> <WXG File>   generate code from command line\n"
+              " or:   wxglade <Options> <WXG Files>  generate code for multiple files from command line\n"
               " or:   wxglade --version              show programs version number and exit\n"
               " or:   wxglade -h|--help              show this help message and exit")
     parser = optparse.OptionParser( add_help_option=False, version=version, usage=usage )
 
     parser.add_option('-h', '--help', dest='help', action='store_true', help=_('show this help message and exit'))
-    parser.add_option("-g", "--generate-code", type="choice", choices=languages, metavar="LANG", dest="language",
-                            help=_("(required) output language, valid languages are: %s") % ", ".join(languages) )
+    parser.add_option("-g", "--generate-code", type="choice", choices=languages, metavar="LANG", dest="languages",
+                            action="append",
+                            help=_("(required) output language, valid languages are: %s; "
+                                   "may be given multiple times") % ", ".join(languages) )
     
     parser.add_option("-o", "--output", metavar="PATH", dest="output",
                             help=_("(optional) output file in single-file mode or output directory in multi-file mode"))
 
+    parser.add_option("-m", "--manifest", metavar="FILE", dest="manifest",
+                            help=_("(optional) text file with one wxg file per line, optionally followed by the "
+                                   "output path; relative paths are relative to the manifest file"))
+
+    parser.add_option("-i", "--incremental", dest="incremental", action="store_true", default=False,
+                            help=_("(optional) in multi-file mode, don't generate code for toplevel widgets that "
+                                   "were not modified since the last run"))
+
+    parser.add_option("-j", "--jobs", type="int", metavar="N", dest="jobs", default=1,
+                            help=_("(optional) number of processes to generate code for multiple files or "
+                                   "languages in parallel"))
+
+    parser.add_option("--stats", metavar="FILE", dest="stats",
+                            help=_("(optional) write a JSON report with time and number of calls per code "
+                                   "generation stage and the number of bytes written to FILE"))
+
+    parser.add_option("--profile", metavar="FILE", dest="profile",
+                            help=_("(optional) profile the code generation with cProfile and write the data to "
+                                   "FILE; implies --jobs=1"))
+
     options, args = parser.parse_args()
 
     # print epilog because OptionParser.epilog isn't available to Python 2.3
@@ -89,45 +112,95 @@ def parse_command_line():
     # Make an absolute version of path.
     # According to the invoking dir of wxGlade (which can be different
     # from '.' if it is invoked from a shell script).
-    if len(args) == 1:
-        filename = args[0]
-        if not os.path.isabs(filename):
-            filename = os.path.join(os.getcwd(), filename)
-        filename = os.path.normpath(os.path.expanduser(filename))
-        options.filename = filename
+    filenames = [_get_absolute_path(filename, os.getcwd()) for filename in args]
+    if len(filenames) == 1:
+        options.filename = filenames[0]
     else:
         options.filename = None
 
+    # check output path
+    if options.output:
+        options.output = os.path.normpath(os.path.expanduser(options.output))
+
+    # list of (wxg file, output path) to generate code for
+    options.projects = [(filename, options.output) for filename in filenames]
+    if options.manifest:
+        if not options.languages:
+            msg = _("A manifest file can be used for code generation only; specify the language.\n")
+            logging.error(msg)
+            parser.print_help()
+            sys.exit(msg)
+        try:
+            options.projects += _read_manifest(options.manifest)
+        except EnvironmentError as inst:
+            msg = _('Can not read manifest file "%s": %s\n') % (options.manifest, inst)
+            logging.error(msg)
+            sys.exit(msg)
+
     # check parameters
     #  - language
     #     - one file            -> cmdline code generation
-    #     - no / > one files    -> usage
+    #     - > one files         -> cmdline code generation for all files in one process
+    #     - no files            -> usage
     #  - no language            -> start gui
-    if options.language:
-        if len(args) == 1:
-            options.start_gui = False
-        elif len(args) == 0:
+    if options.languages:
+        options.start_gui = False
+        options.languages = [l for i, l in enumerate(options.languages) if l not in options.languages[:i]]
+        if not options.projects:
             msg = _("No wxg file given.\n")
             logging.error(msg)
             parser.print_help()
             sys.exit(msg)
-        else:
-            msg = _("Too many wxg files given.\n")
+        elif len(options.projects) > 1 and options.output:
+            msg = _("The output path can be given for a single wxg file only; use a manifest file instead.\n")
+            logging.error(msg)
+            parser.print_help()
+            sys.exit(msg)
+        elif len(options.languages) > 1 and options.output:
+            msg = _("The output path can be given for a single language only.\n")
+            logging.error(msg)
+            parser.print_help()
+            sys.exit(msg)
+        if options.jobs < 1:
+            msg = _("The number of jobs must be at least 1.\n")
             logging.error(msg)
             parser.print_help()
             sys.exit(msg)
     else:
         options.start_gui = True
 
-    # check output path
-    if options.output:
-        options.output = os.path.normpath(os.path.expanduser(options.output))
-
     return options
 
 
+def _get_absolute_path(filename, dirname):
+    "Make an absolute path; relative file names are relative to dirname"
+    filename = os.path.expanduser(filename)
+    if not os.path.isabs(filename):
+        filename = os.path.join(dirname, filename)
+    return os.path.normpath(filename)
+
+
+def _read_manifest(filename):
+    """Read a manifest file with one wxg file name per line, optionally followed by the output path.
+    Empty lines and lines starting with '#' are ignored; use quotes for names containing spaces.
+
+    returns a list of tuples (wxg file name, output path or None)"""
+    dirname = os.path.dirname( os.path.abspath(filename) )
+    projects = []
+    with open(filename) as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = shlex.split(line)
+            wxg_filename = _get_absolute_path(fields[0], dirname)
+            out_path = _get_absolute_path(fields[1], dirname)  if len(fields) > 1 else  None
+            projects.append( (wxg_filename, out_path) )
+    return projects
+
+
 def command_line_code_generation(filename, language, out_path=None):
-    """Starts a code generator without starting the GUI.
+    """Starts a code generator without starting the GUI; no wx.App will be created.
 
     filename: Name of wxg file to generate code from
     language: Code generator language
@@ -151,33 +224,78 @@ def command_line_code_generation(filename, language, out_path=None):
     sys.exit(0)
 
 
-def command_line_code_generation(filename, language, out_path=None):
-    """Starts a code generator without starting the GUI.
+def _generate_code(task):
+    """Generate code for a single pair of wxg file and language; used as worker function for parallel code generation.
 
-    filename: Name of wxg file to generate code from
-    language: Code generator language
-    out_path: output file / output directory"""
+    task: tuple (wxg file name, language, output file / output directory or None)
+    returns a tuple (duration, error message or None, statistics or None); see profiler.pop_statistics()"""
+    from xml_parse import CodeWriter
+    from xml.sax import SAXException
 
-    from main import wxGlade
-    app = wxGlade()
-    if filename is not None:
-        win = app.GetTopWindow()
-        win._open_app(filename, False)
-        win.cur_dir = os.path.dirname(filename)
+    filename, language, out_path = task
+    start = time.time()
+    error = None
     try:
         if language not in common.code_writers:
             raise errors.WxgMissingCodeWriter(language)
-        common.app_tree.app.properties["language"].set(language)
-        common.app_tree.app.generate_code(out_path=out_path)
-    except errors.WxgBaseException as inst:
-        logging.error(inst)
-        sys.exit(inst)
+        CodeWriter( writer=common.code_writers[language], input=filename, out_path=out_path )
+    except (errors.WxgBaseException, EnvironmentError, SAXException) as inst:
+        error = str(inst)
     except Exception:
-        logging.error( _("An exception occurred while generating the code for the application.\n"
-                         "If you think this is a wxGlade bug, please report it.") )
-        logging.exception(_('Internal Error'))
-        sys.exit(1)
-    sys.exit(0)
+        error = _("Internal Error:\n%s") % traceback.format_exc()
+    statistics = profiler.pop_statistics()  if profiler.enabled else  None
+    return time.time() - start, error, statistics
+
+
+def _init_code_generation_worker(incremental, statistics=False):
+    "Initialise a worker process of the process pool; required on platforms without fork()"
+    if statistics:
+        profiler.reset()
+        profiler.enable()
+    if common.code_writers: return
+    init_stage1()
+    init_stage2(False)
+    if incremental:
+        config.preferences["incremental_codegen"] = True
+
+
+def command_line_batch_code_generation(projects, languages, jobs=1):
+    """Starts the code generator for multiple wxg files and/or languages without starting the GUI.
+    The code writers and widgets are loaded only once per process; a timing report is logged at the end.
+
+    With jobs > 1, a pool of processes is used, each generating code for one pair of wxg file and language.
+    The results are reported in the order of the input and all errors are collected and logged at the end.
+
+    projects:  list of tuples (wxg file name, output file / output directory or None)
+    languages: Code generator languages
+    jobs:      Number of processes"""
+    tasks = [(filename, language, out_path) for filename, out_path in projects for language in languages]
+
+    start = time.time()
+    if jobs > 1 and len(tasks) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool( min(jobs, len(tasks)), _init_code_generation_worker,
+                                     (config.preferences.incremental_codegen, profiler.enabled) )
+        try:
+            results = pool.map(_generate_code, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_generate_code(task) for task in tasks]
+    total = time.time() - start
+
+    logging.info( _("Code generation report:") )
+    failed = []
+    for (filename, language, out_path), (duration, error, statistics) in zip(tasks, results):
+        if statistics: profiler.merge(statistics)
+        logging.info( "  %8.3fs  %-6s  %-6s  %s", duration, language, _("failed") if error else _("OK"), filename )
+        if error: failed.append( (filename, language, error) )
+    logging.info( _("%d files processed, %d failed, total time: %.3fs"), len(tasks), len(failed), total )
+
+    for filename, language, error in failed:
+        logging.error( _('Code generation for "%s" (%s) failed: %s'), filename, language, error )
+    sys.exit(1 if failed else 0)
 
 
 def init_stage1():
@@ -264,13 +382,26 @@ def run_main():
     # initialise wxGlade (first stage and second stage)
     init_stage1()
     init_stage2(options.start_gui)
+    # cache statistics; registered once per process, after log.deinit() to be called before it
+    atexit.register(decorators.log_statistics, logging.INFO if options.start_gui else logging.DEBUG)
+    if not options.start_gui and options.incremental:
+        config.preferences["incremental_codegen"] = True
 
     if options.start_gui:
         # late import of main (imported wx) for using wxversion  in init_stage2()
         import main
         main.main(options.filename)
-    else:
-        command_line_code_generation( filename=options.filename, language=options.language, out_path=options.output )
+        return
+
+    if options.profile and options.jobs > 1:
+        logging.warning( _("Profiling is limited to a single process; ignoring --jobs") )
+        options.jobs = 1
+    with profiler.Session(options.stats, options.profile):
+        if len(options.projects) == 1 and len(options.languages) == 1:
+            filename, out_path = options.projects[0]
+            command_line_code_generation( filename=filename, language=options.languages[0], out_path=out_path )
+        else:
+            command_line_batch_code_generation( options.projects, options.languages, options.jobs )
 
 if __name__ == "__main__":
     run_main()
@@ -0,0 +1,80 @@
+// -*- C++ -*-
+//
+// generated by wxGlade
+//
+// Example for compiling a single file project under Linux using g++:
+//  g++ MyApp.cpp $(wx-config --libs) $(wx-config --cxxflags) -o MyApp
+//
+// Example for compiling a multi file project under Linux using g++:
+//  g++ main.cpp $(wx-config --libs) $(wx-config --cxxflags) -o MyApp Dialog1.cpp Frame1.cpp
+//
+
+#include "wxglade_out.h"
+
+// begin wxGlade: ::extracode
+// end wxGlade
+
+
+
+MyFrame::MyFrame(wxWindow* parent, wxWindowID id, const wxString& title, const wxPoint& pos, const wxSize& size, long style):
+    wxFrame(parent, id, title, pos, size, wxDEFAULT_FRAME_STYLE)
+{
+    // begin wxGlade: MyFrame::MyFrame
+    SetSize(wxSize(200,200));
+    MyMenuBar = new wxMenuBar();
+    MyFileMenu = new wxMenu();
+    mnOpen = MyFileMenu->Append(wxID_ANY, wxT("Open"), wxT("Open a file"));
+    MyFileMenu->AppendSeparator();
+    mnExit = MyFileMenu->Append(wxID_ANY, wxT("Exit"), wxT("Leave the application"));
+    MyMenuBar->Append(MyFileMenu, wxT("File"));
+    MyHelpMenu = new wxMenu();
+    mnAbout = MyHelpMenu->Append(wxID_ANY, wxT("About"), wxT("Show the about dialog"));
+    MyMenuBar->Append(MyHelpMenu, wxT("Help"));
+    SetMenuBar(MyMenuBar);
+    MyStatusBar = CreateStatusBar(3, wxST_SIZEGRIP);
+    MyToolBar = new wxToolBar(this, -1, wxDefaultPosition, wxDefaultSize, wxTB_HORIZONTAL|wxTB_TEXT);
+    SetToolBar(MyToolBar);
+    MyToolBar->AddTool(toolOpen, wxT("Open"), wxNullBitmap, wxNullBitmap, wxITEM_NORMAL, wxT("1Open a existing file"), wxT("Open a existing file"));
+    MyToolBar->AddSeparator();
+    MyToolBar->AddTool(toolClose, wxT("Close"), wxNullBitmap, wxNullBitmap, wxITEM_NORMAL, wxT("Close the active file"), wxT("Close the active file"));
+    MyToolBar->Realize();
+    bu_Cancel = new wxButton(this, wxID_ANY, wxT("Cancel"));
+    bu_OK = new wxButton(this, wxID_ANY, wxT("OK"));
+    bu_Help = new wxButton(this, wxID_ANY, wxT("Help"));
+
+    set_properties();
+    do_layout();
+    // end wxGlade
+}
+
+
+void MyFrame::set_properties()
+{
+    // begin wxGlade: MyFrame::set_properties
+    SetTitle(wxT("XRC Import test"));
+    int MyStatusBar_widths[] = { -2, -1, -1 };
+    MyStatusBar->SetStatusWidths(3, MyStatusBar_widths);
+
+    bu_OK->SetFocus();
+    bu_Help->Enable(0);
+    // end wxGlade
+}
+
+
+void MyFrame::do_layout()
+{
+    // begin wxGlade: MyFrame::do_layout
+    wxFlexGridSizer* object_1 = new wxFlexGridSizer(2, 1, 0, 0);
+    wxGridSizer* object_3 = new wxGridSizer(1, 3, 0, 0);
+    wxStaticLine* object_2 = new wxStaticLine(this, wxID_ANY, wxDefaultPosition, wxDefaultSize, 0);
+    object_1->Add(object_2, 0, 0, 5);
+    object_3->Add(bu_Cancel, 1, 0, 5);
+    object_3->Add(bu_OK, 1, 0, 5);
+    object_3->Add(bu_Help, 1, 0, 5);
+    object_1->Add(object_3, 0, 0, 0);
+    SetSizer(object_1);
+    Layout();
+    Centre();
+    // end wxGlade
+}
+
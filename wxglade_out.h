@@ -0,0 +1,56 @@
+// -*- C++ -*-
+//
+// generated by wxGlade
+//
+// Example for compiling a single file project under Linux using g++:
+//  g++ MyApp.cpp $(wx-config --libs) $(wx-config --cxxflags) -o MyApp
+//
+// Example for compiling a multi file project under Linux using g++:
+//  g++ main.cpp $(wx-config --libs) $(wx-config --cxxflags) -o MyApp Dialog1.cpp Frame1.cpp
+//
+
+#ifndef WXGLADE_OUT_H
+#define WXGLADE_OUT_H
+
+#include <wx/wx.h>
+#include <wx/image.h>
+
+// begin wxGlade: ::dependencies
+#include <wx/statline.h>
+// end wxGlade
+
+// begin wxGlade: ::extracode
+// end wxGlade
+
+
+class MyFrame: public wxFrame {
+public:
+    // begin wxGlade: MyFrame::ids
+    // end wxGlade
+
+    MyFrame(wxWindow* parent, wxWindowID id, const wxString& title, const wxPoint& pos=wxDefaultPosition, const wxSize& size=wxDefaultSize, long style=wxDEFAULT_FRAME_STYLE);
+
+private:
+    // begin wxGlade: MyFrame::methods
+    void set_properties();
+    void do_layout();
+    // end wxGlade
+
+protected:
+    // begin wxGlade: MyFrame::attributes
+    wxMenu* MyFileMenu;
+    wxMenuItem* mnOpen;
+    wxMenuItem* mnExit;
+    wxMenu* MyHelpMenu;
+    wxMenuItem* mnAbout;
+    wxMenuBar* MyMenuBar;
+    wxStatusBar* MyStatusBar;
+    wxToolBar* MyToolBar;
+    wxButton* bu_Cancel;
+    wxButton* bu_OK;
+    wxButton* bu_Help;
+    // end wxGlade
+}; // wxGlade: end class
+
+
+#endif // WXGLADE_OUT_H
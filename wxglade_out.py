@@ -0,0 +1,94 @@
+<?xml version="1.0" encoding="UTF-8"?>
+<!-- generated by wxGlade -->
+
+<resource version="2.3.0.1">
+    <object class="wxFrame" name="appFrame" subclass="MyFrame">
+        <centered>1</centered>
+        <size>200,200</size>
+        <style>wxDEFAULT_FRAME_STYLE</style>
+        <title>XRC Import test</title>
+        <object class="wxMenuBar" name="MyMenuBar">
+            <object class="wxMenu" name="MyFileMenu">
+                <label>File</label>
+                <object class="wxMenuItem" name="mnOpen">
+                    <label>Open</label>
+                    <help>Open a file</help>
+                </object>
+                <object class="separator"/>
+                <object class="wxMenuItem" name="mnExit">
+                    <label>Exit</label>
+                    <help>Leave the application</help>
+                </object>
+            </object>
+            <object class="wxMenu" name="MyHelpMenu">
+                <label>Help</label>
+                <object class="wxMenuItem" name="mnAbout">
+                    <label>About</label>
+                    <help>Show the about dialog</help>
+                </object>
+            </object>
+        </object>
+        <object class="wxStatusBar" name="MyStatusBar">
+            <fields>3</fields>
+            <style>wxST_SIZEGRIP</style>
+            <widths>-2, -1, -1</widths>
+        </object>
+        <object class="wxToolBar" name="MyToolBar">
+            <style>wxTB_HORIZONTAL|wxTB_TEXT</style>
+            <object class="tool" name="toolOpen">
+                <label>Open</label>
+                <tooltip>1Open a existing file</tooltip>
+                <longhelp>Open a existing file</longhelp>
+            </object>
+            <object class="separator"/>
+            <object class="tool" name="toolClose">
+                <label>Close</label>
+                <tooltip>Close the active file</tooltip>
+                <longhelp>Close the active file</longhelp>
+            </object>
+        </object>
+        <object class="wxFlexGridSizer">
+            <cols>1</cols>
+            <hgap>0</hgap>
+            <rows>2</rows>
+            <vgap>0</vgap>
+            <object class="sizeritem">
+                <border>5</border>
+                <object class="wxStaticLine" name="object_2">
+                </object>
+            </object>
+            <object class="sizeritem">
+                <object class="wxGridSizer">
+                    <cols>3</cols>
+                    <hgap>0</hgap>
+                    <rows>1</rows>
+                    <vgap>0</vgap>
+                    <object class="sizeritem">
+                        <option>1</option>
+                        <border>5</border>
+                        <object class="wxButton" name="bu_Cancel">
+                            <label>Cancel</label>
+                        </object>
+                    </object>
+                    <object class="sizeritem">
+                        <option>1</option>
+                        <border>5</border>
+                        <object class="wxButton" name="bu_OK">
+                            <focused>1</focused>
+                            <label>OK</label>
+                        </object>
+                    </object>
+                    <object class="sizeritem">
+                        <option>1</option>
+                        <border>5</border>
+                        <object class="wxButton" name="bu_Help">
+                            <disabled>1</disabled>
+                            <enabled>0</enabled>
+                            <label>Help</label>
+                        </object>
+                    </object>
+                </object>
+            </object>
+        </object>
+    </object>
+</resource>
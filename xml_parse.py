@@ -9,13 +9,13 @@ See L{wcodegen.taghandler} for custom tag handler base classes.
 @license: MIT (see LICENSE.txt) - THIS PROGRAM COMES WITH NO WARRANTY
 """
 
-import logging
+import logging, os, re
 from xml.sax import SAXException, make_parser
 from xml.sax.handler import ContentHandler
 
 import time
 
-import common, config, compat
+import common, config, compat, errors, profiler
 import edit_sizers
 
 if config.use_gui:
@@ -349,6 +349,83 @@ class ProgressXmlWidgetBuilder(XmlWidgetBuilder):
                 self.progress = None
 
 
+def get_input_file_version(infile):
+    "Read the wxGlade version from the header comment of an open .wxg file; returns a tuple or None"
+    version_re = re.compile(r"<!-- generated by wxGlade (\d+)\.(\d+)\.(\d+)(\S*)\s*")
+    input_file_version = None
+    for n in range(3):
+        match = version_re.match( infile.readline() )
+        if match:
+            major, minor, sub, extension = match.groups()
+            input_file_version = (int(major), int(minor), int(major), extension)
+            break
+    infile.seek(0)
+    return input_file_version
+
+
+class CodeWriter(XmlWidgetBuilder):
+    """Parser used to produce the source code from a given XML file without starting the GUI.
+
+    The design is loaded into a L{tree.BatchTree}; no wx.App and no display are required."""
+
+    def __init__(self, writer, input, from_string=False, out_path=None):
+        import application, tree
+        self.code_writer = writer  # used by _process_app_attrs for designs without language attribute
+        self.out_path = out_path
+
+        app = application.Application()
+        common.app_tree = tree.BatchTree(app)
+        app.init()
+
+        if from_string:
+            XmlWidgetBuilder.__init__(self)
+            with profiler.stage("parse"):
+                self.parse_string(input)
+        else:
+            app.filename = input
+            if compat.PYTHON2:
+                infile = open(input)
+            else:
+                infile = open(input, "r", encoding="UTF8")
+            try:
+                XmlWidgetBuilder.__init__(self, input, get_input_file_version(infile))
+                with profiler.stage("parse"):
+                    self.parse(infile)
+            finally:
+                infile.close()
+        self.app = app
+        self.generate_code()
+
+    def _get_output_path(self):
+        "output path given on the command line or from the design, relative to the design file"
+        out_path = self.out_path
+        if out_path is None:
+            app = self.app
+            out_path = os.path.expanduser(app.output_path.strip())
+            if not os.path.isabs(out_path) and (out_path and app.filename):
+                out_path = os.path.join(os.path.dirname(app.filename), out_path)
+                out_path = os.path.normpath(out_path)
+        return out_path
+
+    def generate_code(self):
+        app = self.app
+        if app.is_template:
+            raise errors.WxgTemplateCodegenNotPossible()
+        if app.language != self.code_writer.language:
+            # update language dependent settings like the file extension of the output path
+            app.properties["language"].set(self.code_writer.language)
+            app.properties_changed(["language"])
+        writer = self.code_writer
+        try:
+            writer.new_project(app, self._get_output_path())
+            writer.generate_code(app.node)
+            with profiler.stage("finalize"):
+                writer.finalize()
+            common.save_checksum_manifests()
+        finally:
+            writer.clean_up(app.node)
+
+
 class _own_dict(dict):
     pass  # just be able to add attributes
 
@@ -360,20 +437,22 @@ class ClipboardXmlWidgetBuilder(XmlWidgetBuilder):
       - No <application> tag in the piece of xml to parse
       - Fake parent, sizer and sizeritem objects to push on the three stacks:
         they keep info about the destination of the hierarchy of widgets (i.e. the target of the 'paste' command)
-      - The first widget built must be hidden and shown again at the end of the operation"""
+      - The first widget built must be hidden and shown again at the end of the operation
+
+    With rename=False, the names are not made unique, e.g. when a toplevel is restored by undo/redo."""
 
-    def __init__(self, parent, sizer, pos, proportion, span, flag, border):
+    def __init__(self, parent, sizer, pos, proportion, span, flag, border, rename=True):
         XmlWidgetBuilder.__init__(self)
         self._renamed = {}
+        self.rename = rename
         if parent is not None:
             self.parent_node = parent.node
         else:
             # e.g. a frame is pasted
             self.parent_node = None
-            self.have_names = set()
-            # update with the top level names
-            for node in common.app_tree.names.keys():
-                self.have_names.add( node.widget.name )
+            # the top level names
+            import tree
+            self.have_names = tree.NameRegistry( node.widget.name for node in common.app_tree.names )
 
         class XmlClipboardObject(object):
             def __init__(self, **kwds):
@@ -424,47 +503,28 @@ class ClipboardXmlWidgetBuilder(XmlWidgetBuilder):
                     if not common.app_tree.has_name(newname, node=self.parent_node):
                         return newname
 
-        newname = oldname
-        if "_" in oldname:
+        if self.parent_node is not None:
+            has_name = lambda name: common.app_tree.has_name(name, node=self.parent_node)
+            get_free_suffix = lambda prefix, start: common.app_tree.get_free_suffix(prefix, start, self.parent_node)
+        else:
+            # top level, e.g. a new frame is pasted
+            has_name = self.have_names.__contains__
+            get_free_suffix = self.have_names.get_free_suffix
+
+        template, i = oldname.rpartition("_")[::2]
+        if not has_name(oldname):
+            newname = oldname
+        elif template and re.match(r"[0-9]+$", i):
             # if the old name ends with an underscore and a number, just increase the number
-            try:
-                template, i = oldname.rsplit("_", 1)
-                #i = int(i) + 1
-                i = int(i)
-                template = template + '_%s'
-                if self.parent_node is not None:
-                    while common.app_tree.has_name(newname, node=self.parent_node):
-                        newname = template%i
-                        i += 1
-                    return newname
-                # top level, e.g. a new frame is pasted
-                while newname in self.have_names:
-                    newname = template%i
-                    i += 1
-                self.have_names.add(newname)
-                return newname
-            except:
-                pass
+            newname = "%s_%d"%(template, get_free_suffix(template + "_", int(i)))
+        elif not has_name("%s_copy"%oldname):
+            # add _copy to the old name
+            newname = "%s_copy"%oldname
+        else:
+            newname = "%s_copy_%d"%(oldname, get_free_suffix(oldname + "_copy_", 1))
 
-        # add _copy to the old name
-        i = 0
-        if self.parent_node is not None:
-            while common.app_tree.has_name(newname, node=self.parent_node):
-                if not i:
-                    newname = '%s_copy' % oldname
-                else:
-                    newname = '%s_copy_%s' % (oldname, i)
-                i += 1
-            return newname
-
-        # top level, e.g. a new frame is pasted
-        while newname in self.have_names:
-            if not i:
-                newname = '%s_copy' % oldname
-            else:
-                newname = '%s_copy_%s' % (oldname, i)
-            i += 1
-        self.have_names.add(newname)
+        if self.parent_node is None:
+            self.have_names.add(newname)
         return newname
 
     def startElement(self, name, attrs):
@@ -472,7 +532,7 @@ class ClipboardXmlWidgetBuilder(XmlWidgetBuilder):
         if name == 'object' and 'name' in attrs:
             # generate a unique name for the copy
             oldname = str(attrs['name'])
-            if not common.app_tree.has_name(oldname, node=self.parent_node):
+            if not self.rename or not common.app_tree.has_name(oldname, node=self.parent_node):
                 newname = oldname
             else:
                 newname = self._get_new_name(oldname)
@@ -13,10 +13,16 @@ import logging
 import xml.dom.minidom
 import getopt
 import os.path
+import re
 import sys
 import time
 
-__version__ = '0.0.6'
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+
+__version__ = '0.0.7'
 _name = 'xrc2wxg'  # Application name
 
 
@@ -74,19 +80,42 @@ def get_child_elems(node):
     def ok(n):
         return n.nodeType == n.ELEMENT_NODE
 
-    return filter(ok, node.childNodes)
+    return [n for n in node.childNodes if ok(n)]
 
 
 def get_text_elems(node):
     def ok(n):
         return n.nodeType == n.TEXT_NODE
 
-    return filter(ok, node.childNodes)
+    return [n for n in node.childNodes if ok(n)]
 
 
 def convert(filename, output_file):
-    """Convert the given XRC file to a UTF-8 encoded wxGlade file
-    output_file: Filename, file or file-like object"""
+    """Convert the given XRC file to a UTF-8 encoded wxGlade file in a single streaming pass
+    output_file: Filename, file or file-like object or list
+
+    see: Converter, convert_minidom()"""
+    Converter().convert(filename, output_file)
+
+
+def convert_files(filenames, out_dir=None):
+    """Convert several XRC files in one process; the output files are named like the input files with the
+    extension .wxg and are placed in out_dir or next to the input files.
+    Returns a list of the written filenames."""
+    converter = Converter()
+    ret = []
+    for filename in filenames:
+        out_filename = os.path.splitext(filename)[0] + '.wxg'
+        if out_dir:
+            out_filename = os.path.join(out_dir, os.path.basename(out_filename))
+        converter.convert(filename, out_filename)
+        ret.append(out_filename)
+    return ret
+
+
+def convert_minidom(filename, output_file):
+    """Convert the given XRC file to a UTF-8 encoded wxGlade file using xml.dom.minidom
+    output_file: Filename, file or file-like object or list"""
     global _counter_name
     _counter_name = 1
 
@@ -561,15 +590,510 @@ def fix_encoding(filename, document):
             document.documentElement.removeChild(child)
 
 
+# Streaming converter ##################################################################################################
+
+_encoding_re = re.compile(r'^\s*<\?xml\s+.*(encoding\s*=\s*"(.*?)").*\?>')
+_tag_re = re.compile(r'<.+?>')
+
+
+def _escape(data):
+    "Escape text and attribute values the same way as xml.dom.minidom"
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _new_element(tag, text=None, **attributes):
+    elem = ElementTree.Element(tag)
+    for name in sorted(attributes):
+        elem.set(name, attributes[name])
+    elem.text = text
+    return elem
+
+
+class Converter(object):
+    """Convert XRC files into wxGlade files in a single pass using ElementTree.iterparse().
+
+    Each element is transformed when its end tag has been parsed, i.e. when all its children are complete.
+    Toplevel windows are serialised and released right away, so the whole document is never held in memory.
+    The output matches convert_minidom() except that XML comments are dropped and that an unnamed wxPanel inside
+    a wxFrame gets its generated name after the names of its children.
+
+    A single instance may be used to convert any number of files."""
+
+    def __init__(self):
+        self.counter = 1         # counter to create unique names
+        self._stack = []         # (element, consumed) for the currently open elements
+        self._root = None
+        self._body = []          # serialised toplevel elements; lists of UTF-8 encoded lines
+        self._encoding = None
+        self._root_content = False
+
+    def convert(self, filename, output_file):
+        """Convert the given XRC file to a UTF-8 encoded wxGlade file
+        output_file: Filename, file or file-like object or list"""
+        self.counter = 1
+        self._stack = []
+        self._root = None
+        self._body = []
+        self._root_content = False
+        with open(filename, 'rb') as infile:
+            self._encoding = self._get_declared_encoding(infile)
+            infile.seek(0)
+            for event, elem in ElementTree.iterparse(infile, ('start', 'end')):
+                if event == 'start':
+                    self._start(elem)
+                else:
+                    self._end(elem)
+        try:
+            if not hasattr(output_file, 'write') and not isinstance(output_file, list):
+                with open(output_file, 'wb') as outfile:
+                    self._write_output(outfile)
+            else:
+                self._write_output(output_file)
+        finally:
+            self._root = None
+            self._body = []
+
+    def _get_declared_encoding(self, infile):
+        "Return the encoding from the XML declaration or None"
+        for line in infile:
+            line = line.decode('latin-1')
+            match = _encoding_re.match(line)
+            if match:
+                return match.group(2)
+            elif _tag_re.match(line):
+                break
+        return None
+
+    # parser events ####################################################################################################
+    def _start(self, elem):
+        tag = elem.tag
+        if tag[:1] == '{':
+            # strip the namespace; the minidom variant removes the xmlns attribute
+            tag = elem.tag = tag[tag.index('}') + 1:]
+        if not self._stack:
+            self._root = elem
+            self._stack.append( (elem, False) )
+            return
+        parent, consumed = self._stack[-1]
+        if tag == 'object':
+            klass = elem.get('class', '')
+            # menus of a menubar and the tools of a toolbar will be re-arranged by the parent
+            if not consumed and parent.tag == 'object':
+                parent_class = parent.get('class')
+                consumed = parent_class == 'wxToolBar' or (parent_class == 'wxMenuBar' and klass == 'wxMenu')
+            if klass.startswith('wx'):
+                elem.set('base', 'Edit' + klass[2:])
+                # names are assigned in document order; a panel inside a frame may be removed in _fix_object
+                if not elem.get('name') and not (klass == 'wxPanel' and self._is_frame(parent)):
+                    self._set_name(elem)
+        self._stack.append( (elem, consumed) )
+
+    def _end(self, elem):
+        consumed = self._stack.pop()[1]
+        if not self._stack:
+            self._end_root(elem)
+            return
+        parent = self._stack[-1][0]
+        if elem.tag == 'object':
+            elem = self._fix_object(elem, parent, consumed)
+        else:
+            self._fix_property(elem)
+        if parent is self._root:
+            self._end_toplevel(elem)
+
+    def _end_toplevel(self, elem):
+        self._root.remove(elem)
+        self._root_content = True
+        if elem.tag == 'encoding' and self._encoding is None:
+            # XRCed stores the encoding in an element below the root
+            if elem.text is not None:
+                self._root.set('encoding', elem.text)
+            return
+        chunks = []
+        self._serialise(elem, chunks.append, '    ')
+        self._body.append( self._split_lines(''.join(chunks)) )
+
+    def _end_root(self, root):
+        root.tag = 'application'
+        for attribute in ['version', 'xmlns']:
+            if attribute in root.attrib:
+                del root.attrib[attribute]
+        if self._encoding is not None:
+            root.set('encoding', self._encoding)
+        if root.text is not None:
+            self._root_content = True
+
+    # helpers ##########################################################################################################
+    def _set_name(self, elem):
+        elem.set('name', 'object_%s' % self.counter)
+        self.counter += 1
+
+    def _is_frame(self, elem):
+        return elem.tag == 'object' and elem.get('class') == 'wxFrame'
+
+    def _get_index(self, parent, elem):
+        "Return the position of elem in parent; iterparse may already have added following siblings"
+        for index in range(len(parent) - 1, -1, -1):
+            if parent[index] is elem:
+                return index
+        raise ValueError("element not found")
+
+    def _insert_marker(self, parent, elem, tag):
+        "Insert a marker like <menubar>1</menubar> before elem"
+        if parent is not self._root:
+            parent.insert(self._get_index(parent, elem), _new_element(tag, '1'))
+
+    def _get_label(self, elem):
+        for child in elem:
+            if child.tag == 'label':
+                return child.text or ''
+        return ''
+
+    # transformations ##################################################################################################
+    def _fix_property(self, elem):
+        "Rename generic properties; see: _default_props"
+        tag = elem.tag
+        if tag == 'disabled':
+            elem.tag = 'disabled_bitmap'
+        elif tag in _default_props:
+            elem.tag = _default_props[tag]
+            if tag == 'enabled':
+                # invert property value after renaming from enabled to disabled
+                elem.text = u'1' if elem.text == u'0' else u'0'
+
+    def _fix_object(self, elem, parent, consumed):
+        """Apply all transformations to an object element; the steps are in the same order as in convert_minidom().
+        Returns the element that replaces elem within parent."""
+        klass = elem.get('class', '')
+        if klass in _class_props:
+            renames = _class_props[klass]
+            for child in elem:
+                if child.tag in renames:
+                    child.tag = renames[child.tag]
+        if consumed:
+            self._fix_flags(elem)
+            return elem
+
+        if klass == 'wxPanel' and not elem.get('name') and self._is_frame(parent):
+            # replace a panel that just contains a sizer
+            children = list(elem)
+            if len(children) == 1 and 'Sizer' in children[0].get('class', ''):
+                parent[self._get_index(parent, elem)] = children[0]
+                return children[0]
+            self._set_name(elem)
+
+        if klass == 'wxMenuBar':
+            self._fix_menubar(elem, parent)
+        elif klass == 'wxToolBar':
+            self._fix_toolbar(elem, parent)
+
+        if klass not in _widgets and klass not in _special_class_names:
+            self._fix_custom_widget(elem, klass)
+        elif klass == 'sizeritem':
+            for child in [c for c in elem if c.tag == 'object']:
+                elem.remove(child)
+                elem.append(child)
+        self._fix_flags(elem)
+
+        if klass == 'wxNotebook':
+            self._fix_notebook(elem)
+        elif klass == 'wxSplitterWindow':
+            self._fix_splitter(elem)
+        elif klass == 'spacer':
+            elem = self._fix_spacer(elem, parent)
+        elif klass in ('wxSlider', 'wxSpinCtrl'):
+            self._fix_slider(elem)
+        elif klass == 'wxScrolledWindow':
+            elem.insert(0, _new_element('scrollable', '1'))
+
+        if parent is self._root:
+            self._fix_toplevel_name(elem)
+        if elem.get('class') == 'wxStatusBar':
+            self._fix_statusbar(elem, parent)
+        return elem
+
+    def _fix_menubar(self, menubar, parent):
+        "Rearrange the wxMenu elements; see: fix_menus()"
+        wxg_menus = _new_element('menus')
+        for menu in [c for c in menubar if c.tag == 'object' and c.get('class') == 'wxMenu']:
+            new_menu = _new_element('menu')
+            new_menu.set('name', menu.get('name', ''))
+            new_menu.set('label', self._get_label(menu))
+            self._fix_sub_menus(menu, new_menu)
+            wxg_menus.append(new_menu)
+            menubar.remove(menu)
+        menubar.append(wxg_menus)
+        self._insert_marker(parent, menubar, 'menubar')
+
+    def _fix_sub_menus(self, menu, new_menu):
+        for child in menu:
+            klass = child.get('class')
+            if klass == 'wxMenuItem':
+                elem = _new_element('item')
+                elem.append( _new_element('name', child.get('name', '')) )
+                elem.extend( list(child) )
+            elif klass == 'separator':
+                elem = _new_element('item')
+                for name in 'label', 'id', 'name':
+                    elem.append( _new_element(name, '---') )
+            elif klass == 'wxMenu':
+                elem = _new_element('menu')
+                elem.set('name', child.get('name', ''))
+                elem.set('label', self._get_label(child))
+                self._fix_sub_menus(child, elem)
+            else:
+                continue
+            new_menu.append(elem)
+
+    def _fix_toolbar(self, toolbar, parent):
+        "Rearrange the tools; see: fix_tools()"
+        tools = _new_element('tools')
+        for tool in [c for c in toolbar if c.tag == 'object']:
+            klass = tool.get('class')
+            if klass == 'tool':
+                new_tool = _new_element('tool')
+                new_tool.append( _new_element('id', tool.get('name', '')) )
+                new_tool.extend( list(tool) )
+                tools.append(new_tool)
+            elif klass == 'separator':
+                new_tool = _new_element('tool')
+                new_tool.append( _new_element('id', '---') )
+                tools.append(new_tool)
+            # some kind of control, unsupported at the moment, just remove it
+            toolbar.remove(tool)
+        toolbar.append(tools)
+        self._insert_marker(parent, toolbar, 'toolbar')
+
+    def _fix_custom_widget(self, elem, klass):
+        logging.warning('Unknown widget "%s" - fallback to generic widget "CustomWidget"' % klass)
+        elem.set('base', 'CustomWidget')
+        args = _new_element('arguments')
+        for child in list(elem):
+            # if child is a 'simple' attribute, i.e <child>value</child>, convert it to an 'argument'
+            if not len(child) and child.text is not None:
+                args.append( _new_element('argument', child.tag + ': ' + child.text) )
+                elem.remove(child)
+        elem.append(args)
+
+    def _fix_flags(self, elem):
+        for flag in elem:
+            if flag.tag != 'flag' or not flag.text:
+                continue
+            value = flag.text.replace('CENTRE', 'CENTER').replace('GROW', 'EXPAND')
+            if value.find('wxALIGN_CENTER_HORIZONTAL') < 0 and value.find('wxALIGN_CENTER_VERTICAL') < 0:
+                value = value.replace('wxALIGN_CENTER', 'wxALIGN_CENTER_HORIZONTAL|wxALIGN_CENTER_VERTICAL')
+            flag.text = value
+
+    def _fix_notebook(self, nb):
+        pages = [c for c in nb if c.get('class') == 'notebookpage']
+        tabs = _new_element('tabs')
+        for child in nb:
+            if child.tag == 'usenotebooksizer':
+                nb.remove(child)
+                break
+        for page in pages:
+            tab = _new_element('tab')
+            obj = None
+            for c in page:
+                if c.tag == 'label':
+                    tab.text = c.text
+                elif c.tag == 'object':
+                    tab.set('window', c.get('name', ''))
+                    c.set('base', 'NotebookPane')
+                    obj = c
+            tabs.append(tab)
+            index = list(nb).index(page)
+            if obj is None:
+                del nb[index]
+            else:
+                nb[index] = obj
+        nb.insert(0, tabs)
+
+    def _fix_splitter(self, sp):
+        panes = [c for c in sp if c.tag == 'object']
+        assert len(panes) <= 2, "Splitter window with more than 2 panes!"
+        for i, pane in enumerate(panes):
+            sp.insert(0, _new_element('window_%s' % (i + 1), pane.get('name', '')))
+        for orient in sp:
+            if orient.tag != 'orientation':
+                continue
+            if orient.text == 'vertical':
+                orient.text = 'wxVERTICAL'
+            elif orient.text == 'horizontal':
+                orient.text = 'wxHORIZONTAL'
+
+    def _fix_spacer(self, spacer, parent):
+        "Move the spacer into a new sizeritem; returns the sizeritem"
+        spacer.set('name', 'spacer')
+        spacer.set('base', 'EditSpacer')
+        sizeritem = _new_element('object')
+        sizeritem.set('class', 'sizeritem')
+        for child in list(spacer):
+            spacer.remove(child)
+            if child.tag == 'size':
+                w, h = [s.strip() for s in child.text.split(',')]
+                spacer.append( _new_element('width', w) )
+                spacer.append( _new_element('height', h) )
+            else:
+                sizeritem.append(child)
+        parent[self._get_index(parent, spacer)] = sizeritem
+        sizeritem.append(spacer)
+        return sizeritem
+
+    def _fix_slider(self, slider):
+        v1, v2 = 0, 100
+        for child in list(slider):
+            if child.tag == 'min':
+                v1 = child.text.strip()
+                slider.remove(child)
+            elif child.tag == 'max':
+                v2 = child.text.strip()
+                slider.remove(child)
+        slider.append( _new_element('range', '%s, %s' % (v1, v2)) )
+
+    def _fix_toplevel_name(self, widget):
+        klass = widget.get('class')
+        if not klass:
+            return  # don't add a new 'class' attribute if it doesn't exist
+        if klass == 'wxPanel':
+            widget.set('base', 'EditTopLevelPanel')
+        klass_name = kn = klass.replace('wx', 'My')
+        name = widget.get('name', '')
+        i = 1
+        while klass_name == name:
+            klass_name = kn + str(i)
+            i += 1
+        widget.set('class', klass_name)
+
+    def _fix_statusbar(self, statusbar, parent):
+        "Rearrange the wxStatusBar elements; see: fix_statusbar()"
+        fields = [c for c in statusbar if c.tag == 'fields']
+        widths = [c for c in statusbar if c.tag == 'widths']
+        fields_count = int(fields[0].text) if fields else 1
+        widths_data = widths[0].text.split(',') if widths else []
+        if fields_count > len(widths_data):
+            widths_data += ["-1"] * (fields_count - len(widths_data))
+
+        new_fields = _new_element('fields')
+        for pos in range(fields_count):
+            new_fields.append( _new_element('field', '', width=widths_data[pos]) )
+        for child in fields + widths:
+            statusbar.remove(child)
+        statusbar.append(new_fields)
+        self._insert_marker(parent, statusbar, 'statusbar')
+
+    # output ###########################################################################################################
+    def _serialise(self, elem, write, indent):
+        "Write elem like xml.dom.minidom.Element.writexml() with an indentation of four spaces"
+        tag = elem.tag
+        write(indent + "<" + tag)
+        for name, value in elem.items():
+            write(' %s="%s"' % (name, _escape(value)))
+        if not len(elem):
+            if elem.text is None:
+                write("/>\n")
+            else:
+                write(">%s</%s>\n" % (_escape(elem.text), tag))
+            return
+        write(">\n")
+        sub_indent = indent + '    '
+        if elem.text:
+            write(_escape(sub_indent + elem.text + '\n'))
+        for child in elem:
+            self._serialise(child, write, sub_indent)
+            if child.tail:
+                write(_escape(sub_indent + child.tail + '\n'))
+        write("%s</%s>\n" % (indent, tag))
+
+    def _split_lines(self, text):
+        "Encode text and split it into lines; empty lines are dropped"
+        return [line for line in text.encode('UTF-8', 'xmlcharrefreplace').splitlines() if line.strip()]
+
+    def _write_output(self, output):
+        if _write_timestamp:
+            msg = ' generated by %s %s on %s '%( _name, __version__, time.asctime() )
+        else:
+            msg = ' generated by xrc2wxg '
+        root = self._root
+        head = ['<?xml version="1.0" encoding="UTF-8"?>\n<!--%s-->\n<%s' % (msg, root.tag)]
+        for name, value in root.items():
+            head.append(' %s="%s"' % (name, _escape(value)))
+        head.append(">\n" if self._root_content else "/>\n")
+        lines = self._split_lines(''.join(head))
+        for chunk in self._body:
+            lines.extend(chunk)
+        if self._root_content:
+            lines.append(b'</application>')
+
+        if hasattr(output, "write"):
+            for line in lines:
+                output.write(line)
+                output.write(b'\n')
+        else:
+            output.extend([line + b'\n' for line in lines])
+
+
+def benchmark(filenames, repeat=3):
+    """Convert each file with convert_minidom() and with the streaming converter and print the best times.
+    Returns a list of dicts with filename, times in seconds, peak memory in bytes (None if not available) and
+    whether the outputs are identical."""
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+    from timeit import default_timer
+
+    converters = [('minidom', convert_minidom), ('streaming', convert)]
+    ret = []
+    for filename in filenames:
+        result = {'filename': filename}
+        outputs = {}
+        for name, function in converters:
+            times = []
+            for i in range(repeat):
+                output = []
+                start = default_timer()
+                function(filename, output)
+                times.append(default_timer() - start)
+            outputs[name] = output
+            result['%s_time' % name] = min(times)
+            peak = None
+            if tracemalloc is not None:
+                tracemalloc.start()
+                function(filename, [])
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            result['%s_memory' % name] = peak
+        # the first two lines are the XML declaration and the comment with the timestamp
+        result['identical'] = outputs['minidom'][2:] == outputs['streaming'][2:]
+        ret.append(result)
+
+        msg = '%s: minidom %.1f ms, streaming %.1f ms (x%.1f)' % (
+            filename, result['minidom_time'] * 1000, result['streaming_time'] * 1000,
+            result['minidom_time'] / max(result['streaming_time'], 1e-9) )
+        if tracemalloc is not None:
+            msg += '; peak memory %d kB / %d kB' % (result['minidom_memory'] // 1024,
+                                                    result['streaming_memory'] // 1024)
+        if not result['identical']:
+            msg += '; output differs'
+        print(msg)
+    return ret
+
+
 def usage():
     msg = """\
 usage: python %s OPTIONS <INPUT_FILE.xrc> [WXG_FILE]
+       python %s OPTIONS <INPUT_FILE.xrc> <INPUT_FILE.xrc> ...
 
 OPTIONS:
   -d, --debug: debug mode, i.e. you can see the whole traceback of each error
+  -o, --output-dir DIR: write the WXG files of multiple input files into DIR
+  --minidom: use the old converter based on xml.dom.minidom
+  --benchmark: compare the streaming converter with the minidom converter;
+               no files will be written
 
 If WXG_FILE is not given, it defaults to INPUT_FILE.wxg
-    """ % _name
+    """ % (_name, _name)
     print( msg)
     sys.exit(1)
 
@@ -593,24 +1117,43 @@ cases).
 
 def main():
     try:
-        options, args = getopt.getopt(sys.argv[1:], "d", ['debug'])
+        options, args = getopt.getopt(sys.argv[1:], "do:", ['debug', 'output-dir=', 'minidom', 'benchmark'])
     except getopt.GetoptError:
         usage()
     if not args:
         usage()
-    infilename = args[0]
-    try:
-        out_filename = args[1]
-    except IndexError:
-        out_filename = os.path.splitext(infilename)[0] + '.wxg'
-    if not options:
-        try:
-            convert(infilename, out_filename)
-        except:
-            # catch the exception and print a nice message
-            print_exception()
-    else:  # if in debug mode, let the traceback be printed
-        convert(infilename, out_filename)
+    options = dict(options)
+    debug = '-d' in options or '--debug' in options
+    out_dir = options.get('-o') or options.get('--output-dir')
+
+    if '--benchmark' in options:
+        benchmark(args)
+        return
+
+    if len(args) == 2 and not args[1].lower().endswith('.xrc') and not out_dir:
+        # a single input file and the name of the output file
+        jobs = [(args[0], args[1])]
+    else:
+        jobs = []
+        for infilename in args:
+            out_filename = os.path.splitext(infilename)[0] + '.wxg'
+            if out_dir:
+                out_filename = os.path.join(out_dir, os.path.basename(out_filename))
+            jobs.append( (infilename, out_filename) )
+
+    if '--minidom' in options:
+        function = convert_minidom
+    else:
+        function = Converter().convert
+    for infilename, out_filename in jobs:
+        if not debug:
+            try:
+                function(infilename, out_filename)
+            except:
+                # catch the exception and print a nice message
+                print_exception()
+        else:  # if in debug mode, let the traceback be printed
+            function(infilename, out_filename)
 
 
 if __name__ == '__main__':